@@ -1,4 +1,5 @@
 import streamlit as st
+from data.warmup import start_warmup, startup_panel
 
 # ==================== PAGE CONFIG ====================
 st.set_page_config(
@@ -7,6 +8,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# ==================== BACKGROUND WARM-UP ====================
+# Loads the data and each page's default view while this page is read
+start_warmup()
+startup_panel()
+
 # ==================== CUSTOM CSS ====================
 st.markdown(
     """
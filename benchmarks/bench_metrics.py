@@ -0,0 +1,117 @@
+"""Row-wise apply/lambda vs the vectorized kernels in data.metrics.
+
+    python benchmarks/bench_metrics.py [--rows 1000000] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data.metrics import (  # noqa: E402
+    customer_type,
+    lead_time_behavior,
+    risk_category,
+    status_flag,
+)
+
+
+def make_bookings(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "booking_id": np.arange(rows),
+        "customer_id": rng.integers(0, rows // 3 + 1, rows),
+        "partner_name": pd.Categorical.from_codes(
+            rng.integers(0, 40, rows), [f"Partner {i}" for i in range(40)]
+        ),
+        "booking_status": pd.Categorical.from_codes(
+            rng.choice(3, rows, p=[0.75, 0.18, 0.07]), ["Confirmed", "Cancelled", "Pending"]
+        ),
+        "lead_time_days": rng.integers(0, 120, rows),
+        "total_booking_value": rng.gamma(2.0, 20_000, rows),
+    })
+
+
+def timed(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+# ==================== CASES ====================
+def cancellations_lambda(df):
+    return df.groupby("partner_name", observed=True)["booking_status"].agg(
+        lambda x: (x == "Cancelled").sum()
+    )
+
+
+def cancellations_vectorized(df):
+    flags = pd.Series(status_flag(df["booking_status"], "Cancelled"), index=df.index)
+    return flags.groupby(df["partner_name"], observed=True).sum()
+
+
+def lead_time_apply(df):
+    return df["lead_time_days"].apply(
+        lambda x: "Early Booking (15+ days)" if x >= 15 else "Last-Minute Booking (<15 days)"
+    )
+
+
+def customer_type_apply(counts):
+    return counts.apply(lambda x: "Repeat Customer" if x > 1 else "New Customer")
+
+
+def risk_apply(perf):
+    cancel_median = perf["Cancellation Rate %"].median()
+    revenue_median = perf["Revenue"].median()
+    return perf.apply(
+        lambda x: "High Risk"
+        if (x["Cancellation Rate %"] > cancel_median and x["Revenue"] < revenue_median)
+        else "Stable",
+        axis=1
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_bookings(args.rows)
+    counts = df.groupby("customer_id")["booking_id"].count()
+    perf = pd.DataFrame({
+        "Cancellation Rate %": np.random.default_rng(1).uniform(0, 40, len(counts)),
+        "Revenue": counts.to_numpy() * 1_000.0,
+    })
+
+    cases = [
+        ("cancellations per partner", lambda: cancellations_lambda(df),
+         lambda: cancellations_vectorized(df)),
+        ("lead time label", lambda: lead_time_apply(df),
+         lambda: lead_time_behavior(df["lead_time_days"])),
+        ("customer type label", lambda: customer_type_apply(counts),
+         lambda: customer_type(counts)),
+        ("risk category", lambda: risk_apply(perf),
+         lambda: risk_category(perf["Cancellation Rate %"], perf["Revenue"])),
+    ]
+
+    print(f"{args.rows:,} bookings, {len(counts):,} customers, best of {args.repeat}\n")
+    print(f"{'case':<28}{'apply (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for name, slow, fast in cases:
+        slow_s, expected = timed(slow, args.repeat)
+        fast_s, actual = timed(fast, args.repeat)
+
+        if not np.array_equal(np.asarray(expected, dtype=object), np.asarray(actual, dtype=object)):
+            raise SystemExit(f"{name}: vectorized result differs from apply")
+        print(f"{name:<28}{slow_s:>12.3f}{fast_s:>16.4f}{slow_s / fast_s:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
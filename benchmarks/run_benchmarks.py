@@ -0,0 +1,424 @@
+"""Benchmark load_data() and every page's data path at several dataset sizes.
+
+    python benchmarks/run_benchmarks.py --sizes 10000,100000 --save local
+    python benchmarks/run_benchmarks.py --sizes 10000,100000 --compare local
+
+Each size runs in its own subprocess against a synthetic workbook from
+data.synthetic (generated once into data/generated/). Stages report the
+best wall time over --repeat runs, the peak RSS of the first run and
+the peak traced allocations of a separate tracemalloc run.
+
+Each page's compute is also broken down into filter / merge / groupby
+time, attributed by a separate cProfile run (profiler overhead
+included, so compare them run to run rather than with the compute
+wall time), and its figures are timed on their own.
+
+Baselines live in benchmarks/baselines/<name>.json; --compare exits
+non-zero when a stage regresses past --tolerance or a stage the
+baseline timed is now skipped.
+"""
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+GENERATED_DIR = ROOT / "data" / "generated"
+
+# Differences below these floors are treated as noise in --compare
+MIN_WALL_DELTA_S = 0.05
+MIN_RSS_DELTA_MB = 32.0
+
+
+# ==================== MEASUREMENT ====================
+def reset_peak_rss():
+    # Linux only: "5" resets VmHWM so each stage gets its own peak
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(fn, repeat=3, setup=None):
+    """Run fn() and return (result, {wall_s, peak_rss_mb, alloc_peak_mb})."""
+    best = float("inf")
+    peak_rss = None
+    result = None
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        reset_peak_rss()
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+        if peak_rss is None:
+            peak_rss = peak_rss_mb()
+
+    # Allocations in a separate pass: tracemalloc slows Python-heavy code down
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        "wall_s": best,
+        "peak_rss_mb": peak_rss,
+        "alloc_peak_mb": alloc_peak / (1024 * 1024),
+    }
+
+
+# Sub-stage -> predicate on a profiled function's (file, name)
+SUBSTAGES = {
+    "filter": lambda path, name: (
+        path.endswith(os.path.join("data", "filters.py"))
+        or name in ("cube_window", "sailing_window")
+    ),
+    "merge": lambda path, name: path.endswith(os.path.join("reshape", "merge.py")),
+    "groupby": lambda path, name: os.path.join("core", "groupby", "") in path,
+}
+
+
+def substage_of(func):
+    path, _, name = func
+    return next((stage for stage, match in SUBSTAGES.items() if match(path, name)), None)
+
+
+def profile_substages(fn, setup=None):
+    """Seconds fn() spends in each SUBSTAGES bucket, from one cProfile run.
+
+    Only calls entering a bucket from outside it are counted, so nested
+    calls (a groupby inside a groupby) aren't counted twice.
+    """
+    if setup is not None:
+        setup()
+    profiler = cProfile.Profile()
+    profiler.runcall(fn)
+
+    totals = dict.fromkeys(SUBSTAGES, 0.0)
+    for func, (_, _, _, _, callers) in pstats.Stats(profiler).stats.items():
+        stage = substage_of(func)
+        if stage is None:
+            continue
+        totals[stage] += sum(
+            cumulative for caller, (_, _, _, cumulative) in callers.items()
+            if substage_of(caller) != stage
+        )
+    return {stage: {"wall_s": seconds} for stage, seconds in totals.items()}
+
+
+# ==================== PAGE PIPELINES ====================
+def page_pipelines():
+    from data.aggregations import (
+        booking_insights,
+        cohort_retention,
+        cruise_performance,
+        customer_summary,
+        discount_by_cruise,
+        partner_performance,
+        pricing_performance,
+        revenue_by_route,
+        revenue_trend,
+    )
+    from data.forecast import forecast_models
+
+    return {
+        "1_Executive_Overview": lambda d, f: (d["kpi"].compare(f), revenue_trend(d, f)),
+        "2_Booking_Insights": booking_insights,
+        "3_Route_Performance": lambda d, f: (
+            revenue_by_route(d, f), cruise_performance(d, f)
+        ),
+        "4_Pricing_&_Revenue_Leakage": lambda d, f: (
+            pricing_performance(d, f), discount_by_cruise(d, f, "discount_amount")
+        ),
+        "5_Partner_Performance": lambda d, f: partner_performance(d, f, "partner_name"),
+        "6_Customer_Behavior_&_Loyalty": lambda d, f: (
+            customer_summary(d, f), cohort_retention(d, f)
+        ),
+        "8_Forecast_&_Planning": lambda d, f: forecast_models(d),
+    }
+
+
+def page_figures():
+    """Page -> fn(pipeline result) building the page's charts from it."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from data.timeseries import prepare_trend
+
+    def bars(frame, x, y):
+        if frame is None or x not in frame.columns:
+            return None
+        return px.bar(frame.sort_values(x), x=x, y=y, orientation="h", color=x)
+
+    def pie(frame, names, values):
+        return None if frame is None else px.pie(frame, names=names, values=values, hole=0.45)
+
+    def insights(result):
+        trend, _ = prepare_trend(result["trend"], "booking_date", "Bookings")
+        return [
+            px.area(trend, x="booking_date", y="Bookings"),
+            bars(result["channel"], "Bookings", "booking_channel"),
+            pie(result["device"], "device_type", "Bookings"),
+            px.bar(result["lead"], x="booking_behavior", y="Bookings", color="booking_behavior"),
+            px.bar(result["origin"], x="customer_type", y="Bookings", color="customer_type"),
+        ]
+
+    def customers(result):
+        summary, cohorts = result
+        return [
+            pie(summary["types"], "Customer Type", "Customers"),
+            px.bar(summary["frequency"], x="Bookings", y="Customers", color="Customers"),
+            pie(summary["revenue_split"], "Group", "Revenue"),
+            None if cohorts is None else px.imshow(cohorts["retention"], aspect="auto"),
+        ]
+
+    def forecast(model):
+        if model is None:
+            return None
+        predicted = model.predict(model.row("Bookings", "Fleet"), 90)
+        return go.Figure([
+            go.Scatter(x=predicted["day"], y=predicted[column], name=column)
+            for column in ("Lower", "Forecast", "Upper")
+        ])
+
+    return {
+        # Page 1 hands the prepared trend to st.line_chart
+        "1_Executive_Overview": lambda r: prepare_trend(r[1], "day", "total_booking_value"),
+        "2_Booking_Insights": insights,
+        "3_Route_Performance": lambda r: [
+            bars(r[0], "Revenue", "Route"), bars(r[1], "Occupancy %", "cruise_name")
+        ],
+        "4_Pricing_&_Revenue_Leakage": lambda r: [
+            bars(r[0], "Revenue per Seat", "cruise_name"),
+            bars(r[0], "Revenue", "cruise_name"),
+            bars(r[1], "Discount_Total", "cruise_name"),
+        ],
+        "5_Partner_Performance": lambda r: [
+            bars(r, "Revenue", "partner_name"),
+            pie(r, "partner_name", "Bookings"),
+            bars(r, "Cancellation Rate %", "partner_name"),
+        ],
+        "6_Customer_Behavior_&_Loyalty": customers,
+        "8_Forecast_&_Planning": forecast,
+    }
+
+
+def run_page_script(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "pages" / f"{page}.py"), default_timeout=600).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+# ==================== WORKER ====================
+def run_worker(args):
+    """Runs inside the per-size subprocess; prints one JSON document."""
+    from data.data_loader import build_dataset
+    from data.filters import FilterState
+    from data.memo import clear_caches
+
+    cache_dir = Path(os.environ["ICRUISE_CACHE_DIR"])
+    stages = {}
+
+    def drop_ingest_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    _, stages["load (cold)"] = measure(build_dataset, repeat=1, setup=drop_ingest_cache)
+    data, stages["load (warm)"] = measure(build_dataset, repeat=args.repeat)
+
+    filters = FilterState()
+    figures = page_figures()
+    for page, pipeline in page_pipelines().items():
+        try:
+            result, stages[f"{page}: compute"] = measure(
+                lambda: pipeline(data, filters), repeat=args.repeat, setup=clear_caches
+            )
+            _, stages[f"{page}: memo hit"] = measure(
+                lambda: pipeline(data, filters), repeat=args.repeat
+            )
+            breakdown = profile_substages(lambda: pipeline(data, filters), setup=clear_caches)
+            for substage, m in breakdown.items():
+                stages[f"{page}:   {substage}"] = m
+            _, stages[f"{page}:   figure"] = measure(
+                lambda: figures[page](result), repeat=args.repeat
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            stages[f"{page}: compute"] = {"skipped": f"{type(exc).__name__}: {exc}"}
+
+    if args.apptest:
+        # First run pays for load_data() inside Streamlit's cache; not timed
+        try:
+            run_page_script("1_Executive_Overview")
+        except RuntimeError:
+            pass
+        for page in page_pipelines():
+            try:
+                _, stages[f"{page}: page"] = measure(
+                    lambda: run_page_script(page), repeat=1, setup=clear_caches
+                )
+            except RuntimeError as exc:
+                stages[f"{page}: page"] = {"skipped": str(exc)[:200]}
+
+    print(json.dumps({"rows": len(data["bookings"]), "stages": stages}))
+    return 0
+
+
+def run_size(size, args):
+    from data.synthetic import generate
+
+    workbook = GENERATED_DIR / f"bench_{size}_seed{args.seed}.xlsx"
+    if not workbook.exists():
+        print(f"generating {workbook.name} ...", file=sys.stderr)
+        generate(workbook, "xlsx", bookings=size, seed=args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="icruise-bench-") as cache_dir:
+        env = dict(
+            os.environ,
+            ICRUISE_WORKBOOK=str(workbook),
+            ICRUISE_CACHE_DIR=cache_dir,
+            STREAMLIT_LOGGER_LEVEL="error",
+        )
+        cmd = [
+            sys.executable, __file__, "--worker",
+            "--repeat", str(args.repeat),
+            "--apptest" if args.apptest else "--no-apptest",
+        ]
+        out = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+
+    if out.returncode != 0:
+        raise SystemExit(f"size {size}: worker failed\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ==================== REPORT / BASELINES ====================
+def print_report(results):
+    for size, result in results.items():
+        print(f"\n== {int(size):,} bookings ==")
+        print(f"{'stage':<44}{'wall (s)':>10}{'peak RSS (MB)':>15}{'alloc (MB)':>12}")
+        for stage, m in result["stages"].items():
+            if "skipped" in m:
+                print(f"{stage:<44}  skipped ({m['skipped'][:60]})")
+                continue
+            if "peak_rss_mb" not in m:  # profiled sub-stage: time only
+                print(f"{stage:<44}{m['wall_s']:>10.3f}")
+                continue
+            print(
+                f"{stage:<44}{m['wall_s']:>10.3f}{m['peak_rss_mb']:>15.1f}"
+                f"{m['alloc_peak_mb']:>12.1f}"
+            )
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, result in results.items():
+        base_stages = baseline["results"].get(size, {}).get("stages", {})
+        for stage, m in result["stages"].items():
+            base = base_stages.get(stage)
+            if base is None or "skipped" in base:
+                continue
+            if "skipped" in m:
+                # A page that starts failing is skipped, not slower
+                regressions.append(f"{size} {stage}: timed -> skipped ({m['skipped'][:80]})")
+                continue
+
+            wall_limit = max(base["wall_s"] * (1 + tolerance), base["wall_s"] + MIN_WALL_DELTA_S)
+            if m["wall_s"] > wall_limit:
+                regressions.append(
+                    f"{size} {stage}: wall {base['wall_s']:.3f}s -> {m['wall_s']:.3f}s"
+                )
+            if "peak_rss_mb" not in m or "peak_rss_mb" not in base:
+                continue
+            rss_limit = max(
+                base["peak_rss_mb"] * (1 + tolerance), base["peak_rss_mb"] + MIN_RSS_DELTA_MB
+            )
+            if m["peak_rss_mb"] > rss_limit:
+                regressions.append(
+                    f"{size} {stage}: RSS {base['peak_rss_mb']:.0f}MB -> {m['peak_rss_mb']:.0f}MB"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000",
+                        help="comma-separated booking counts (xlsx caps at 1,048,575)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--apptest", action=argparse.BooleanOptionalAction, default=True,
+                        help="also time each page script end to end (figures included)")
+    parser.add_argument("--save", metavar="NAME", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="NAME", help="fail on regressions vs a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        results[str(size)] = run_size(size, args)
+    print_report(results)
+
+    document = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(document, indent=2))
+        print(f"\nbaseline written to {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions vs {args.compare} (tolerance {args.tolerance:.0%})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+import numpy as np
+import pandas as pd
+
+from data.cohorts import CohortIndex, cohort_matrix, month_codes
+from data.filters import apply_filters, booking_span, date_bounds
+from data.inventory import departure_window, low_load_sailings, sailing_window
+from data.memo import memoized
+from data.metrics import (
+    customer_type,
+    lead_time_behavior,
+    risk_category,
+    safe_rate,
+    status_flag,
+)
+from data.rollup import cube_window, rollup
+from data.sketches import SKETCH_EXACT_BOOKINGS, revenue_split, summary_from_sketches
+from data.star_schema import attach_dimensions
+
+# Page computations as pure functions of (dataset, FilterState, ...).
+# Each result is memoized on the dataset fingerprint plus the normalized
+# filters, so a repeated view is a dictionary lookup. Row-level work goes
+# to data["backend"] (DuckDB) when the dataset has one.
+
+
+# ==================== EXECUTIVE OVERVIEW ====================
+@memoized()
+def revenue_trend(data, filters):
+    return rollup(cube_window(data["cube"], filters), "day", ["total_booking_value"])
+
+
+# ==================== BOOKING INSIGHTS ====================
+@memoized()
+def booking_insights(data, filters):
+    """Daily volume, channel/device mix, lead time and origin for page 2."""
+    backend = data.get("backend")
+    if backend is not None:
+        lead = backend.lead_time_counts(filters)
+        lead = (
+            lead
+            .assign(booking_behavior=lead_time_behavior(lead["lead_time_days"]))
+            .groupby("booking_behavior", as_index=False, observed=True)
+            .agg(Bookings=("Bookings", "sum"))
+        )
+        return {
+            "trend": backend.booking_trend(filters),
+            "channel": backend.count_by(filters, "booking_channel"),
+            "device": backend.count_by(filters, "device_type"),
+            "lead": lead,
+            "origin": backend.origin_counts(filters),
+        }
+
+    filtered = apply_filters(data["bookings"], filters).merge(
+        data["customers"],
+        on="customer_id",
+        how="left"
+    )
+
+    def count_by(column):
+        return (
+            filtered
+            .groupby(column, as_index=False, observed=True)
+            .agg(Bookings=("booking_id", "count"))
+        )
+
+    trend = (
+        filtered
+        .assign(day=filtered["booking_date"].dt.date)
+        .groupby("day", as_index=False)
+        .agg(Bookings=("booking_id", "count"))
+        .rename(columns={"day": "booking_date"})
+    )
+
+    lead_time_days = (filtered["cruise_date"] - filtered["booking_date"]).dt.days
+    filtered["booking_behavior"] = lead_time_behavior(lead_time_days)
+
+    return {
+        "trend": trend,
+        "channel": count_by("booking_channel"),
+        "device": count_by("device_type"),
+        "lead": count_by("booking_behavior"),
+        "origin": count_by("customer_type"),
+    }
+
+
+# ==================== ROUTE & CRUISE PERFORMANCE ====================
+def route_labels(dim_routes):
+    if "origin" in dim_routes.columns and "destination" in dim_routes.columns:
+        return (
+            dim_routes["origin"].astype("string")
+            + " → "
+            + dim_routes["destination"].astype("string")
+        )
+    return dim_routes["route_name"]
+
+
+@memoized()
+def revenue_by_route(data, filters):
+    dim_routes = data["dim_routes"].assign(Route=route_labels)
+    window = cube_window(data["cube"], filters)
+
+    return (
+        attach_dimensions(rollup(window, "route_key"), dim_routes, ["Route"])
+        .groupby("Route", as_index=False)
+        .agg(
+            Revenue=("total_booking_value", "sum"),
+            Bookings=("bookings", "sum")
+        )
+    )
+
+
+def _last_day(data):
+    span = booking_span(data["bookings"])
+    return span[1] if span else None
+
+
+@memoized()
+def cruise_performance(data, filters):
+    """Per-cruise seats, revenue, sailings and occupancy.
+
+    With a sailing inventory, occupancy is seats sold over the capacity of
+    every sailing that departed in the window; without one it falls back to
+    booked seats over a single ship's capacity.
+    """
+    if data.get("sailings") is not None:
+        return _cruise_sailings(data, filters)
+
+    window = cube_window(data["cube"], filters)
+    cruise_rollup = attach_dimensions(rollup(window, "cruise_key"), data["dim_cruises"])
+
+    # ---- SAFE GROUP BY (ADAPTIVE TO DATASET) ----
+    base_dims = ["cruise_name", "total_seats"]
+    optional_dims = [
+        col for col in ["cruise_type", "duration_nights"] if col in cruise_rollup.columns
+    ]
+
+    cruise_perf = (
+        cruise_rollup
+        .groupby(base_dims + optional_dims, as_index=False, observed=True)
+        .agg(
+            Seats_Booked=("seats_booked", "sum"),
+            Revenue=("total_booking_value", "sum"),
+            Sailings=("bookings", "sum")
+        )
+    )
+
+    cruise_perf["Occupancy %"] = safe_rate(
+        cruise_perf["Seats_Booked"], cruise_perf["total_seats"]
+    )
+    return cruise_perf
+
+
+def _cruise_dims(dim_cruises):
+    return ["cruise_name", "total_seats"] + [
+        col for col in ["cruise_type", "duration_nights"] if col in dim_cruises.columns
+    ]
+
+
+def _cruise_sailings(data, filters):
+    window = sailing_window(data["sailings"], departure_window(filters, _last_day(data)))
+    per_cruise = (
+        window
+        .groupby(level="cruise_key")
+        .agg(
+            Seats_Booked=("seats_sold", "sum"),
+            Revenue=("revenue", "sum"),
+            Sailings=("capacity", "size"),
+            Capacity=("capacity", "sum"),
+        )
+        .reset_index()
+    )
+
+    dim_cruises = data["dim_cruises"]
+    cruise_perf = attach_dimensions(per_cruise, dim_cruises, _cruise_dims(dim_cruises))
+    cruise_perf["Occupancy %"] = safe_rate(cruise_perf["Seats_Booked"], cruise_perf["Capacity"])
+    cruise_perf["Revenue per Sailing"] = safe_rate(
+        cruise_perf["Revenue"], cruise_perf["Sailings"], scale=1
+    )
+    return cruise_perf[
+        _cruise_dims(dim_cruises)
+        + ["Seats_Booked", "Revenue", "Sailings", "Occupancy %", "Revenue per Sailing"]
+    ]
+
+
+@memoized()
+def low_load_sailing_table(data, filters):
+    """Departed sailings under inventory.LOW_LOAD_PCT occupancy, worst first."""
+    low = low_load_sailings(data["sailings"], filters, _last_day(data)).reset_index()
+    low = attach_dimensions(low, data["dim_cruises"], ["cruise_name"])
+    return (
+        low
+        .rename(columns={
+            "departure": "Departure",
+            "seats_sold": "Seats Sold",
+            "capacity": "Capacity",
+            "revenue": "Revenue",
+            "cancellations": "Cancellations",
+            "occupancy": "Occupancy %",
+        })
+        [["cruise_name", "Departure", "Seats Sold", "Capacity", "Occupancy %",
+          "Revenue", "Cancellations"]]
+        .sort_values("Occupancy %", kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+# ==================== PRICING & REVENUE LEAKAGE ====================
+DISCOUNT_COLUMNS = ["discount_amount", "discount_percent", "discount_value"]
+
+
+def discount_column(cube):
+    return next((c for c in DISCOUNT_COLUMNS if c in cube.columns), None)
+
+
+def _cruise_rollup(data, filters):
+    window = cube_window(data["cube"], filters)
+    return attach_dimensions(
+        rollup(window, "cruise_key"), data["dim_cruises"], ["cruise_name", "total_seats"]
+    )
+
+
+@memoized()
+def pricing_performance(data, filters):
+    pricing_perf = (
+        _cruise_rollup(data, filters)
+        .groupby(["cruise_key", "cruise_name", "total_seats"], as_index=False)
+        .agg(
+            Revenue=("total_booking_value", "sum"),
+            Seats_Booked=("seats_booked", "sum"),
+            Bookings=("bookings", "sum")
+        )
+    )
+
+    pricing_perf["Revenue per Seat"] = safe_rate(
+        pricing_perf["Revenue"], pricing_perf["Seats_Booked"], scale=1
+    )
+    return pricing_perf
+
+
+@memoized()
+def discount_by_cruise(data, filters, discount_col):
+    return (
+        _cruise_rollup(data, filters)
+        .groupby("cruise_name", as_index=False)
+        .agg(
+            Discount_Total=(discount_col, "sum"),
+            Revenue=("total_booking_value", "sum"),
+            Bookings=("bookings", "sum")
+        )
+    )
+
+
+# ==================== PARTNER PERFORMANCE ====================
+PARTNER_COLUMNS = ["partner_name", "ota_name", "booking_partner", "booking_channel"]
+
+
+def partner_column(bookings):
+    return next((c for c in PARTNER_COLUMNS if c in bookings.columns), None)
+
+
+@memoized()
+def partner_performance(data, filters, partner_col):
+    dim_partners = data["dim_partners"]
+
+    if dim_partners is not None and partner_col in dim_partners.columns:
+        # Partners are resolved into the star schema, so the daily cube answers
+        window = cube_window(data["cube"], filters)
+        partner_perf = (
+            attach_dimensions(rollup(window, "partner_key"), dim_partners, [partner_col])
+            .groupby(partner_col, as_index=False, observed=True)
+            .agg(
+                Revenue=("total_booking_value", "sum"),
+                Bookings=("bookings", "sum"),
+                Cancellations=("cancellations", "sum")
+            )
+        )
+    elif data.get("backend") is not None:
+        partner_perf = data["backend"].partner_totals(filters, partner_col)
+    else:
+        filtered = apply_filters(data["bookings"], filters)
+        partner_perf = (
+            filtered
+            .assign(cancelled=status_flag(filtered["booking_status"], "Cancelled"))
+            .groupby(partner_col, as_index=False, observed=True)
+            .agg(
+                Revenue=("total_booking_value", "sum"),
+                Bookings=("booking_id", "count"),
+                Cancellations=("cancelled", "sum")
+            )
+        )
+
+    partner_perf["Cancellation Rate %"] = safe_rate(
+        partner_perf["Cancellations"], partner_perf["Bookings"]
+    )
+    partner_perf["Risk Category"] = risk_category(
+        partner_perf["Cancellation Rate %"], partner_perf["Revenue"]
+    )
+    return partner_perf
+
+
+# ==================== CUSTOMER BEHAVIOR & LOYALTY ====================
+@memoized()
+def customer_performance(data, filters):
+    if data.get("backend") is not None:
+        customer_perf = data["backend"].customer_totals(filters)
+    else:
+        customer_perf = (
+            apply_filters(data["bookings"], filters)
+            .groupby("customer_id", as_index=False)
+            .agg(
+                Bookings=("booking_id", "count"),
+                Revenue=("total_booking_value", "sum")
+            )
+        )
+
+    # New vs Repeat
+    customer_perf["Customer Type"] = customer_type(customer_perf["Bookings"])
+    return customer_perf
+
+
+@memoized()
+def customer_summary(data, filters):
+    """Loyalty split, booking frequency, top-20% revenue split and top customers.
+
+    Exact from customer_performance, except for date-only windows with more
+    than SKETCH_EXACT_BOOKINGS bookings when the dataset carries
+    customer sketches: those merge the per-day sketches instead.
+    """
+    sketches = data.get("customer_sketches")
+    keyed = filters.routes or filters.cruises or filters.partners
+    if sketches is not None and not keyed:
+        window = data["kpi"].window(filters)
+        if window["bookings"] > SKETCH_EXACT_BOOKINGS:
+            lo, hi = sketches.day_bounds(filters.start, filters.end)
+            return summary_from_sketches(sketches, lo, hi, window["revenue"])
+
+    customer_perf = customer_performance(data, filters)
+    revenue = customer_perf["Revenue"].to_numpy()
+    # Top 20% by revenue without sorting every customer
+    cut = len(revenue) - int(len(revenue) * 0.2)
+    top_revenue = np.partition(revenue, cut)[cut:].sum() if cut < len(revenue) else 0
+
+    return {
+        "exact": True,
+        "top_exact": True,
+        "customers": len(customer_perf),
+        "types": (
+            customer_perf.groupby("Customer Type", as_index=False, observed=True)
+            .agg(Customers=("customer_id", "size"))
+        ),
+        "frequency": (
+            customer_perf.groupby("Bookings", as_index=False)
+            .agg(Customers=("customer_id", "count"))
+        ),
+        "revenue_split": revenue_split(top_revenue, revenue.sum() - top_revenue),
+        "top": customer_perf,
+    }
+
+
+@memoized()
+def cohort_retention(data, filters):
+    """Cohort matrices for customers whose first booking falls in the window."""
+    start_month = None if filters.start is None else int(month_codes([filters.start])[0])
+    backend = data.get("backend")
+
+    if backend is not None:
+        customers = data["customers"]
+        sheet_dates = customers is not None and "first_booking_date" in customers.columns
+        firsts = backend.first_months(sheet_dates)
+        rows = backend.customer_months(filters)
+
+        codes = pd.Index(firsts["customer_id"]).get_indexer(rows["customer_id"])
+        return cohort_matrix(
+            codes,
+            rows["month"].to_numpy(dtype=np.int64),
+            rows["revenue"].to_numpy(dtype=np.float64),
+            firsts["first_month"].to_numpy(dtype=np.int64),
+            start_month,
+        )
+
+    bookings = data["bookings"]
+    # Full-history codes and first months are built once per dataset at load
+    index = data.get("cohort_index") or CohortIndex.build(bookings, data["customers"])
+
+    lo, hi = date_bounds(bookings, filters.start, filters.end)
+    codes, months, known = index.window(lo, hi)
+    return cohort_matrix(
+        codes,
+        months,
+        bookings["total_booking_value"].to_numpy(dtype=np.float64)[lo:hi][known],
+        index.first,
+        start_month,
+    )
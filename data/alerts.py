@@ -0,0 +1,626 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from data.aggregations import DISCOUNT_COLUMNS
+from data.ingest_cache import (
+    CACHE_ROOT, cache_available, cache_dir_for, read_manifest, write_manifest
+)
+from data.memo import CACHES, LruCache, memoized
+from data.metrics import safe_rate, status_flag
+from data.star_schema import DIMENSIONS, normalize_ids
+
+# Early-warning alerts: an EWMA mean and variance per (segment, metric)
+# series, advanced one closed booking day at a time. A day is scored
+# against the state before it is folded in, so each run only reads the
+# bookings after the saved watermark. The latest day may still be
+# filling up; it is scored provisionally and folded in on a later run,
+# once a newer day has appeared.
+#
+# Only the `check` CLI writes the saved state, under a file lock. Pages
+# read it and advance a copy in memory.
+
+# ==================== CONFIG ====================
+ALERT_SPAN_DAYS = int(os.environ.get("ICRUISE_ALERT_SPAN", 28))
+ALERT_ALPHA = 2 / (ALERT_SPAN_DAYS + 1)
+ALERT_Z = float(os.environ.get("ICRUISE_ALERT_Z", 3.0))
+WARMUP_DAYS = 14  # observations before a series can alert
+MIN_BOOKINGS = 5  # rate metrics skip days with fewer; quieter series never alert
+MIN_SD_SHARE = 0.05  # sd floor as a share of the mean, so flat series don't alert on noise
+ALERT_LOG_ROWS = 10_000
+
+ALERTS_ROOT = CACHE_ROOT / "alerts"
+STATE_VERSION = 1
+
+# metric -> (display name, alerting direction)
+ALERT_METRICS = {
+    "cancellation_rate": ("Cancellation Rate %", "up"),
+    "revenue": ("Revenue", "both"),
+    "discount_share": ("Discount Share %", "up"),
+}
+# segment -> star_schema dimension (None: every booking)
+ALERT_SEGMENTS = {
+    "Fleet": None,
+    "Route": "routes",
+    "Cruise": "cruises",
+    "Partner": "partners",
+}
+STATE_KEY = ["segment", "id", "metric"]
+
+_FEEDS = LruCache("alert_feeds", max_entries=2)
+CACHES[_FEEDS.name] = _FEEDS
+
+
+# ==================== DAILY METRICS ====================
+def _segment_ids(rows, dimension):
+    """(normalized id, raw text) per row for one dimension, or None if it isn't there."""
+    if dimension is None:
+        return np.full(len(rows), "all", dtype=object), np.full(len(rows), "All cruises", dtype=object)
+    _, prefix, fact_cols = DIMENSIONS[dimension]
+    column = next((c for c in fact_cols if c in rows.columns), None)
+    if column is None:
+        return None
+
+    # Normalize the distinct values only
+    codes, uniques = pd.factorize(rows[column].astype("string"))
+    ids = normalize_ids(uniques, prefix).to_numpy(dtype=object)
+    raw = np.asarray(uniques, dtype=object)
+    known = codes >= 0
+    out_ids = np.full(len(rows), None, dtype=object)
+    out_raw = np.full(len(rows), None, dtype=object)
+    out_ids[known], out_raw[known] = ids[codes[known]], raw[codes[known]]
+    return out_ids, out_raw
+
+
+def daily_segments(rows):
+    """Bookings, cancellations, revenue and discount per (day, segment, id)."""
+    discount_col = next((c for c in DISCOUNT_COLUMNS if c in rows.columns), None)
+    base = pd.DataFrame({
+        "day": rows["booking_date"].dt.floor("D").to_numpy(),
+        "bookings": 1,
+        "cancellations": (
+            status_flag(rows["booking_status"], "Cancelled").astype(np.int64)
+            if "booking_status" in rows.columns else 0
+        ),
+        "revenue": rows["total_booking_value"].to_numpy(dtype=np.float64),
+        "discount": rows[discount_col].to_numpy(dtype=np.float64) if discount_col else np.nan,
+    })
+
+    parts = []
+    for segment, dimension in ALERT_SEGMENTS.items():
+        found = _segment_ids(rows, dimension)
+        if found is None:
+            continue
+        ids, raw = found
+        parts.append(
+            base.assign(segment=segment, id=ids, label=raw)
+            .dropna(subset=["id", "day"])
+            .groupby(["day", "segment", "id"], sort=False)
+            .agg(
+                bookings=("bookings", "sum"),
+                cancellations=("cancellations", "sum"),
+                revenue=("revenue", "sum"),
+                discount=("discount", "sum"),
+                label=("label", "first"),
+            )
+            .reset_index()
+        )
+
+    daily = pd.concat(parts, ignore_index=True)
+    daily.attrs["discount_col"] = discount_col
+    return daily
+
+
+def metric_rows(daily):
+    """One row per (day, segment, id, metric) with its value and whether it counts."""
+    enough = daily["bookings"].to_numpy() >= MIN_BOOKINGS
+    discount_col = daily.attrs.get("discount_col")
+    if discount_col == "discount_percent":
+        share = safe_rate(daily["discount"], daily["bookings"], scale=1)
+    else:
+        share = safe_rate(daily["discount"], daily["revenue"] + daily["discount"])
+
+    values = {
+        "cancellation_rate": (safe_rate(daily["cancellations"], daily["bookings"]), enough),
+        "revenue": (daily["revenue"].to_numpy(), np.ones(len(daily), dtype=bool)),
+        "discount_share": (share, enough & (discount_col is not None)),
+    }
+    keys = daily[["day", "segment", "id", "label", "bookings"]]
+    return pd.concat(
+        [
+            keys.assign(metric=metric, value=value, counts=counts)
+            for metric, (value, counts) in values.items()
+        ],
+        ignore_index=True,
+    )
+
+
+# ==================== STATE ====================
+def empty_state():
+    return pd.DataFrame({
+        "segment": pd.Series(dtype=object),
+        "id": pd.Series(dtype=object),
+        "label": pd.Series(dtype=object),
+        "metric": pd.Series(dtype=object),
+        "mean": pd.Series(dtype=np.float64),
+        "var": pd.Series(dtype=np.float64),
+        "n": pd.Series(dtype=np.int64),
+        "last_value": pd.Series(dtype=np.float64),
+        "last_z": pd.Series(dtype=np.float64),
+        "activity": pd.Series(dtype=np.float64),  # EWMA of daily bookings
+    })
+
+
+def _with_series(state, metrics):
+    """state plus a fresh row for every series in metrics it hasn't seen."""
+    seen = pd.MultiIndex.from_frame(state[STATE_KEY])
+    incoming = metrics.drop_duplicates(STATE_KEY)
+    new = incoming[~pd.MultiIndex.from_frame(incoming[STATE_KEY]).isin(seen)]
+    if new.empty:
+        return state
+    fresh = empty_state().reindex(range(len(new)))
+    fresh[["segment", "id", "label", "metric"]] = new[["segment", "id", "label", "metric"]].to_numpy()
+    fresh["var"] = 0.0
+    fresh["n"] = 0
+    return pd.concat([state, fresh], ignore_index=True)
+
+
+def _z_scores(mean, var, n, activity, x):
+    sd = np.maximum(np.sqrt(var), MIN_SD_SHARE * np.abs(mean))
+    z = np.full(len(x), np.nan)
+    with np.errstate(invalid="ignore"):
+        busy = activity >= MIN_BOOKINGS
+    scored = ~np.isnan(x) & (n >= WARMUP_DAYS) & busy & (sd > 0)
+    z[scored] = (x[scored] - mean[scored]) / sd[scored]
+    return z
+
+
+def _alerting(z, directions, z_limit):
+    with np.errstate(invalid="ignore"):
+        up = z >= z_limit
+        down = (z <= -z_limit) & (directions == "both")
+    return up | down
+
+
+def _alert_frame(state, rows, day, x, z, provisional):
+    return pd.DataFrame({
+        "day": pd.Timestamp(day),
+        "segment": state["segment"].to_numpy()[rows],
+        "id": state["id"].to_numpy()[rows],
+        "label": state["label"].to_numpy()[rows],
+        "metric": state["metric"].to_numpy()[rows],
+        "value": x[rows],
+        "expected": state["mean"].to_numpy()[rows],
+        "z": z[rows],
+        "provisional": provisional,
+    })
+
+
+def advance(state, metrics, days, alpha=ALERT_ALPHA, z_limit=ALERT_Z):
+    """Score and fold each of `days` (in order) into the state.
+
+    Returns (new state, alerts raised on those days). Every series is
+    updated with array operations; the only loop is over the days.
+    """
+    state = _with_series(state, metrics)
+    index = pd.MultiIndex.from_frame(state[STATE_KEY])
+    position = index.get_indexer(pd.MultiIndex.from_frame(metrics[STATE_KEY]))
+
+    mean = state["mean"].to_numpy(dtype=np.float64, copy=True)
+    var = state["var"].to_numpy(dtype=np.float64, copy=True)
+    n = state["n"].to_numpy(dtype=np.int64, copy=True)
+    last_value = state["last_value"].to_numpy(dtype=np.float64, copy=True)
+    last_z = state["last_z"].to_numpy(dtype=np.float64, copy=True)
+    activity = state["activity"].to_numpy(dtype=np.float64, copy=True)
+    directions = state["metric"].map(lambda m: ALERT_METRICS[m][1]).to_numpy()
+    revenue = (state["metric"] == "revenue").to_numpy()
+
+    order = np.argsort(metrics["day"].to_numpy(), kind="stable")
+    metric_days = metrics["day"].to_numpy()[order]
+    counted = metrics["counts"].to_numpy()[order]
+    values = metrics["value"].to_numpy(dtype=np.float64)[order]
+    bookings = metrics["bookings"].to_numpy(dtype=np.float64)[order]
+    position = position[order]
+
+    alerts = []
+    for day in days:
+        day = np.datetime64(pd.Timestamp(day), "us")
+        lo, hi = metric_days.searchsorted(day, "left"), metric_days.searchsorted(day, "right")
+
+        # Revenue of a series that has started is 0 on days without bookings
+        x = np.where(revenue & (n > 0), 0.0, np.nan)
+        rows = position[lo:hi][counted[lo:hi]]
+        x[rows] = values[lo:hi][counted[lo:hi]]
+        booked = np.where(np.isnan(activity), np.nan, 0.0)
+        booked[position[lo:hi]] = bookings[lo:hi]
+
+        z = _z_scores(mean, var, n, activity, x)
+        hits = np.flatnonzero(_alerting(z, directions, z_limit))
+        if len(hits):
+            alerts.append(_alert_frame(
+                state.assign(mean=mean), hits, day, x, z, provisional=False
+            ))
+
+        observed = ~np.isnan(x)
+        first = observed & (n == 0)
+        later = observed & (n > 0)
+        mean[first], var[first] = x[first], 0.0
+        diff = x[later] - mean[later]
+        step = alpha * diff
+        mean[later] += step
+        var[later] = (1 - alpha) * (var[later] + diff * step)
+        n[observed] += 1
+        last_value[observed], last_z[observed] = x[observed], z[observed]
+
+        active = ~np.isnan(booked)
+        activity = np.where(
+            np.isnan(activity), booked, activity + alpha * (np.where(active, booked, 0) - activity)
+        )
+
+    state = state.assign(
+        mean=mean, var=var, n=n, last_value=last_value, last_z=last_z, activity=activity
+    )
+    return state, _concat_alerts(alerts)
+
+
+def score_open_day(state, metrics, z_limit=ALERT_Z):
+    """Provisional alerts for a day still filling up; the state is left as is.
+
+    Revenue only alerts upwards here, since a partial day always looks low.
+    """
+    index = pd.MultiIndex.from_frame(state[STATE_KEY])
+    metrics = metrics[metrics["counts"].to_numpy()]
+    position = index.get_indexer(pd.MultiIndex.from_frame(metrics[STATE_KEY]))
+    known = position >= 0
+    if metrics.empty or not known.any():
+        return _concat_alerts([])
+
+    x = np.full(len(state), np.nan)
+    x[position[known]] = metrics["value"].to_numpy(dtype=np.float64)[known]
+    z = _z_scores(
+        state["mean"].to_numpy(), state["var"].to_numpy(), state["n"].to_numpy(),
+        state["activity"].to_numpy(), x,
+    )
+    directions = state["metric"].map(lambda m: ALERT_METRICS[m][1]).to_numpy()
+    hits = np.flatnonzero(_alerting(z, np.where(directions == "both", "up", directions), z_limit))
+    return _concat_alerts([
+        _alert_frame(state, hits, metrics["day"].iloc[0], x, z, provisional=True)
+    ])
+
+
+def _concat_alerts(frames):
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=[
+            "day", "segment", "id", "label", "metric", "value", "expected", "z", "provisional"
+        ])
+    return pd.concat(frames, ignore_index=True)
+
+
+# ==================== SOURCE ====================
+def source_name():
+    """Folder name for the current source's detector state."""
+    from data.data_loader import DATA_SOURCE, PARQUET_DIR, QUERY_BACKEND, SQL_URL, WORKBOOK_PATH
+
+    if DATA_SOURCE == "sql":
+        return "sql-" + hashlib.sha1(str(SQL_URL).encode()).hexdigest()[:12]
+    if QUERY_BACKEND == "duckdb" and PARQUET_DIR:
+        return "parquet-" + hashlib.sha1(str(PARQUET_DIR).encode()).hexdigest()[:12]
+    return cache_dir_for(WORKBOOK_PATH).name
+
+
+def _alert_columns(columns):
+    wanted = ["booking_date", "booking_status", "total_booking_value"] + DISCOUNT_COLUMNS
+    for _, _, fact_cols in DIMENSIONS.values():
+        wanted += fact_cols
+    return [c for c in dict.fromkeys(wanted) if c in columns]
+
+
+def read_bookings_since(since, data=None):
+    """Booking rows with booking_date on or after since (None: all of them).
+
+    A loaded pandas dataset is sliced in memory; databases and Parquet get
+    the date bound in the query, so old history is never read again.
+    """
+    from data.data_loader import (
+        DATA_SOURCE, QUERY_BACKEND, SQL_URL, WORKBOOK_PATH, parquet_sources, pick_sheets
+    )
+    from data.duckdb_backend import DuckDbBackend
+    from data.sources import SqlBackend, _ident
+
+    backend = data["backend"] if data is not None else None
+    if data is not None and backend is None:
+        bookings = data["bookings"]
+        lo = 0 if since is None else int(
+            bookings["booking_date"].searchsorted(pd.Timestamp(since), "left")
+        )
+        return bookings.iloc[lo:][_alert_columns(bookings.columns)]
+
+    if backend is None and DATA_SOURCE == "sql":
+        backend = SqlBackend(SQL_URL)
+    if backend is None and QUERY_BACKEND == "duckdb":
+        paths, _ = parquet_sources(WORKBOOK_PATH)
+        backend = DuckDbBackend({"bookings": paths[pick_sheets(list(paths))["bookings"]]})
+
+    if isinstance(backend, SqlBackend):
+        columns = _alert_columns(backend.schema_frame("bookings").columns)
+        where, params = "", []
+        if since is not None:
+            where, params = "WHERE booking_date >= ?", [backend.dialect.param(pd.Timestamp(since))]
+        rows = backend.query(
+            f"SELECT {', '.join(_ident(c) for c in columns)} "
+            f"FROM {backend.table('bookings')} {where} ORDER BY booking_date",
+            params,
+        )
+        rows["booking_date"] = pd.to_datetime(rows["booking_date"], format="ISO8601")
+        return rows
+
+    if isinstance(backend, DuckDbBackend):
+        columns = _alert_columns(backend.columns("bookings").index)
+        where, params = "", []
+        if since is not None:
+            where, params = "WHERE booking_date >= ?", [pd.Timestamp(since).to_pydatetime()]
+        return backend.query(
+            f"SELECT {', '.join(_ident(c) for c in columns)} FROM bookings {where} "
+            f"ORDER BY booking_date",
+            params,
+        )
+
+    return _workbook_bookings_since(WORKBOOK_PATH, since)
+
+
+def _workbook_bookings_since(workbook_path, since):
+    from data.data_loader import SHEET_GROUPS, read_workbook
+    from data.ingest_cache import cache_status, load_sheets
+
+    # A fresh ingest cache is filtered at the Parquet row-group level
+    status, manifest = cache_status(workbook_path)
+    if status != "fresh":
+        load_sheets(workbook_path, read_workbook)
+        status, manifest = cache_status(workbook_path)
+    sheet = next((s for s in SHEET_GROUPS["bookings"] if s in (manifest or {}).get("sheets", [])), None)
+    if status != "fresh" or sheet is None:
+        bookings = read_workbook(workbook_path)[SHEET_GROUPS["bookings"][0]]
+        if since is not None:
+            bookings = bookings[bookings["booking_date"] >= pd.Timestamp(since)]
+    else:
+        path = cache_dir_for(workbook_path) / f"{sheet}.parquet"
+        import pyarrow.parquet as pq
+
+        columns = _alert_columns(pq.read_schema(path).names)
+        filters = None if since is None else [("booking_date", ">=", pd.Timestamp(since))]
+        bookings = pd.read_parquet(path, columns=columns, filters=filters)
+    return bookings.sort_values("booking_date", kind="stable", ignore_index=True)
+
+
+# ==================== PERSISTENCE ====================
+def state_dir(name=None):
+    return ALERTS_ROOT / (name or source_name())
+
+
+def load_state(folder):
+    """(state, manifest) saved in folder, or an empty state."""
+    manifest = read_manifest(folder)
+    if (
+        manifest is None
+        or manifest.get("version") != STATE_VERSION
+        or not (folder / "state.parquet").exists()
+    ):
+        return empty_state(), {}
+    return pd.read_parquet(folder / "state.parquet"), manifest
+
+
+def _replace_parquet(frame, path):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def state_lock(folder):
+    """Hold an exclusive lock on folder's state between load and save."""
+    folder.mkdir(parents=True, exist_ok=True)
+    with open(folder / "state.lock", "a+b") as fh:
+        try:
+            import fcntl
+        except ImportError:  # Windows: runs are expected not to overlap
+            yield
+            return
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def save_state(folder, state, manifest, alerts):
+    folder.mkdir(parents=True, exist_ok=True)
+    if len(alerts):
+        log = pd.concat([read_log(folder), alerts], ignore_index=True)
+        log = log.drop_duplicates(["day"] + STATE_KEY, keep="last").tail(ALERT_LOG_ROWS)
+        _replace_parquet(log.astype({"provisional": bool}), folder / "alerts.parquet")
+    _replace_parquet(state, folder / "state.parquet")
+    # Manifest last: the watermark never runs ahead of the saved state
+    write_manifest(folder, {**manifest, "version": STATE_VERSION, "updated_at": time.time()})
+
+
+def read_log(folder):
+    path = folder / "alerts.parquet"
+    return pd.read_parquet(path) if path.exists() else _concat_alerts([])
+
+
+# ==================== RUN ====================
+def run_detector(folder=None, data=None, rebuild=False, persist=True):
+    """Fold the closed days since the watermark into the saved state.
+
+    Returns a dict with the alerts raised on newly closed days ("closed"),
+    provisional alerts for the latest day ("open"), the number of booking
+    rows read and the watermark reached. With persist=False the saved
+    state is only read.
+    """
+    folder = folder or state_dir()
+    if not (persist and cache_available()):
+        return _advance_saved(folder, data, rebuild)
+    with state_lock(folder):
+        result = _advance_saved(folder, data, rebuild)
+        if result["state"] is not None:
+            save_state(folder, result["state"], {"watermark": result["watermark"]}, result["closed"])
+    return result
+
+
+def _advance_saved(folder, data, rebuild):
+    state, manifest = (empty_state(), {}) if rebuild else load_state(folder)
+    watermark = manifest.get("watermark")
+    since = pd.Timestamp(watermark) + timedelta(days=1) if watermark else None
+
+    rows = read_bookings_since(since, data)
+    result = {"closed": _concat_alerts([]), "open": _concat_alerts([]),
+              "rows_read": len(rows), "watermark": watermark, "state": None}
+    if rows.empty:
+        return result
+
+    metrics = metric_rows(daily_segments(rows))
+    open_day = metrics["day"].max()
+    first_day = since if since is not None else metrics["day"].min()
+    closed_days = pd.date_range(first_day, open_day - timedelta(days=1), freq="D")
+
+    closed = metrics[metrics["day"] < open_day]
+    state, result["closed"] = advance(state, closed, closed_days)
+    result["open"] = score_open_day(state, metrics[metrics["day"] == open_day])
+    result["state"] = state
+
+    if len(closed_days):
+        result["watermark"] = closed_days[-1].date().isoformat()
+    return result
+
+
+def _current_alerts(data, folder):
+    """Saved log plus the days since the saved watermark, advanced in memory.
+
+    Cached per dataset version and saved-state version, so every filter
+    on the page shares one run.
+    """
+    manifest = (read_manifest(folder) if cache_available() else None) or {}
+    key = (data.get("fingerprint"), str(folder), manifest.get("updated_at"))
+    hit, alerts = _FEEDS.get(key)
+    if not hit:
+        result = run_detector(folder, data, persist=False)
+        log = read_log(folder) if cache_available() else _concat_alerts([])
+        alerts = (
+            pd.concat([log, result["closed"], result["open"]], ignore_index=True)
+            .drop_duplicates(["day"] + STATE_KEY, keep="last")
+        )
+        _FEEDS.put(key, alerts)
+    return alerts
+
+
+@memoized(max_entries=4, ttl=5 * 60)
+def alert_feed(data, filters):
+    """Detector alerts in the selected window, the open day's provisional ones included.
+
+    Read-only: the saved state only moves when `python -m data.alerts check` runs.
+    """
+    alerts = _current_alerts(data, state_dir())
+    if filters.start is not None:
+        alerts = alerts[alerts["day"] >= pd.Timestamp(filters.start)]
+    if filters.end is not None:
+        alerts = alerts[alerts["day"] < pd.Timestamp(filters.end)]
+    return alerts.sort_values(["day", "z"], ascending=[False, False], ignore_index=True)
+
+
+def segment_names(data):
+    """(segment, normalized id) -> display name, from the loaded dimensions."""
+    from data.aggregations import route_labels
+
+    names = {}
+    sources = {
+        "Route": ("routes", route_labels),
+        "Cruise": ("cruises", lambda dim: dim["cruise_name"]),
+        "Partner": ("partners", lambda dim: dim["partner_name"]),
+    }
+    for segment, (dimension, label) in sources.items():
+        dim = data.get(f"dim_{dimension}")
+        if dim is None:
+            continue
+        _, prefix, fact_cols = DIMENSIONS[dimension]
+        for column in [c for c in fact_cols if c in dim.columns]:
+            ids = normalize_ids(dim[column].to_numpy(), prefix)
+            names.update(zip(((segment, i) for i in ids), label(dim).astype(str)))
+    return names
+
+
+def describe_alerts(alerts, names=None):
+    """Alerts in display form: metric names, readable values and dimension names."""
+    names = names or {}
+    return pd.DataFrame({
+        "Day": pd.to_datetime(alerts["day"]).dt.date,
+        "Segment": alerts["segment"],
+        "Name": [
+            names.get((segment, i), label)
+            for segment, i, label in zip(alerts["segment"], alerts["id"], alerts["label"])
+        ],
+        "Metric": alerts["metric"].map(lambda m: ALERT_METRICS[m][0]),
+        "Value": alerts["value"].astype(np.float64).round(1),
+        "Expected": alerts["expected"].astype(np.float64).round(1),
+        "Z-Score": alerts["z"].astype(np.float64).round(1),
+        "Status": np.where(alerts["provisional"].astype(bool), "Provisional", "Closed day"),
+    })
+
+
+# ==================== CLI ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m data.alerts",
+        description="Advance the early-warning detector to the latest bookings and print alerts.",
+    )
+    parser.add_argument("command", choices=["check", "list"])
+    parser.add_argument("--rebuild", action="store_true", help="drop the saved state and replay all history")
+    parser.add_argument("--days", type=int, default=7, help="list: alerts from the last N days")
+    parser.add_argument("--json", action="store_true", help="print alerts as JSON lines")
+    parser.add_argument(
+        "--fail-on-alert", action="store_true", help="exit 1 when the check raises any alert"
+    )
+    args = parser.parse_args(argv)
+
+    if not cache_available():
+        print("pyarrow is not installed; detector state can't be saved.")
+        return 2
+
+    folder = state_dir()
+    if args.command == "list":
+        alerts = read_log(folder)
+        if len(alerts):
+            cutoff = pd.Timestamp(alerts["day"].max()) - timedelta(days=args.days - 1)
+            alerts = alerts[alerts["day"] >= cutoff]
+    else:
+        started = time.perf_counter()
+        result = run_detector(folder, rebuild=args.rebuild)
+        alerts = pd.concat([result["closed"], result["open"]], ignore_index=True)
+        print(
+            f"{folder.name}: read {result['rows_read']:,} rows in "
+            f"{time.perf_counter() - started:.2f}s, watermark {result['watermark']}, "
+            f"{len(result['closed'])} closed-day / {len(result['open'])} provisional alerts"
+        )
+
+    if args.json:
+        for record in describe_alerts(alerts).to_dict("records"):
+            print(json.dumps(record, default=str))
+    elif len(alerts):
+        print(describe_alerts(alerts).to_string(index=False))
+
+    if args.command == "check" and args.fail_on_alert and len(alerts):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
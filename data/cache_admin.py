@@ -0,0 +1,53 @@
+import os
+import time
+
+import streamlit as st
+
+from data.data_loader import (
+    DATASET_CACHE_ENTRIES,
+    DATASET_CACHE_TTL,
+    FINGERPRINT_HASH,
+    refresh_data,
+)
+from data.memo import cache_stats
+
+# Operators can hide the panel on public deployments with ICRUISE_ADMIN=0
+ADMIN_ENABLED = os.environ.get("ICRUISE_ADMIN", "1") == "1"
+
+
+def _age(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def cache_admin_sidebar(data):
+    """Sidebar panel with dataset cache stats and a "refresh data" action."""
+    if not ADMIN_ENABLED:
+        return
+
+    with st.sidebar.expander("⚙️ Data cache"):
+        age = time.time() - data["loaded_at"]
+        expires = max(DATASET_CACHE_TTL - age, 0)
+
+        st.caption(f"Source: `{data['cache_key']}`")
+        st.write(f"**Loaded:** {_age(age)} ago (expires in {_age(expires)})")
+        st.write(f"**In memory:** {data['nbytes'] / 1024 ** 2:,.1f} MB")
+        st.write(
+            f"**Limits:** {DATASET_CACHE_ENTRIES} dataset(s), TTL {_age(DATASET_CACHE_TTL)}, "
+            f"key by {'content hash' if FINGERPRINT_HASH else 'size + mtime'}"
+        )
+
+        stats = cache_stats()
+        if not stats.empty:
+            st.dataframe(
+                stats[["cache", "entries", "hits", "misses", "hit_rate %"]],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        if st.button("🔄 Refresh data", use_container_width=True):
+            refresh_data()
+            st.rerun()
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# Cohort retention: customers grouped by the month of their first booking,
+# followed month by month. The whole cohort x months-since-first matrix is
+# one pass of integer codes and np.bincount, however many cohorts there are.
+
+# Months after the first booking that get a column (5 years)
+MAX_AGE = 60
+
+
+# ==================== MONTH CODES ====================
+def month_codes(dates):
+    """year * 12 + month - 1 for each date (int64; NaT becomes -1)."""
+    dates = pd.DatetimeIndex(dates)
+    valid = ~dates.isna()
+    codes = np.full(len(dates), -1, dtype=np.int64)
+    codes[valid] = dates.year[valid].to_numpy() * 12 + dates.month[valid].to_numpy() - 1
+    return codes
+
+
+def month_labels(codes):
+    return [f"{code // 12}-{code % 12 + 1:02d}" for code in codes]
+
+
+def first_months(customer_codes, months, n_customers, sheet_first=None):
+    """First booking month per customer code.
+
+    The Customers sheet's first_booking_date wins when present, unless the
+    bookings show an earlier month.
+    """
+    first = np.full(n_customers, np.iinfo(np.int64).max, dtype=np.int64)
+    valid = months >= 0
+    np.minimum.at(first, customer_codes[valid], months[valid])
+    if sheet_first is not None:
+        known = sheet_first >= 0
+        first[known] = np.minimum(first[known], sheet_first[known])
+    return first
+
+
+def sheet_first_months(customers, customer_ids):
+    """Month of first_booking_date from the Customers sheet, aligned to customer_ids (-1 if unknown)."""
+    if customers is None or "first_booking_date" not in customers.columns:
+        return None
+    sheet = customers.drop_duplicates("customer_id")
+    months = pd.Series(month_codes(sheet["first_booking_date"]), index=sheet["customer_id"])
+    return months.reindex(customer_ids).fillna(-1).to_numpy(dtype=np.int64)
+
+
+# ==================== FULL-HISTORY INDEX ====================
+class CohortIndex:
+    """Customer code and month of every booking, and each customer's first month.
+
+    Built once per dataset over the full history, so a date window never
+    clips a customer's first month; windows are positional slices of it.
+    """
+
+    def __init__(self, codes, months, first):
+        self.codes = codes  # per booking, -1 without a customer_id
+        self.months = months  # per booking, -1 without a booking_date
+        self.first = first  # per customer code
+
+    @classmethod
+    def build(cls, bookings, customers=None):
+        codes, customer_ids = pd.factorize(bookings["customer_id"])
+        months = month_codes(bookings["booking_date"])
+        known = codes >= 0
+        first = first_months(
+            codes[known], months[known], len(customer_ids),
+            sheet_first_months(customers, customer_ids),
+        )
+        return cls(codes.astype(np.int32), months.astype(np.int32), first)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.months.nbytes + self.first.nbytes
+
+    def window(self, lo, hi):
+        """(customer codes, months, row mask) of bookings lo:hi that have a customer."""
+        codes = self.codes[lo:hi]
+        known = codes >= 0
+        return codes[known], self.months[lo:hi][known], known
+
+
+# ==================== ENGINE ====================
+def cohort_matrix(customer_codes, months, revenue, first, start_month=None, max_age=MAX_AGE):
+    """Active customers, revenue and cohort sizes per (cohort month, months since first).
+
+    customer_codes/months/revenue describe bookings (or customer-month
+    rows) in the window; first holds each customer's first month. Only
+    cohorts from start_month on are kept. Returns frames indexed by cohort
+    label with one column per month since the first booking; cells past
+    the last observed month are NaN, and ages stop at max_age.
+    """
+    cohort = first[customer_codes]
+    keep = (months >= 0) & (cohort <= months) & (months - cohort <= max_age)
+    if start_month is not None:
+        keep &= cohort >= start_month
+    customer_codes, months, revenue, cohort = (
+        customer_codes[keep], months[keep], revenue[keep], cohort[keep]
+    )
+    if not len(months):
+        return None
+
+    lo, last = int(cohort.min()), int(months.max())
+    n_cohorts = last - lo + 1
+    n_ages = min(n_cohorts, max_age + 1)
+    row = cohort - lo
+    age = months - cohort
+    cell = row * n_ages + age
+    size = n_cohorts * n_ages
+
+    revenue_grid = np.bincount(cell, weights=revenue, minlength=size).reshape(n_cohorts, n_ages)
+
+    # Each customer counts once per cell: dedupe (customer, age) pairs first
+    pairs = pd.unique(customer_codes.astype(np.int64) * n_ages + age)
+    pair_customer, pair_age = np.divmod(pairs, n_ages)
+    pair_row = first[pair_customer] - lo
+    active = np.bincount(pair_row * n_ages + pair_age, minlength=size).reshape(n_cohorts, n_ages)
+
+    cohort_size = np.bincount(first[np.unique(customer_codes)] - lo, minlength=n_cohorts)
+
+    # Cohort r is observable for ages 0 .. n_cohorts - 1 - r
+    observed = np.arange(n_ages)[None, :] <= (n_cohorts - 1 - np.arange(n_cohorts))[:, None]
+    labels = month_labels(np.arange(lo, last + 1))
+
+    def frame(values, dtype=np.float64):
+        grid = np.where(observed, values.astype(dtype), np.nan)
+        return pd.DataFrame(grid, index=pd.Index(labels, name="Cohort"))
+
+    retention = np.divide(
+        active, cohort_size[:, None], out=np.zeros(active.shape), where=cohort_size[:, None] > 0
+    ) * 100
+    return {
+        "size": pd.DataFrame({"Cohort": labels, "Customers": cohort_size}),
+        "active": frame(active),
+        "retention": frame(retention),
+        "revenue": frame(revenue_grid),
+    }
@@ -1,53 +1,530 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
 import streamlit as st
+from importlib.util import find_spec
 from pathlib import Path
 
-@st.cache_data
-def load_data():
-    BASE_DIR = Path(__file__).resolve().parent
-    file_path = BASE_DIR / "iCruiseEgypt_Sample_Data.xlsx"
-
-    def safe_read(sheet_name):
-        try:
-            return pd.read_excel(file_path, sheet_name=sheet_name)
-        except Exception:
-            return None
-
-    # ---------- Load cruise master ----------
-    cruises_updated = safe_read("Cruises_Updated")
-    cruises_master = safe_read("Cruises_Master")
-    cruises = cruises_updated if cruises_updated is not None else cruises_master
-
-    # ---------- Load route master ----------
-    routes_updated = safe_read("Routes_Updated")
-    routes_master = safe_read("Routes_Master")
-    routes = routes_updated if routes_updated is not None else routes_master
-
-    partners = safe_read("Partners_Master")
-    customers = safe_read("Customers")
-    bookings = safe_read("Bookings")
-    cancellations = safe_read("Cancellations")
-    stops = safe_read("Excursion_Stops")
+from data.duckdb_backend import DuckDbBackend, duckdb_available
+from data.ingest_cache import (
+    cache_dir_for,
+    cache_status,
+    file_hash,
+    load_sheets,
+    workbook_fingerprint,
+)
+from data.schema import apply_schema, date_columns, memory_report
+from data.memo import clear_caches, retain_fingerprint
+from data.sources import SQL_URL, SqlBackend, build_sql_dataset
+from data.cohorts import CohortIndex
+from data.inventory import build_sailings, has_inventory, sailing_rows
+from data.kpi import KpiEngine
+from data.sketches import CustomerSketches, sketches_enabled
+from data.rollup import CUBE_DIMENSIONS, CUBE_MEASURES, build_cube
+from data.star_schema import build_star, denormalize
+from data.workbook_reader import (
+    excel_epoch,
+    iter_sheet_rows,
+    list_sheets,
+    read_sheets,
+    sheet_part_sizes,
+)
 
-    # ---------- Date conversions ----------
-    if bookings is not None:
-        if "booking_date" in bookings.columns:
-            bookings["booking_date"] = pd.to_datetime(bookings["booking_date"])
-        if "cruise_date" in bookings.columns:
-            bookings["cruise_date"] = pd.to_datetime(bookings["cruise_date"])
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+# ICRUISE_WORKBOOK points the app at another workbook (e.g. one from data.synthetic)
+WORKBOOK_PATH = Path(
+    os.environ.get("ICRUISE_WORKBOOK", BASE_DIR / "iCruiseEgypt_Sample_Data.xlsx")
+)
+
+# Each dataset is read from the first sheet in its list that the workbook has
+SHEET_GROUPS = {
+    "cruises": ["Cruises_Updated", "Cruises_Master"],
+    "routes": ["Routes_Updated", "Routes_Master"],
+    "partners": ["Partners_Master"],
+    "customers": ["Customers"],
+    "bookings": ["Bookings"],
+    "cancellations": ["Cancellations"],
+    "stops": ["Excursion_Stops"],
+}
+
+DATE_COLUMNS = {
+    sheet: date_columns(sheet)
+    for names in SHEET_GROUPS.values()
+    for sheet in names
+}
+
+# ---------- Ingest mode ----------
+# "auto" streams the sheets in STREAMING_SHEETS once their worksheet XML
+# outgrows STREAM_MIN_BYTES; "stream" and "pandas" force one path.
+INGEST_MODE = os.environ.get("ICRUISE_INGEST_MODE", "auto")
+STREAM_BATCH_ROWS = int(os.environ.get("ICRUISE_STREAM_BATCH_ROWS", 50_000))
+STREAM_MIN_BYTES = 32 * 1024 * 1024
+STREAMING_SHEETS = ["Bookings"]
+
+# Also keep a pre-joined bookings view (costs one extra copy of the fact table)
+BUILD_BOOKINGS_VIEW = os.environ.get("ICRUISE_BOOKINGS_VIEW", "0") == "1"
 
-    if customers is not None and "first_booking_date" in customers.columns:
-        customers["first_booking_date"] = pd.to_datetime(customers["first_booking_date"])
+# ---------- Source ----------
+# "workbook" reads WORKBOOK_PATH; "sql" reads the database at ICRUISE_SQL_URL
+DATA_SOURCE = os.environ.get("ICRUISE_SOURCE", "workbook")
 
-    if cancellations is not None and "cancellation_date" in cancellations.columns:
-        cancellations["cancellation_date"] = pd.to_datetime(cancellations["cancellation_date"])
+# ---------- Query backend ----------
+# "duckdb" leaves the bookings-sized sheets in Parquet (ICRUISE_PARQUET_DIR,
+# else the workbook's ingest cache) and queries them through DuckDB.
+QUERY_BACKEND = os.environ.get("ICRUISE_BACKEND", "pandas")
+PARQUET_DIR = os.environ.get("ICRUISE_PARQUET_DIR")
+OUT_OF_CORE_DATASETS = ["bookings", "customers", "cancellations"]
 
+MS_PER_DAY = 86_400_000
+
+
+def pick_sheets(available):
     return {
-        "cruises": cruises,
-        "routes": routes,
-        "partners": partners,
-        "customers": customers,
-        "bookings": bookings,
-        "cancellations": cancellations,
-        "stops": stops,
+        dataset: next((name for name in names if name in available), None)
+        for dataset, names in SHEET_GROUPS.items()
     }
+
+
+def missing_sheets(available):
+    return [
+        name
+        for names in SHEET_GROUPS.values()
+        for name in names
+        if name not in available
+    ]
+
+
+# ==================== STREAMING INGEST ====================
+def excel_serial_to_datetime(serials, epoch):
+    # Same rounding as openpyxl: whole days plus the day fraction to the ms
+    days = np.floor(serials)
+    ms = days * MS_PER_DAY + np.round((serials - days) * MS_PER_DAY)
+
+    out = np.full(len(serials), np.datetime64("NaT"), dtype="datetime64[us]")
+    valid = ~np.isnan(serials)
+    out[valid] = epoch + ms[valid].astype("int64").astype("timedelta64[ms]")
+    return out
+
+
+def _column_kind(values, is_date):
+    present = [v for v in values if v is not None]
+    if not present:
+        return None
+    if is_date:
+        return "date"
+    if all(isinstance(v, bool) for v in present):
+        return "bool"
+    if all(isinstance(v, float) for v in present):
+        return "number"
+    return "string"
+
+
+def _column_to_arrow(pa, values, kind, epoch, name):
+    if kind is None:
+        return pa.nulls(len(values))
+    if kind == "string":
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    if kind == "bool":
+        return pa.array(values, type=pa.bool_())
+
+    try:
+        numbers = np.array(values, dtype="float64")
+    except (TypeError, ValueError):
+        if kind == "date":
+            parsed = pd.to_datetime(pd.Series(values)).to_numpy("datetime64[us]")
+            return pa.array(parsed, from_pandas=True)
+        raise ValueError(
+            f"Column {name!r} mixes text into a numeric column; "
+            "load this workbook with ICRUISE_INGEST_MODE=pandas"
+        )
+
+    if kind == "date":
+        return pa.array(excel_serial_to_datetime(numbers, epoch), from_pandas=True)
+    return pa.array(numbers)
+
+
+def stream_sheet(file_path, sheet_name, batch_size=STREAM_BATCH_ROWS):
+    import pyarrow as pa
+
+    epoch = excel_epoch(file_path)
+    date_cols = set(DATE_COLUMNS.get(sheet_name, []))
+
+    header = None
+    kinds = None
+    integral = None
+    store = []  # growing columnar store: one Arrow table per row batch
+
+    for rows in iter_sheet_rows(file_path, sheet_name, batch_size):
+        if header is None:
+            header = [
+                f"Unnamed: {i}" if v is None else str(v)
+                for i, v in enumerate(rows[0])
+            ]
+            kinds = [None] * len(header)
+            integral = [True] * len(header)
+            rows = rows[1:]
+
+        width = len(header)
+        columns = list(zip(*(
+            row[:width] if len(row) >= width else row + [None] * (width - len(row))
+            for row in rows
+        ))) or [()] * width
+        del rows
+
+        arrays = []
+        for i, values in enumerate(columns):
+            if kinds[i] is None:
+                kinds[i] = _column_kind(values, header[i] in date_cols)
+
+            array = _column_to_arrow(pa, values, kinds[i], epoch, header[i])
+            if kinds[i] == "number":
+                numbers = array.to_numpy(zero_copy_only=False)
+                integral[i] = integral[i] and bool(
+                    np.all(np.isfinite(numbers)) and np.all(numbers == np.floor(numbers))
+                )
+            arrays.append(array)
+
+        store.append(pa.table(arrays, names=header))
+
+    if header is None:
+        return pd.DataFrame()
+
+    table = pa.concat_tables(store, promote_options="default")
+    del store
+
+    # Whole-number columns come back as int64, matching pd.read_excel
+    for i, name in enumerate(header):
+        if kinds[i] == "number" and integral[i]:
+            table = table.set_column(i, name, table.column(i).cast(pa.int64()))
+
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def should_stream(sheet_name, part_size):
+    if sheet_name not in STREAMING_SHEETS or find_spec("pyarrow") is None:
+        return False
+    if INGEST_MODE == "stream":
+        return True
+    if INGEST_MODE == "pandas":
+        return False
+    return part_size >= STREAM_MIN_BYTES
+
+
+# ==================== WORKBOOK INGEST ====================
+def read_workbook(file_path, enforce_schema=True):
+    sizes = sheet_part_sizes(file_path)
+    picked = [name for name in pick_sheets(sizes).values() if name]
+
+    streamed = [name for name in picked if should_stream(name, sizes[name])]
+    sheets, _ = read_sheets(file_path, [name for name in picked if name not in streamed])
+
+    for name in streamed:
+        sheets[name] = stream_sheet(file_path, name)
+
+    absent = missing_sheets(sizes)
+    if absent:
+        logger.info("Optional sheets not in %s: %s", Path(file_path).name, ", ".join(absent))
+
+    # ---------- Date conversions ----------
+    for sheet_name, df in sheets.items():
+        for col in DATE_COLUMNS.get(sheet_name, []):
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col])
+
+    # ---------- Compact typed schema ----------
+    if enforce_schema:
+        report = logger.isEnabledFor(logging.INFO)
+        raw = {name: df.copy() for name, df in sheets.items()} if report else {}
+
+        sheets = {name: apply_schema(df, name) for name, df in sheets.items()}
+
+        if report:
+            logger.info(
+                "Schema memory report:\n%s",
+                memory_report(raw, sheets).to_string(index=False),
+            )
+
+    return {name: sheets[name] for name in picked}
+
+
+def parquet_sources(workbook_path):
+    """(sheet -> Parquet path, fingerprint) for the DuckDB backend."""
+    if PARQUET_DIR:
+        paths = {p.stem: p for p in sorted(Path(PARQUET_DIR).glob("*.parquet"))}
+        fingerprint = "|".join(workbook_fingerprint(p) for p in paths.values())
+        return paths, fingerprint
+
+    status, manifest = cache_status(workbook_path)
+    if status != "fresh":
+        load_sheets(workbook_path, read_workbook)
+        status, manifest = cache_status(workbook_path)
+    if status != "fresh":
+        raise RuntimeError(
+            f"The DuckDB backend reads the Parquet ingest cache, which couldn't be "
+            f"written for {workbook_path}; see the log for why."
+        )
+
+    cache_dir = cache_dir_for(workbook_path)
+    paths = {sheet: cache_dir / f"{sheet}.parquet" for sheet in manifest["sheets"]}
+    return paths, workbook_fingerprint(workbook_path)
+
+
+def build_duckdb_dataset(workbook_path=WORKBOOK_PATH):
+    """Like build_dataset, but bookings, customers and cancellations stay in DuckDB.
+
+    Their entries hold zero-row frames (columns only); row-level queries go
+    through data["backend"], and the daily cube is aggregated in SQL.
+    """
+    paths, fingerprint = parquet_sources(workbook_path)
+    picked = pick_sheets(list(paths))
+
+    backend = DuckDbBackend({
+        dataset: paths[picked[dataset]]
+        for dataset in OUT_OF_CORE_DATASETS
+        if picked[dataset]
+    })
+
+    data = {}
+    for dataset, name in picked.items():
+        if name is None:
+            data[dataset] = None
+        elif dataset in OUT_OF_CORE_DATASETS:
+            data[dataset] = backend.schema_frame(dataset)
+        else:
+            data[dataset] = apply_schema(pd.read_parquet(paths[name]), name)
+
+    data["missing_sheets"] = missing_sheets(list(paths))
+    data["fingerprint"] = f"duckdb:{fingerprint}"
+    data["backend"] = backend
+
+    if data["bookings"] is None or "booking_date" not in data["bookings"].columns:
+        data["cube"] = None
+        data["kpi"] = None
+        data["sailings"] = None
+        return data
+
+    # Date widgets read the span from the (empty) bookings frame
+    data["bookings"].attrs["span"] = backend.span()
+
+    data = backend.build_star(data)
+    data["cube"] = backend.cube(CUBE_DIMENSIONS, CUBE_MEASURES)
+    data["kpi"] = KpiEngine(data["cube"])
+    data["sailings"] = (
+        build_sailings(backend.sailing_rows(), data["dim_cruises"])
+        if has_inventory(data["bookings"], data["dim_cruises"])
+        else None
+    )
+    return data
+
+
+@contextmanager
+def _timed(timings, stage):
+    started = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - started
+
+
+def build_dataset(workbook_path=WORKBOOK_PATH):
+    """Everything the pages read: typed sheets, star schema, cube and KPI engine.
+
+    data["load_timings"] breaks the in-memory build down by stage (seconds).
+    """
+    if DATA_SOURCE == "sql":
+        return build_sql_dataset(SQL_URL)
+
+    if QUERY_BACKEND == "duckdb":
+        if duckdb_available():
+            return build_duckdb_dataset(workbook_path)
+        logger.warning("ICRUISE_BACKEND=duckdb but duckdb is not installed; using pandas")
+
+    timings = {}
+    with _timed(timings, "read sheets"):
+        sheets = load_sheets(workbook_path, read_workbook)
+        available = list_sheets(workbook_path)
+
+    data = {
+        dataset: sheets.get(name) if name else None
+        for dataset, name in pick_sheets(available).items()
+    }
+    data["missing_sheets"] = missing_sheets(available)
+    data["fingerprint"] = workbook_fingerprint(workbook_path)
+    data["backend"] = None
+    data["load_timings"] = timings
+
+    # ---------- Time index: bookings sorted by booking_date ----------
+    if data["bookings"] is not None and "booking_date" in data["bookings"].columns:
+        with _timed(timings, "sort by booking date"):
+            data["bookings"] = data["bookings"].sort_values(
+                "booking_date", kind="stable", ignore_index=True
+            )
+
+    # ---------- Star schema: integer-keyed dimensions + fact ----------
+    with _timed(timings, "star schema"):
+        data = build_star(data)
+        if BUILD_BOOKINGS_VIEW and data["bookings"] is not None:
+            data["bookings_view"] = denormalize(data)
+
+    # ---------- Daily rollup cube for KPI / chart queries ----------
+    with _timed(timings, "cube + KPI index"):
+        if data["bookings"] is not None and "booking_date" in data["bookings"].columns:
+            data["cube"] = build_cube(data["bookings"])
+            data["kpi"] = KpiEngine(data["cube"])
+        else:
+            data["cube"] = None
+            data["kpi"] = None
+
+    # ---------- Sailing inventory: one row per (cruise, departure) ----------
+    with _timed(timings, "sailing inventory"):
+        data["sailings"] = (
+            build_sailings(sailing_rows(data["bookings"]), data["dim_cruises"])
+            if has_inventory(data["bookings"], data["dim_cruises"])
+            else None
+        )
+
+    # ---------- Per-day customer sketches for very large tables ----------
+    bookings = data["bookings"]
+    with _timed(timings, "customer sketches"):
+        data["customer_sketches"] = (
+            CustomerSketches.build(bookings)
+            if data["kpi"] is not None
+            and "customer_id" in bookings.columns
+            and sketches_enabled(len(bookings))
+            else None
+        )
+
+    # ---------- Cohort index: customer codes and first months ----------
+    with _timed(timings, "cohort index"):
+        data["cohort_index"] = (
+            CohortIndex.build(bookings, data["customers"])
+            if data["kpi"] is not None and "customer_id" in bookings.columns
+            else None
+        )
+    return data
+
+
+# ==================== DATASET CACHE ====================
+# One cached dataset per source fingerprint, so a new export is picked up
+# on the next rerun. Old fingerprints age out through the TTL / entry cap.
+# The dataset is a shared resource: every session reads the same frames,
+# so per-session memory doesn't grow with the data.
+DATASET_CACHE_TTL = int(os.environ.get("ICRUISE_DATA_TTL", 6 * 60 * 60))
+DATASET_CACHE_ENTRIES = int(os.environ.get("ICRUISE_DATA_MAX_ENTRIES", 2))
+# Key on content (sha256) instead of mtime: re-saving an identical file is a hit
+FINGERPRINT_HASH = os.environ.get("ICRUISE_FINGERPRINT_HASH", "0") == "1"
+# A database fingerprint is an aggregate query; reruns within this many
+# seconds reuse the last answer instead of probing again
+FINGERPRINT_TTL = float(os.environ.get("ICRUISE_FINGERPRINT_TTL", 60))
+
+_hashes = {}
+_sql_probe = None
+_sql_fingerprint = None  # (fingerprint, monotonic time probed)
+_current_fingerprint = None
+
+
+def _hashed_fingerprint(path):
+    # Hash only when size or mtime moved; otherwise reuse the last digest
+    stat = Path(path).stat()
+    stamp = (str(path), stat.st_size, stat.st_mtime_ns)
+    if stamp not in _hashes:
+        _hashes.clear()
+        _hashes[stamp] = file_hash(path)
+    return f"{Path(path).name}:{stat.st_size}:{_hashes[stamp]}"
+
+
+def _probe_sql():
+    global _sql_probe, _sql_fingerprint
+    if _sql_fingerprint is not None and time.monotonic() - _sql_fingerprint[1] < FINGERPRINT_TTL:
+        return _sql_fingerprint[0]
+    if _sql_probe is None:
+        _sql_probe = SqlBackend(SQL_URL)
+    _sql_fingerprint = (_sql_probe.fingerprint(), time.monotonic())
+    return _sql_fingerprint[0]
+
+
+def source_fingerprint():
+    """Cheap identity of the current source data.
+
+    One stat per file, or for a database one COUNT/MAX probe at most every
+    FINGERPRINT_TTL seconds.
+    """
+    if DATA_SOURCE == "sql":
+        return _probe_sql()
+
+    if QUERY_BACKEND == "duckdb" and PARQUET_DIR:
+        paths = sorted(Path(PARQUET_DIR).glob("*.parquet"))
+        return "|".join(workbook_fingerprint(p) for p in paths)
+
+    if FINGERPRINT_HASH:
+        return _hashed_fingerprint(WORKBOOK_PATH)
+    return workbook_fingerprint(WORKBOOK_PATH)
+
+
+def enable_copy_on_write():
+    # pandas >= 3 always copies on write. On 2.x the option makes every
+    # slice or derived frame a lazy copy, so it can't write through to the
+    # shared frames.
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+enable_copy_on_write()
+
+
+def freeze_dataset(data):
+    """Read-only view of a built dataset, safe to hand to every session.
+
+    Pages can't rebind keys, and with copy-on-write any column they add or
+    overwrite lands in their own copy of the frame.
+    """
+    return MappingProxyType(data)
+
+
+def dataset_nbytes(data):
+    return sum(
+        int(value.memory_usage(deep=True).sum())
+        for value in data.values()
+        if isinstance(value, pd.DataFrame)
+    )
+
+
+@st.cache_resource(
+    ttl=DATASET_CACHE_TTL,
+    max_entries=DATASET_CACHE_ENTRIES,
+    show_spinner="Loading data…",
+)
+def _load_dataset(fingerprint):
+    data = build_dataset()
+    data["cache_key"] = fingerprint
+    data["loaded_at"] = time.time()
+    data["nbytes"] = dataset_nbytes(data)
+    return freeze_dataset(data)
+
+
+def load_data():
+    """The shared, read-only dataset for the current source."""
+    global _current_fingerprint
+    fingerprint = source_fingerprint()
+
+    data = _load_dataset(fingerprint)
+    if fingerprint != _current_fingerprint:
+        if _current_fingerprint is not None:
+            logger.info("Source changed (%s -> %s)", _current_fingerprint, fingerprint)
+            # Results memoized for the older version of the data are dead weight now
+            retain_fingerprint(data["fingerprint"])
+        _current_fingerprint = fingerprint
+    return data
+
+
+def refresh_data():
+    """Drop every cached dataset and memoized result; the next load re-reads the source."""
+    global _current_fingerprint, _sql_fingerprint
+    _load_dataset.clear()
+    clear_caches()
+    _current_fingerprint = None
+    _sql_fingerprint = None
@@ -0,0 +1,326 @@
+import os
+import threading
+import uuid
+from importlib.util import find_spec
+
+import pandas as pd
+
+from data.ingest_cache import CACHE_ROOT
+from data.inventory import SAILING_MEASURES
+from data.star_schema import DIMENSIONS, KEY_COLUMNS, build_dimension
+
+# Optional backend: the bookings-sized sheets stay in Parquet and are
+# scanned by an embedded DuckDB, so date filters, dimension joins and
+# group-bys run out of core. Only masters and result frames are pandas.
+
+# ==================== CONFIG ====================
+DUCKDB_MEMORY_LIMIT = os.environ.get("ICRUISE_DUCKDB_MEMORY")  # e.g. "2GB"
+DUCKDB_TEMP_DIR = CACHE_ROOT / "duckdb_tmp"
+
+KEYED_FILTERS = (
+    ("route_key", "routes"),
+    ("cruise_key", "cruises"),
+    ("partner_key", "partners"),
+)
+
+# One connection per backend per process (forked workers open their own)
+_connections = {}
+_lock = threading.Lock()
+
+
+def duckdb_available():
+    return find_spec("duckdb") is not None
+
+
+def _ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _month(column):
+    # year * 12 + month - 1, like cohorts.month_codes
+    return f"(year({_ident(column)}) * 12 + month({_ident(column)}) - 1)"
+
+
+def _sql_path(path):
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+class DuckDbBackend:
+    """Bookings, customers and cancellations as DuckDB views over Parquet.
+
+    Connections are kept outside the object, per process, so the one
+    instance in the shared st.cache_resource dataset serves every session.
+    A copy in another process (it pickles to its file paths and dimension
+    maps) reconnects lazily.
+    """
+
+    def __init__(self, paths):
+        self.paths = {name: str(path) for name, path in paths.items()}
+        self.maps = {}
+        self.token = uuid.uuid4().hex
+
+    def __getstate__(self):
+        return {"paths": self.paths, "maps": self.maps, "token": self.token}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    # ---------- Connection ----------
+    def _connect(self):
+        import duckdb
+
+        con = duckdb.connect()
+        DUCKDB_TEMP_DIR.mkdir(parents=True, exist_ok=True)
+        con.execute(f"SET temp_directory = {_sql_path(DUCKDB_TEMP_DIR)}")
+        if DUCKDB_MEMORY_LIMIT:
+            con.execute(f"SET memory_limit = {_sql_path(DUCKDB_MEMORY_LIMIT)}")
+
+        for name, path in self.paths.items():
+            con.execute(
+                f"CREATE VIEW {_ident(name)} AS SELECT * FROM read_parquet({_sql_path(path)})"
+            )
+        for name, mapping in self.maps.items():
+            # Registered frames are per-cursor; copy them into the database
+            con.register("mapping", mapping)
+            con.execute(f"CREATE TABLE map_{name} AS SELECT raw, key FROM mapping")
+            con.unregister("mapping")
+        self._create_fact_view(con)
+        return con
+
+    def _create_fact_view(self, con):
+        joins, keys = [], []
+        for i, (name, mapping) in enumerate(self.maps.items()):
+            alias = f"m{i}"
+            join_col = mapping.attrs["join_col"]
+            joins.append(
+                f"LEFT JOIN map_{name} {alias} "
+                f"ON CAST(b.{_ident(join_col)} AS VARCHAR) = {alias}.raw"
+            )
+            keys.append(
+                f"CAST(COALESCE({alias}.key, -1) AS INTEGER) AS {KEY_COLUMNS[name]}"
+            )
+
+        columns = ", ".join(["b.*"] + keys)
+        con.execute(
+            f"CREATE OR REPLACE VIEW fact AS SELECT {columns} FROM bookings b {' '.join(joins)}"
+        )
+
+    def cursor(self):
+        key = (self.token, os.getpid())
+        with _lock:
+            con = _connections.get(key)
+            if con is None:
+                con = self._connect()
+                _connections[key] = con
+        # Cursors are independent connections to the same database: one per query
+        return con.cursor()
+
+    def query(self, sql, params=None):
+        cur = self.cursor()
+        try:
+            return cur.execute(sql, params or []).df()
+        finally:
+            cur.close()
+
+    # ---------- Schema ----------
+    def columns(self, view):
+        return self.query(f"DESCRIBE {_ident(view)}").set_index("column_name")["column_type"]
+
+    def schema_frame(self, view):
+        """A zero-row frame with the view's columns, for code that inspects columns."""
+        return self.query(f"SELECT * FROM {_ident(view)} LIMIT 0")
+
+    def span(self, date_column="booking_date"):
+        row = self.query(
+            f"SELECT MIN({_ident(date_column)}) AS lo, MAX({_ident(date_column)}) AS hi FROM bookings"
+        ).iloc[0]
+        if pd.isna(row["lo"]):
+            return None
+        return pd.Timestamp(row["lo"]), pd.Timestamp(row["hi"])
+
+    def _sum(self, column, types):
+        total = f"SUM({_ident(column)})"
+        if "INT" in types[column]:
+            return f"CAST({total} AS BIGINT)"
+        return total
+
+    # ---------- Star schema ----------
+    def build_star(self, data):
+        """Resolve dims from the distinct fact IDs; the fact gets keys through SQL joins."""
+        types = self.columns("bookings")
+        for name, (_, _, fact_cols) in DIMENSIONS.items():
+            join_col = next((c for c in fact_cols if c in types.index), None)
+            if join_col is None:
+                data[f"dim_{name}"] = None
+                continue
+
+            distinct = self.query(
+                f"SELECT DISTINCT {_ident(join_col)} AS value, "
+                f"CAST({_ident(join_col)} AS VARCHAR) AS raw FROM bookings "
+                f"WHERE {_ident(join_col)} IS NOT NULL"
+            )
+            dim, fact_keys = build_dimension(
+                name, data.get(name), distinct.rename(columns={"value": join_col})
+            )
+            mapping = pd.DataFrame({"raw": distinct["raw"], "key": fact_keys})
+            mapping.attrs["join_col"] = join_col
+            self.maps[name] = mapping
+            data[f"dim_{name}"] = dim
+
+        # Maps changed, so any open connection needs the new fact view
+        with _lock:
+            for key in [k for k in _connections if k[0] == self.token]:
+                _connections.pop(key).close()
+        return data
+
+    # ---------- Filters ----------
+    def where(self, state, date_column="booking_date", extra=()):
+        clauses, params = list(extra), []
+        if state.start is not None:
+            clauses.append(f"{_ident(date_column)} >= ?")
+            params.append(pd.Timestamp(state.start).to_pydatetime())
+        if state.end is not None:
+            clauses.append(f"{_ident(date_column)} < ?")
+            params.append(pd.Timestamp(state.end).to_pydatetime())
+        for column, field in KEYED_FILTERS:
+            keys = getattr(state, field)
+            if keys:
+                clauses.append(f"{column} IN ({', '.join('?' * len(keys))})")
+                params.extend(int(k) for k in keys)
+
+        sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return sql, params
+
+    # ==================== QUERIES ====================
+    def cube(self, dimensions, measures):
+        """Same layout as rollup.build_cube, aggregated inside DuckDB."""
+        types = self.columns("fact")
+        dims = [d for d in dimensions[1:] if d in types.index]
+        measures = [m for m in measures if m in types.index]
+
+        select = ["date_trunc('day', booking_date) AS day"] + [_ident(d) for d in dims]
+        select += [f"{self._sum(m, types)} AS {_ident(m)}" for m in measures]
+        select.append("COUNT(*) AS bookings")
+        if "booking_status" in types.index:
+            select.append(
+                "CAST(SUM(CASE WHEN booking_status = 'Cancelled' THEN 1 ELSE 0 END) AS BIGINT)"
+                " AS cancellations"
+            )
+
+        order = ", ".join(str(i) for i in range(1, len(dims) + 2))
+        cube = self.query(
+            f"SELECT {', '.join(select)} FROM fact WHERE booking_date IS NOT NULL "
+            f"GROUP BY ALL ORDER BY {order}"
+        )
+        cube["day"] = cube["day"].astype("datetime64[us]")
+        if "booking_status" in cube.columns:
+            cube["booking_status"] = cube["booking_status"].astype("category")
+        for key in KEY_COLUMNS.values():
+            if key in cube.columns:
+                cube[key] = cube[key].astype("int32")
+        return cube
+
+    def sailing_rows(self):
+        """Same layout as inventory.sailing_rows, grouped inside DuckDB."""
+        types = self.columns("fact")
+        dims = [d for d in ("cruise_key", "route_key", "booking_status") if d in types.index]
+        select = ["date_trunc('day', cruise_date) AS departure"] + [_ident(d) for d in dims]
+        select += [f"{self._sum(m, types)} AS {_ident(m)}" for m in SAILING_MEASURES]
+        select.append("COUNT(*) AS bookings")
+
+        rows = self.query(
+            f"SELECT {', '.join(select)} FROM fact WHERE cruise_date IS NOT NULL GROUP BY ALL"
+        )
+        rows["departure"] = rows["departure"].astype("datetime64[us]")
+        return rows
+
+    def count_by(self, state, column, source="fact"):
+        where, params = self.where(state, extra=[f"{_ident(column)} IS NOT NULL"])
+        return self.query(
+            f"SELECT {_ident(column)}, COUNT(booking_id) AS Bookings FROM {source} "
+            f"{where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def booking_trend(self, state):
+        where, params = self.where(state, extra=["booking_date IS NOT NULL"])
+        trend = self.query(
+            "SELECT CAST(booking_date AS DATE) AS booking_date, COUNT(booking_id) AS Bookings "
+            f"FROM fact {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+        trend["booking_date"] = trend["booking_date"].dt.date
+        return trend
+
+    def lead_time_counts(self, state):
+        """Bookings per whole lead-time day (cruise_date - booking_date, floored)."""
+        where, params = self.where(
+            state, extra=["cruise_date IS NOT NULL", "booking_date IS NOT NULL"]
+        )
+        return self.query(
+            "SELECT CAST(floor(date_diff('millisecond', booking_date, cruise_date) "
+            "/ 86400000.0) AS BIGINT) AS lead_time_days, COUNT(booking_id) AS Bookings "
+            f"FROM fact {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def origin_counts(self, state):
+        where, params = self.where(state, extra=["c.customer_type IS NOT NULL"])
+        return self.query(
+            "SELECT c.customer_type, COUNT(f.booking_id) AS Bookings FROM fact f "
+            f"LEFT JOIN customers c ON f.customer_id = c.customer_id {where} "
+            "GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def customer_totals(self, state):
+        types = self.columns("fact")
+        where, params = self.where(state, extra=["customer_id IS NOT NULL"])
+        return self.query(
+            f"SELECT customer_id, COUNT(booking_id) AS Bookings, "
+            f"{self._sum('total_booking_value', types)} AS Revenue "
+            f"FROM fact {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def customer_months(self, state):
+        """Revenue per (customer, booking month) in the window."""
+        types = self.columns("fact")
+        where, params = self.where(
+            state, extra=["customer_id IS NOT NULL", "booking_date IS NOT NULL"]
+        )
+        return self.query(
+            f"SELECT customer_id, {_month('booking_date')} AS month, "
+            f"{self._sum('total_booking_value', types)} AS revenue "
+            f"FROM fact {where} GROUP BY ALL",
+            params,
+        )
+
+    def first_months(self, sheet_dates=False):
+        """First booking month per customer, over all bookings and the Customers sheet."""
+        months = [
+            f"SELECT customer_id, {_month('booking_date')} AS month FROM bookings "
+            "WHERE customer_id IS NOT NULL AND booking_date IS NOT NULL"
+        ]
+        if sheet_dates:
+            months.append(
+                f"SELECT customer_id, {_month('first_booking_date')} FROM customers "
+                "WHERE first_booking_date IS NOT NULL"
+            )
+        return self.query(
+            "SELECT customer_id, MIN(month) AS first_month "
+            f"FROM ({' UNION ALL '.join(months)}) GROUP BY 1"
+        )
+
+    def partner_totals(self, state, partner_col):
+        types = self.columns("fact")
+        where, params = self.where(state, extra=[f"{_ident(partner_col)} IS NOT NULL"])
+        return self.query(
+            f"SELECT {_ident(partner_col)}, "
+            f"{self._sum('total_booking_value', types)} AS Revenue, "
+            "COUNT(booking_id) AS Bookings, "
+            "CAST(SUM(CASE WHEN booking_status = 'Cancelled' THEN 1 ELSE 0 END) AS BIGINT)"
+            " AS Cancellations "
+            f"FROM fact {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
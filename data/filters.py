@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# ==================== DATE PRESETS ====================
+# Calendar days ending on the latest booking's day. Windows start at
+# midnight so every data path (row slices, daily rollups, prefix sums)
+# sees the same days.
+DATE_PRESETS = {
+    "Past 7 Days": 7,
+    "Past 30 Days": 30,
+    "Past 3 Months": 90,
+    "Past 6 Months": 180,
+    "All Time": None,
+}
+CUSTOM_RANGE = "Custom Range"
+
+
+@dataclass(frozen=True)
+class FilterState:
+    start: pd.Timestamp = None  # inclusive
+    end: pd.Timestamp = None  # exclusive
+    routes: tuple = ()
+    cruises: tuple = ()
+    partners: tuple = ()
+
+
+def normalize_filters(state):
+    # Same selection, same key: timestamps as Timestamps, keys sorted and unique
+    return FilterState(
+        start=None if state.start is None else pd.Timestamp(state.start),
+        end=None if state.end is None else pd.Timestamp(state.end),
+        routes=tuple(sorted(set(state.routes))),
+        cruises=tuple(sorted(set(state.cruises))),
+        partners=tuple(sorted(set(state.partners))),
+    )
+
+
+def booking_span(bookings):
+    """(first, last) booking_date, or None when there are no bookings."""
+    # Out-of-core backends keep bookings as a zero-row frame carrying its span
+    if "span" in bookings.attrs:
+        return bookings.attrs["span"]
+
+    dates = bookings["booking_date"].to_numpy()
+    # Bookings are sorted at load, so the first and last rows bound the
+    # range; blank dates (NaT) sort after every real one
+    dated = int(dates.searchsorted(np.datetime64("NaT"), "left"))
+    if not dated:
+        return None
+    return pd.Timestamp(dates[0]), pd.Timestamp(dates[dated - 1])
+
+
+def preset_range(bookings, option):
+    span = booking_span(bookings)
+    days = DATE_PRESETS[option]
+
+    if days is None or span is None:
+        return None, None
+
+    latest = span[1]
+    return latest.normalize() - timedelta(days=days - 1), None
+
+
+def custom_range(start_date, end_date):
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date) + timedelta(days=1)
+    return start, end
+
+
+# ==================== FILTER ENGINE ====================
+def date_bounds(bookings, start=None, end=None, date_column="booking_date"):
+    dates = bookings[date_column].to_numpy()
+
+    # Rows are sorted by date with blank dates (NaT) last; those fall
+    # outside every window, All Time included
+    lo, hi = 0, int(dates.searchsorted(np.datetime64("NaT"), "left"))
+    if start is not None:
+        lo = int(dates.searchsorted(pd.Timestamp(start).to_datetime64(), "left"))
+    if end is not None:
+        hi = min(hi, int(dates.searchsorted(pd.Timestamp(end).to_datetime64(), "left")))
+    return lo, max(lo, hi)
+
+
+def date_slice(bookings, start=None, end=None, date_column="booking_date"):
+    """Rows with start <= date < end, as a positional slice (no scan, no copy)."""
+    lo, hi = date_bounds(bookings, start, end, date_column)
+    return bookings.iloc[lo:hi]
+
+
+def key_mask(frame, column, keys):
+    return np.isin(frame[column].to_numpy(), np.asarray(keys, dtype=frame[column].dtype))
+
+
+def apply_filters(bookings, state, date_column="booking_date"):
+    filtered = date_slice(bookings, state.start, state.end, date_column)
+
+    mask = None
+    for column, keys in (
+        ("route_key", state.routes),
+        ("cruise_key", state.cruises),
+        ("partner_key", state.partners),
+    ):
+        if keys and column in filtered.columns:
+            column_mask = key_mask(filtered, column, keys)
+            mask = column_mask if mask is None else mask & column_mask
+
+    return filtered if mask is None else filtered[mask]
+
+
+# ==================== SIDEBAR WIDGETS ====================
+def date_range_sidebar(bookings, label="Choose a date range"):
+    option = st.sidebar.selectbox(label, [*DATE_PRESETS, CUSTOM_RANGE])
+
+    if option != CUSTOM_RANGE:
+        start, end = preset_range(bookings, option)
+        return option, start, end
+
+    span = booking_span(bookings)
+    if span is None:
+        st.sidebar.caption("No bookings to pick a date range from.")
+        return option, None, None
+
+    first, last = (ts.date() for ts in span)
+    picked = st.sidebar.date_input(
+        "Date range", value=(first, last), min_value=first, max_value=last
+    )
+
+    # The widget returns fewer than two dates while the user is mid-selection
+    if isinstance(picked, (tuple, list)):
+        picked = tuple(picked) + (first, last)[len(picked):]
+    else:
+        picked = (picked, last)
+
+    start, end = custom_range(*picked)
+    return option, start, end
+
+
+def dimension_sidebar(label, dim, name_col):
+    if dim is None or name_col not in dim.columns:
+        return ()
+
+    names = dim[name_col].dropna().unique()
+    selected = st.sidebar.multiselect(label, options=names)
+    if not selected:
+        return ()
+
+    key_col = dim.columns[0]
+    return tuple(int(k) for k in dim.loc[dim[name_col].isin(selected), key_col])
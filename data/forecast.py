@@ -0,0 +1,289 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.aggregations import route_labels
+from data.memo import CACHES, LruCache
+
+# Forecast & Planning: every daily series the page can show (the fleet and
+# each route, cruise and partner, for bookings, seats and revenue) is
+# stacked into one (series x days) array and fitted in a single pass.
+#
+# The model is a trend line plus day-of-week effects, fitted by
+# exponentially weighted least squares so recent weeks count most. Every
+# series shares the same design matrix and weights, so one solve covers
+# all of them, and confidence bands only need each series' residual
+# spread. Models are fitted once per dataset version; page views only
+# evaluate them.
+
+# ==================== CONFIG ====================
+FIT_DAYS = int(os.environ.get("ICRUISE_FORECAST_FIT_DAYS", 365))
+HALF_LIFE_DAYS = float(os.environ.get("ICRUISE_FORECAST_HALF_LIFE", 90))
+# Series fitted per slice, so residuals never cover the whole stack at once
+FIT_BATCH = 2000
+
+HORIZONS = [30, 60, 90]
+Z_95 = 1.96
+
+# Measure label -> cube column
+FORECAST_MEASURES = {
+    "Bookings": "bookings",
+    "Seats": "seats_booked",
+    "Revenue": "total_booking_value",
+}
+# Segment label -> cube key column (None: the whole fleet)
+SEGMENTS = {
+    "Fleet": None,
+    "Route": "route_key",
+    "Cruise": "cruise_key",
+    "Partner": "partner_key",
+}
+
+_MODELS = LruCache("forecast_models", max_entries=2)
+CACHES[_MODELS.name] = _MODELS
+
+
+# ==================== SERIES ====================
+def stack_series(cube, first_day, n_days):
+    """(segments, values): one row per (measure, segment, key) daily series.
+
+    segments has measure, segment and key columns; values is a float64
+    (series x n_days) array of daily sums from first_day on.
+    """
+    days = cube["day"].to_numpy().astype("datetime64[D]")
+    offset = (days - first_day).astype(np.int64)
+    inside = (offset >= 0) & (offset < n_days)
+    offset = offset[inside]
+
+    segments, blocks = [], []
+    for segment, key_col in SEGMENTS.items():
+        if key_col is None:
+            keys, n_keys = np.zeros(len(offset), dtype=np.int64), 1
+        elif key_col in cube.columns:
+            keys = cube[key_col].to_numpy()[inside].astype(np.int64)
+            n_keys = int(keys.max()) + 1 if len(keys) else 0
+        else:
+            continue
+
+        # Unknown keys (-1) stay out of every series
+        known = keys >= 0
+        cell = keys[known] * n_days + offset[known]
+        for measure, column in FORECAST_MEASURES.items():
+            if column not in cube.columns or not n_keys:
+                continue
+            values = cube[column].to_numpy()[inside][known].astype(np.float64)
+            blocks.append(
+                np.bincount(cell, weights=values, minlength=n_keys * n_days)
+                .reshape(n_keys, n_days)
+            )
+            segments.append(pd.DataFrame({
+                "measure": measure,
+                "segment": segment,
+                "key": np.arange(n_keys) if key_col else [-1],
+            }))
+
+    if not blocks:
+        return None, None
+    return pd.concat(segments, ignore_index=True), np.vstack(blocks)
+
+
+# ==================== FIT ====================
+def design(offsets, last_day):
+    """Intercept, trend and centred day-of-week columns for day offsets.
+
+    Offsets count days from the last fitted day (0), so the intercept is
+    the level at the end of the history and the trend is per day.
+    """
+    offsets = np.asarray(offsets, dtype=np.float64)
+    dow = (np.asarray(offsets, dtype=np.int64) + pd.Timestamp(last_day).weekday()) % 7
+    onehot = (dow[:, None] == np.arange(6)[None, :]).astype(np.float64) - 1 / 7
+    return np.column_stack([np.ones(len(offsets)), offsets, onehot])
+
+
+def fit_batch(X, weights, values):
+    """Weighted least squares of every row of values on X at once.
+
+    Returns (coefficients (series x p), residual sd per series).
+    """
+    Xw = X * weights[:, None]
+    gram = X.T @ Xw
+    coef = np.linalg.solve(gram, Xw.T @ values.T).T
+
+    resid = values - coef @ X.T
+    # Effective sample size of the weights, for an unbiased spread
+    n_eff = weights.sum() ** 2 / (weights ** 2).sum()
+    dof = max(n_eff - X.shape[1], 1.0)
+    sigma = np.sqrt((resid ** 2 @ weights) / weights.sum() * n_eff / dof)
+    return coef, sigma
+
+
+def fit_all(X, weights, values):
+    """fit_batch over every series, FIT_BATCH rows at a time, in-process."""
+    if len(values) <= FIT_BATCH:
+        return fit_batch(X, weights, values)
+
+    fitted = [
+        fit_batch(X, weights, values[lo:lo + FIT_BATCH])
+        for lo in range(0, len(values), FIT_BATCH)
+    ]
+    return np.vstack([c for c, _ in fitted]), np.concatenate([s for _, s in fitted])
+
+
+# ==================== MODEL ====================
+class ForecastModel:
+    """Fitted trend + weekday models for a stack of daily series."""
+
+    def __init__(self, segments, coef, sigma, unit_cov, last_day, history):
+        self.segments = segments  # measure, segment, key, label per series
+        self.coef = coef  # (series x p)
+        self.sigma = sigma  # residual sd per series
+        self.unit_cov = unit_cov  # coefficient covariance for sigma = 1
+        self.last_day = last_day  # last fitted day (datetime64[D])
+        self.history = history  # fitted daily values, float32 (series x days)
+
+    @classmethod
+    def fit(cls, cube, fit_days=FIT_DAYS, half_life=HALF_LIFE_DAYS):
+        days = cube["day"].to_numpy().astype("datetime64[D]")
+        if not len(days):
+            return None
+        last_day = days.max()
+        n_days = min(fit_days, int((last_day - days.min()).astype(np.int64)) + 1)
+        first_day = last_day - np.timedelta64(n_days - 1, "D")
+
+        segments, values = stack_series(cube, first_day, n_days)
+        offsets = np.arange(-(n_days - 1), 1)
+        X = design(offsets, last_day)
+        if segments is None or n_days <= X.shape[1]:
+            return None
+
+        weights = 0.5 ** (-offsets / half_life)
+        coef, sigma = fit_all(X, weights, values)
+
+        # Cov(b) = sigma^2 (X'WX)^-1 X'W^2X (X'WX)^-1
+        bread = np.linalg.inv(X.T @ (X * weights[:, None]))
+        unit_cov = bread @ (X.T @ (X * (weights ** 2)[:, None])) @ bread
+
+        return cls(segments, coef, sigma, unit_cov, last_day, values.astype(np.float32))
+
+    @property
+    def nbytes(self):
+        return self.coef.nbytes + self.sigma.nbytes + self.history.nbytes
+
+    # ---------- Lookup ----------
+    def rows(self, measure, segment):
+        """Segments of one measure and segment type, with their row numbers."""
+        s = self.segments
+        return s[(s["measure"] == measure) & (s["segment"] == segment)]
+
+    def row(self, measure, segment, key=-1):
+        match = self.rows(measure, segment)
+        match = match[match["key"] == key]
+        return int(match.index[0]) if len(match) else None
+
+    # ---------- Predictions ----------
+    def _future(self, horizon):
+        offsets = np.arange(1, horizon + 1)
+        return offsets, design(offsets, self.last_day)
+
+    def predict(self, row, horizon):
+        """Daily forecast with its 95% band for the next horizon days."""
+        offsets, X = self._future(horizon)
+        point = X @ self.coef[row]
+        spread = Z_95 * self.sigma[row] * np.sqrt(1 + np.einsum("ij,jk,ik->i", X, self.unit_cov, X))
+        return pd.DataFrame({
+            "day": pd.to_datetime(self.last_day + offsets.astype("timedelta64[D]")),
+            "Forecast": np.maximum(point, 0),
+            "Lower": np.maximum(point - spread, 0),
+            "Upper": np.maximum(point + spread, 0),
+        })
+
+    def totals(self, rows, horizon):
+        """(forecast, lower, upper) sums over the next horizon days, per row."""
+        _, X = self._future(horizon)
+        s = X.sum(axis=0)
+        point = self.coef[rows] @ s
+        spread = Z_95 * self.sigma[rows] * np.sqrt(horizon + s @ self.unit_cov @ s)
+        return np.maximum(point, 0), np.maximum(point - spread, 0), np.maximum(point + spread, 0)
+
+    def trend(self, rows):
+        """(slope, lower, upper) per day with a 95% band, per row."""
+        slope = self.coef[rows, 1]
+        spread = Z_95 * self.sigma[rows] * np.sqrt(self.unit_cov[1, 1])
+        return slope, slope - spread, slope + spread
+
+    def actuals(self, row, days=None):
+        values = self.history[row] if days is None else self.history[row, -days:]
+        offsets = np.arange(-(len(values) - 1), 1)
+        return pd.DataFrame({
+            "day": pd.to_datetime(self.last_day + offsets.astype("timedelta64[D]")),
+            "Actual": values.astype(np.float64),
+        })
+
+
+def trend_direction(slope, lower, upper):
+    """Rising / Falling when the whole band is on one side of zero."""
+    return np.select([lower > 0, upper < 0], ["📈 Rising", "📉 Falling"], "➖ Flat")
+
+
+# ==================== CACHE ====================
+def segment_labels(data):
+    """Display label per (segment, key)."""
+    labels = {("Fleet", -1): "All cruises"}
+    sources = {
+        "Route": (data["dim_routes"], route_labels),
+        "Cruise": (data["dim_cruises"], lambda dim: dim["cruise_name"]),
+        "Partner": (data["dim_partners"], lambda dim: dim["partner_name"]),
+    }
+    for segment, (dim, label) in sources.items():
+        if dim is not None:
+            labels.update({(segment, key): name for key, name in enumerate(label(dim).astype(str))})
+    return labels
+
+
+def forecast_models(data):
+    """The fitted models for this dataset version, fitted on first use."""
+    key = (data.get("fingerprint"),)
+    hit, model = _MODELS.get(key)
+    if not hit:
+        model = ForecastModel.fit(data["cube"])
+        if model is not None:
+            labels = segment_labels(data)
+            model.segments["label"] = [
+                labels.get((s, k), f"{s} {k}")
+                for s, k in zip(model.segments["segment"], model.segments["key"])
+            ]
+        _MODELS.put(key, model)
+    return model
+
+
+# ==================== PLANNING ====================
+def expected_occupancy(sailings, segment, keys, seats, horizon, last_day, window_days=FIT_DAYS):
+    """Forecast seats as a % of the capacity the schedule offers over horizon days.
+
+    Capacity per day is that of each key's sailings departing in the last
+    window_days. Returns an array aligned with keys (NaN without capacity),
+    or None for partners or without a sailing inventory.
+    """
+    if sailings is None or segment not in ("Fleet", "Route", "Cruise"):
+        return None
+    departures = sailings.index.get_level_values("departure")
+    last = pd.Timestamp(last_day)
+    recent = sailings[
+        (departures > last - pd.Timedelta(days=window_days))
+        & (departures < last + pd.Timedelta(days=1))
+    ]
+
+    if segment == "Fleet":
+        by_key = np.full(len(recent), -1)
+    elif segment == "Cruise":
+        by_key = recent.index.get_level_values("cruise_key")
+    else:
+        by_key = recent["route_key"].to_numpy()
+    daily_capacity = recent["capacity"].groupby(by_key).sum() / window_days
+
+    capacity = daily_capacity.reindex(np.asarray(keys)).to_numpy(dtype=np.float64) * horizon
+    return np.divide(
+        np.asarray(seats, dtype=np.float64) * 100, capacity,
+        out=np.full(len(capacity), np.nan), where=capacity > 0,
+    )
@@ -0,0 +1,204 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==================== CONFIG ====================
+CACHE_VERSION = 2
+CACHE_ROOT = Path(
+    os.environ.get("ICRUISE_CACHE_DIR", Path(__file__).resolve().parent / ".cache")
+)
+MANIFEST_NAME = "manifest.json"
+
+
+# ==================== WORKBOOK KEY ====================
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workbook_key(path):
+    stat = Path(path).stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(path),
+    }
+
+
+def workbook_fingerprint(path):
+    # Cheap identity of the data behind a load: no hashing, one stat call
+    stat = Path(path).stat()
+    return f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns}:v{CACHE_VERSION}"
+
+
+def cache_dir_for(workbook_path):
+    # Stem for readability, plus the resolved path so a/bookings.xlsx and
+    # b/bookings.xlsx don't share a folder
+    path = Path(workbook_path).resolve()
+    return CACHE_ROOT / f"{path.stem}-{hashlib.sha1(str(path).encode()).hexdigest()[:8]}"
+
+
+# ==================== MANIFEST ====================
+def read_manifest(cache_dir):
+    try:
+        with open(cache_dir / MANIFEST_NAME, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(cache_dir, manifest):
+    tmp_path = cache_dir / f"{MANIFEST_NAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp_path, cache_dir / MANIFEST_NAME)
+
+
+def cache_status(workbook_path):
+    """Return ("fresh" | "stale" | "missing", manifest) for a workbook's cache.
+
+    Size and mtime are compared first; the content hash is only computed when
+    they differ, so an untouched workbook never gets re-read.
+    """
+    workbook_path = Path(workbook_path)
+    cache_dir = cache_dir_for(workbook_path)
+    manifest = read_manifest(cache_dir)
+
+    if manifest is None or manifest.get("version") != CACHE_VERSION:
+        return "missing", manifest
+
+    if any(not (cache_dir / f"{sheet}.parquet").exists() for sheet in manifest["sheets"]):
+        return "missing", manifest
+
+    stat = workbook_path.stat()
+    key = manifest["key"]
+
+    if key["size"] == stat.st_size and key["mtime_ns"] == stat.st_mtime_ns:
+        return "fresh", manifest
+
+    # ---------- Touched but possibly unchanged (copied, re-exported) ----------
+    if key["size"] == stat.st_size and key["sha256"] == file_hash(workbook_path):
+        key["mtime_ns"] = stat.st_mtime_ns
+        write_manifest(cache_dir, manifest)
+        return "fresh", manifest
+
+    return "stale", manifest
+
+
+# ==================== READ / WRITE ====================
+def cache_available():
+    return find_spec("pyarrow") is not None
+
+
+def read_cache(workbook_path, manifest):
+    cache_dir = cache_dir_for(workbook_path)
+    return {
+        sheet: pd.read_parquet(cache_dir / f"{sheet}.parquet")
+        for sheet in manifest["sheets"]
+    }
+
+
+def write_cache(workbook_path, sheets):
+    workbook_path = Path(workbook_path)
+    cache_dir = cache_dir_for(workbook_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    key = workbook_key(workbook_path)
+
+    for sheet, df in sheets.items():
+        tmp_path = cache_dir / f"{sheet}.parquet.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, cache_dir / f"{sheet}.parquet")
+
+    # Manifest goes last so readers never see a key for half-written sheets
+    write_manifest(cache_dir, {
+        "version": CACHE_VERSION,
+        "workbook": str(workbook_path),
+        "key": key,
+        "sheets": list(sheets),
+        "created_at": time.time(),
+    })
+
+
+def load_sheets(workbook_path, reader):
+    """Read typed sheets from the columnar cache, parsing the workbook on a miss."""
+    if not cache_available():
+        return reader(workbook_path)
+
+    status, manifest = cache_status(workbook_path)
+    if status == "fresh":
+        return read_cache(workbook_path, manifest)
+
+    import pyarrow as pa
+
+    sheets = reader(workbook_path)
+    try:
+        write_cache(workbook_path, sheets)
+    except (OSError, pa.ArrowException) as exc:
+        # Read-only deployments and columns Arrow can't type (mixed objects)
+        # still load; they just re-parse on cold start
+        logger.warning("Ingest cache not written for %s: %s", workbook_path, exc)
+    return sheets
+
+
+# ==================== CLI ====================
+def main(argv=None):
+    from data.data_loader import WORKBOOK_PATH, read_workbook
+
+    parser = argparse.ArgumentParser(
+        prog="python -m data.ingest_cache",
+        description="Pre-build or check the columnar cache behind load_data().",
+    )
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--workbook", type=Path, default=WORKBOOK_PATH)
+    parser.add_argument(
+        "--force", action="store_true", help="rebuild even if the cache is fresh"
+    )
+    args = parser.parse_args(argv)
+
+    if not cache_available():
+        print("pyarrow is not installed; the ingest cache is disabled.")
+        return 2
+
+    status, manifest = cache_status(args.workbook)
+
+    if args.command == "check":
+        print(f"{args.workbook.name}: {status} ({cache_dir_for(args.workbook)})")
+        if manifest is not None and status == "fresh":
+            print(f"  sheets: {', '.join(manifest['sheets'])}")
+        return 0 if status == "fresh" else 1
+
+    if status == "fresh" and not args.force:
+        print(f"{args.workbook.name}: cache already fresh")
+        return 0
+
+    started = time.perf_counter()
+    sheets = read_workbook(args.workbook)
+    write_cache(args.workbook, sheets)
+    elapsed = time.perf_counter() - started
+    print(f"{args.workbook.name}: cached {len(sheets)} sheets in {elapsed:.2f}s")
+    for sheet, df in sheets.items():
+        print(f"  {sheet}: {len(df):,} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
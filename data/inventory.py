@@ -0,0 +1,152 @@
+from dataclasses import replace
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from data.metrics import safe_rate, status_flag
+from data.star_schema import lookup
+
+# Sailing inventory: one row per sailing (cruise_key, departure day), built
+# once at load. Occupancy is seats sold over the capacity of the sailings
+# that actually departed, so a cruise sailing twice a week isn't compared
+# against a single ship's worth of seats.
+
+# ==================== CONFIG ====================
+SAILING_INDEX = ["cruise_key", "departure"]
+SAILING_MEASURES = ["seats_booked", "total_booking_value"]
+LOW_LOAD_PCT = 50.0
+
+
+# ==================== BUILD ====================
+def has_inventory(bookings, dim_cruises):
+    """Whether the dataset has what a sailing inventory needs."""
+    return (
+        bookings is not None
+        and {"cruise_date", "seats_booked", "total_booking_value"} <= set(bookings.columns)
+        and dim_cruises is not None
+        and "total_seats" in dim_cruises.columns
+    )
+
+
+def sailing_rows(bookings):
+    """Bookings summed per departure day, cruise, route and status.
+
+    The DuckDB and SQL backends return the same layout from a GROUP BY.
+    """
+    dims = [c for c in ("cruise_key", "route_key", "booking_status") if c in bookings.columns]
+    measures = [m for m in SAILING_MEASURES if m in bookings.columns]
+
+    rows = bookings[dims + measures].assign(
+        departure=bookings["cruise_date"].dt.floor("D"),
+        bookings=1,
+    )
+    return (
+        rows
+        .groupby(["departure"] + dims, as_index=False, observed=True, dropna=False)
+        [measures + ["bookings"]]
+        .sum()
+    )
+
+
+def build_sailings(rows, dim_cruises):
+    """The inventory table, indexed and sorted by (cruise_key, departure).
+
+    Seats sold leave out cancelled bookings; revenue is the booked value of
+    every booking, like everywhere else in the dashboard.
+    """
+    rows = rows.dropna(subset=["departure"])
+    rows = rows[rows["cruise_key"] >= 0]
+
+    cancelled = (
+        status_flag(rows["booking_status"], "Cancelled").astype(bool)
+        if "booking_status" in rows.columns
+        else np.zeros(len(rows), dtype=bool)
+    )
+    # Schema dtypes are narrow (int16 seats, int32 values); sums need int64
+    seats = rows["seats_booked"].to_numpy().astype(np.int64)
+    rows = rows.assign(
+        seats_sold=np.where(cancelled, 0, seats),
+        cancelled_seats=np.where(cancelled, seats, 0),
+        cancellations=np.where(cancelled, rows["bookings"].to_numpy(), 0),
+        total_booking_value=rows["total_booking_value"].astype(
+            np.result_type(rows["total_booking_value"].dtype, np.int64)
+        ),
+    )
+
+    agg = {
+        "bookings": ("bookings", "sum"),
+        "seats_sold": ("seats_sold", "sum"),
+        "cancelled_seats": ("cancelled_seats", "sum"),
+        "cancellations": ("cancellations", "sum"),
+        "revenue": ("total_booking_value", "sum"),
+    }
+    if "route_key" in rows.columns:
+        agg["route_key"] = ("route_key", "max")
+
+    sailings = rows.groupby(SAILING_INDEX, sort=True).agg(**agg)
+
+    keys = sailings.index.get_level_values("cruise_key").to_numpy()
+    sailings["capacity"] = lookup(dim_cruises, "total_seats", keys)
+    sailings["occupancy"] = safe_rate(sailings["seats_sold"], sailings["capacity"])
+    return sailings
+
+
+# ==================== LOOKUPS ====================
+def sailing_window(sailings, state):
+    """Sailings departing in [state.start, state.end) on the selected cruises/routes."""
+    mask = np.ones(len(sailings), dtype=bool)
+    departures = sailings.index.get_level_values("departure")
+    if state.start is not None:
+        mask &= departures >= pd.Timestamp(state.start)
+    if state.end is not None:
+        mask &= departures < pd.Timestamp(state.end)
+    if state.cruises:
+        mask &= np.isin(sailings.index.get_level_values("cruise_key"), state.cruises)
+    if state.routes and "route_key" in sailings.columns:
+        mask &= np.isin(sailings["route_key"].to_numpy(), state.routes)
+    return sailings[mask]
+
+
+def departure_window(state, last_day):
+    """The selection with an open end closed at the end of last_day.
+
+    Date presets run up to the latest booking; sailings after that haven't
+    departed yet and would read as half-empty.
+    """
+    if state.end is not None or last_day is None:
+        return state
+    return replace(state, end=pd.Timestamp(last_day).normalize() + timedelta(days=1))
+
+
+def occupancy(sailings):
+    capacity = sailings["capacity"].sum()
+    seats = sailings["seats_sold"].sum()
+    return {
+        "sailings": len(sailings),
+        "capacity": capacity,
+        "seats_sold": seats,
+        "occupancy": seats / capacity * 100 if capacity else 0.0,
+    }
+
+
+def occupancy_compare(sailings, state, last_day):
+    """Occupancy of the window and of the equally long window before it.
+
+    The previous window is None when the selection has no start, as in
+    KpiEngine.compare.
+    """
+    state = departure_window(state, last_day)
+    current = occupancy(sailing_window(sailings, state))
+    if state.start is None or state.end is None:
+        return current, None
+
+    start, end = pd.Timestamp(state.start), pd.Timestamp(state.end)
+    before = replace(state, start=start - (end - start), end=start)
+    return current, occupancy(sailing_window(sailings, before))
+
+
+def low_load_sailings(sailings, state, last_day=None, threshold=LOW_LOAD_PCT):
+    """Sailings in the window that departed below threshold % occupancy."""
+    window = sailing_window(sailings, departure_window(state, last_day))
+    return window[window["occupancy"] < threshold]
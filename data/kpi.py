@@ -0,0 +1,164 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from data.rollup import cube_window
+
+# KPI name -> cube measure
+KPI_MEASURES = {
+    "revenue": "total_booking_value",
+    "bookings": "bookings",
+    "cancellations": "cancellations",
+    "seats_booked": "seats_booked",
+}
+
+# FilterState field -> cube key column that gets its own prefix arrays
+KEYED_FILTERS = {
+    "routes": "route_key",
+    "cruises": "cruise_key",
+}
+
+
+class KpiEngine:
+    """Cumulative per-day KPI arrays over a dense calendar.
+
+    A window's KPI is prefix[hi] - prefix[lo], so any date range costs two
+    lookups per metric. Per-route and per-cruise arrays (days x keys) are
+    built the first time a route or cruise filter is used. Filters the
+    arrays don't cover (partners, route and cruise together) fall back to
+    the daily cube.
+    """
+
+    def __init__(self, cube):
+        self.cube = cube
+        self._prefix = {}
+
+        days = cube["day"].to_numpy().astype("datetime64[D]")
+        if len(days):
+            self.first_day = days.min()
+            self.n_days = int((days.max() - self.first_day).astype(np.int64)) + 1
+        else:
+            self.first_day = np.datetime64("1970-01-01", "D")
+            self.n_days = 0
+
+        self._day_index = (days - self.first_day).astype(np.int64)
+        self._prefix[None] = self._build(None)
+
+    # ---------- Prefix arrays ----------
+    def _daily(self, measure, bins, index):
+        values = self.cube[measure].to_numpy()
+        daily = np.bincount(index, weights=values, minlength=bins)
+        if np.issubdtype(values.dtype, np.integer):
+            daily = daily.astype(np.int64)
+        return daily
+
+    def _build(self, key_col):
+        measures = {k: m for k, m in KPI_MEASURES.items() if m in self.cube.columns}
+
+        if key_col is None:
+            return {
+                name: np.concatenate([
+                    [0], np.cumsum(self._daily(measure, self.n_days, self._day_index))
+                ])
+                for name, measure in measures.items()
+            }
+
+        keys = self.cube[key_col].to_numpy()
+        width = int(keys.max()) + 1 if len(keys) else 0
+        valid = keys >= 0
+        flat = self._day_index[valid] * width + keys[valid]
+
+        prefix = {}
+        for name, measure in measures.items():
+            values = self.cube[measure].to_numpy()[valid]
+            daily = np.bincount(flat, weights=values, minlength=self.n_days * width)
+            if np.issubdtype(values.dtype, np.integer):
+                daily = daily.astype(np.int64)
+            daily = daily.reshape(self.n_days, width)
+            prefix[name] = np.vstack([
+                np.zeros((1, width), dtype=daily.dtype), daily.cumsum(axis=0)
+            ])
+        return prefix
+
+    def _prefix_for(self, key_col):
+        if key_col not in self._prefix:
+            self._prefix[key_col] = self._build(key_col)
+        return self._prefix[key_col]
+
+    # ---------- Windows ----------
+    def bounds(self, start=None, end=None):
+        lo, hi = 0, self.n_days
+        if start is not None:
+            day = pd.Timestamp(start).floor("D").to_datetime64().astype("datetime64[D]")
+            lo = int((day - self.first_day).astype(np.int64))
+        if end is not None:
+            day = pd.Timestamp(end).ceil("D").to_datetime64().astype("datetime64[D]")
+            hi = int((day - self.first_day).astype(np.int64))
+        lo = min(max(lo, 0), self.n_days)
+        hi = min(max(hi, lo), self.n_days)
+        return lo, hi
+
+    def _day_to_timestamp(self, index):
+        return pd.Timestamp(self.first_day + np.timedelta64(index, "D"))
+
+    def window_at(self, lo, hi, state):
+        active = [f for f in KEYED_FILTERS if getattr(state, f)]
+
+        if state.partners or len(active) > 1:
+            shifted = replace(
+                state, start=self._day_to_timestamp(lo), end=self._day_to_timestamp(hi)
+            )
+            window = cube_window(self.cube, shifted)
+            result = {
+                k: window[m].to_numpy().sum()
+                for k, m in KPI_MEASURES.items()
+                if m in window.columns
+            }
+        elif active:
+            prefix = self._prefix_for(KEYED_FILTERS[active[0]])
+            width = prefix["bookings"].shape[1]
+            keys = [k for k in getattr(state, active[0]) if 0 <= k < width]
+            result = {k: (p[hi, keys] - p[lo, keys]).sum() for k, p in prefix.items()}
+        else:
+            result = {k: p[hi] - p[lo] for k, p in self._prefix[None].items()}
+
+        bookings = result.get("bookings", 0)
+        result["cancellation_rate"] = (
+            result.get("cancellations", 0) / bookings * 100 if bookings else 0
+        )
+        result["days"] = hi - lo
+        return result
+
+    def window(self, state):
+        return self.window_at(*self.bounds(state.start, state.end), state)
+
+    def compare(self, state):
+        """KPIs for the window and for the equally long window right before it.
+
+        The previous window is None when there isn't a full window of
+        history before the selection (e.g. "All Time"), since a shorter one
+        would make the change meaningless.
+        """
+        lo, hi = self.bounds(state.start, state.end)
+        current = self.window_at(lo, hi, state)
+
+        length = hi - lo
+        if lo < length or length == 0:
+            return current, None
+        return current, self.window_at(lo - length, lo, state)
+
+
+def kpi_delta(current, previous, key, kind="percent"):
+    """Format a period-over-period delta for st.metric."""
+    if previous is None:
+        return None
+
+    before, now = previous[key], current[key]
+    if kind == "points":
+        return f"{now - before:+.1f} pp"
+    if kind == "count":
+        return f"{int(now - before):+,}"
+    if not before:
+        return None
+    return f"{(now - before) / before * 100:+.1f}%"
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import pandas as pd
+
+from data.filters import normalize_filters
+from data import result_store
+
+# Every memoized function registers its cache here so stats can be shown
+CACHES = {}
+
+
+class LruCache:
+    """Bounded LRU map with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, name, max_entries=128, ttl=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                self.evictions += 1
+
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def drop(self, predicate):
+        """Remove every entry whose key matches predicate; returns how many."""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            self.evictions += len(stale)
+            return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate %": self.hits / lookups * 100 if lookups else 0.0,
+            }
+
+
+def _detached(value):
+    # Callers may add columns to what they get back; never let that reach the cache
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {k: _detached(v) for k, v in value.items()}
+    return value
+
+
+def memoized(max_entries=128, ttl=15 * 60):
+    """Memoize fn(data, filters, *args) on (data fingerprint, normalized filters, args).
+
+    A miss is served from the precomputed result store when it holds this
+    exact call for the same dataset, and only computed live otherwise.
+    """
+
+    def decorator(fn):
+        cache = LruCache(fn.__name__, max_entries=max_entries, ttl=ttl)
+        CACHES[fn.__name__] = cache
+
+        @wraps(fn)
+        def wrapper(data, filters, *args):
+            key = (data.get("fingerprint"), normalize_filters(filters), args)
+
+            hit, value = cache.get(key)
+            if not hit:
+                stored, value = result_store.lookup(key[0], fn.__name__, filters, args)
+                if not stored:
+                    value = fn(data, filters, *args)
+                cache.put(key, value)
+
+            return _detached(value)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats():
+    return pd.DataFrame([cache.stats() for cache in CACHES.values()])
+
+
+def clear_caches():
+    for cache in CACHES.values():
+        cache.clear()
+
+
+def retain_fingerprint(fingerprint):
+    """Drop memoized results computed for any other dataset version."""
+    return sum(cache.drop(lambda key: key[0] != fingerprint) for cache in CACHES.values())
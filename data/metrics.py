@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized building blocks for page metrics. Everything here works on
+# whole columns at once; nothing calls back into Python per row or group.
+
+
+# ==================== COUNTS ====================
+def status_flag(values, status):
+    """1 where values == status, else 0 (int8, ready to be summed)."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Compare codes instead of strings
+        if status not in values.cat.categories:
+            return np.zeros(len(values), dtype=np.int8)
+        code = values.cat.categories.get_loc(status)
+        return (values.cat.codes.to_numpy() == code).astype(np.int8)
+    return (values.to_numpy() == status).astype(np.int8)
+
+
+def status_counts(frame, by, column, status, name=None):
+    """Per-group count of rows whose column equals status."""
+    name = name or status
+    flags = pd.Series(status_flag(frame[column], status), index=frame.index, name=name)
+    return flags.groupby([frame[b] for b in np.atleast_1d(by)], observed=True).sum()
+
+
+# ==================== RATES ====================
+def safe_rate(numerator, denominator, scale=100.0):
+    """numerator / denominator * scale, NaN where the denominator is 0."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out * scale
+
+
+# ==================== LABELS ====================
+def _labels(codes, labels):
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def threshold_label(values, threshold, above, below, inclusive=True):
+    """Two-way label: `above` when values >= threshold (> if not inclusive)."""
+    values = np.asarray(values)
+    hit = values >= threshold if inclusive else values > threshold
+    return _labels(np.where(hit, 0, 1), [above, below])
+
+
+def select_label(conditions, choices, default):
+    """np.select over boolean masks, returned as a categorical."""
+    labels = list(dict.fromkeys([*choices, default]))
+    codes = np.select(
+        conditions, [labels.index(c) for c in choices], default=labels.index(default)
+    )
+    return _labels(codes, labels)
+
+
+def bucket_label(values, edges, labels, right=False):
+    """Bin values into labelled ranges with pd.cut (edges are bin boundaries)."""
+    return pd.cut(values, bins=edges, labels=labels, right=right)
+
+
+# ==================== COMPOSITE RULES ====================
+def risk_category(cancellation_rate, revenue):
+    """High Risk when cancellations are above median and revenue below median."""
+    cancellation_rate = np.asarray(cancellation_rate, dtype=np.float64)
+    revenue = np.asarray(revenue, dtype=np.float64)
+    if not len(revenue):
+        return select_label([np.zeros(0, dtype=bool)], ["High Risk"], "Stable")
+
+    high = (cancellation_rate > np.nanmedian(cancellation_rate)) & (
+        revenue < np.nanmedian(revenue)
+    )
+    return select_label([high], ["High Risk"], "Stable")
+
+
+def customer_type(bookings):
+    return threshold_label(bookings, 1, "Repeat Customer", "New Customer", inclusive=False)
+
+
+def lead_time_behavior(lead_time_days, threshold=15):
+    return threshold_label(
+        lead_time_days,
+        threshold,
+        f"Early Booking ({threshold}+ days)",
+        f"Last-Minute Booking (<{threshold} days)",
+    )
@@ -0,0 +1,193 @@
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from data import result_store
+from data.aggregations import (
+    booking_insights,
+    cruise_performance,
+    customer_performance,
+    discount_by_cruise,
+    discount_column,
+    low_load_sailing_table,
+    partner_column,
+    partner_performance,
+    pricing_performance,
+    revenue_by_route,
+    revenue_trend,
+)
+from data.filters import DATE_PRESETS, FilterState, preset_range
+
+# Page -> aggregations it renders, each with a function that picks the
+# extra arguments (or None when the dataset can't feed it)
+PAGE_TABLES = {
+    "1_Executive_Overview": [
+        (revenue_trend, lambda data: ()),
+    ],
+    "2_Booking_Insights": [
+        (booking_insights, lambda data: () if data["customers"] is not None else None),
+    ],
+    "3_Route_Performance": [
+        (revenue_by_route, lambda data: ()),
+        (cruise_performance, lambda data: ()),
+        (low_load_sailing_table, lambda data: () if data["sailings"] is not None else None),
+    ],
+    "4_Pricing_&_Revenue_Leakage": [
+        (pricing_performance, lambda data: ()),
+        (discount_by_cruise, lambda data: _optional(discount_column(data["cube"]))),
+    ],
+    "5_Partner_Performance": [
+        (partner_performance, lambda data: _optional(partner_column(data["bookings"]))),
+    ],
+    "6_Customer_Behavior_&_Loyalty": [
+        (customer_performance,
+         lambda data: () if "customer_id" in data["bookings"].columns else None),
+    ],
+}
+
+# Set before the pool starts; forked workers inherit it instead of reloading
+_DATA = None
+
+
+def _optional(column):
+    return (column,) if column else None
+
+
+def preset_filters(bookings, preset):
+    start, end = preset_range(bookings, preset)
+    return FilterState(start=start, end=end)
+
+
+# ==================== WORKERS ====================
+def _init_worker(workbook_path):
+    global _DATA
+    if _DATA is None:
+        from data.data_loader import build_dataset
+
+        _DATA = build_dataset(workbook_path)
+
+
+def _run_job(staging, presets, pages):
+    """Compute and write every (page table, preset) pair of one job."""
+    entries = {}
+    for preset in presets:
+        filters = preset_filters(_DATA["bookings"], preset)
+        for page in pages:
+            for fn, pick_args in PAGE_TABLES[page]:
+                args = pick_args(_DATA)
+                if args is None:
+                    continue
+                # __wrapped__ skips the memo layer and any older store
+                value = fn.__wrapped__(_DATA, filters, *args)
+                key = result_store.result_key(fn.__name__, filters, args)
+                entry = result_store.write_result(Path(staging), key, value)
+                entries[key] = {
+                    **entry, "name": fn.__name__, "page": page, "preset": preset
+                }
+    return entries
+
+
+def jobs_for(presets, pages, split):
+    if split == "page":
+        return [(presets, [page]) for page in pages]
+    return [([preset], pages) for preset in presets]
+
+
+# ==================== DRIVER ====================
+def precompute(data, workbook_path, presets=None, pages=None, workers=None, split="preset"):
+    """Materialize page tables for every preset into the result store.
+
+    Returns (entries written, store directory).
+    """
+    global _DATA
+    presets = list(presets or DATE_PRESETS)
+    pages = list(pages or PAGE_TABLES)
+    fingerprint = data["fingerprint"]
+
+    staging = result_store.staging_dir(fingerprint)
+    jobs = jobs_for(presets, pages, split)
+
+    # fork shares the loaded dataset with workers; spawn reloads it per worker
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    _DATA = data if context.get_start_method() == "fork" else None
+
+    entries = {}
+    with ProcessPoolExecutor(
+        max_workers=min(workers or len(jobs), len(jobs)),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(str(workbook_path),),
+    ) as pool:
+        futures = [pool.submit(_run_job, str(staging), *job) for job in jobs]
+        for future in as_completed(futures):
+            entries.update(future.result())
+
+    result_store.publish(fingerprint, staging, entries, {
+        "workbook": str(workbook_path),
+        "presets": presets,
+        "pages": pages,
+    })
+    return entries, result_store.store_dir(fingerprint)
+
+
+def main(argv=None):
+    from data.data_loader import WORKBOOK_PATH, build_dataset
+
+    parser = argparse.ArgumentParser(
+        prog="python -m data.precompute",
+        description="Precompute every page's tables for every date preset.",
+    )
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--workbook", type=Path, default=WORKBOOK_PATH)
+    parser.add_argument("--workers", type=int, help="process pool size (default: one per job)")
+    parser.add_argument(
+        "--split", choices=["preset", "page"], default="preset",
+        help="one job per preset (all pages) or per page (all presets)",
+    )
+    parser.add_argument("--page", action="append", choices=list(PAGE_TABLES), dest="pages")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the store is fresh")
+    parser.add_argument(
+        "--keep-old", action="store_true", help="don't delete stores of older datasets"
+    )
+    args = parser.parse_args(argv)
+
+    if not result_store.cache_available():
+        print("pyarrow is not installed; the result store is disabled.")
+        return 2
+
+    started = time.perf_counter()
+    data = build_dataset(args.workbook)
+    status, manifest = result_store.store_status(data["fingerprint"])
+
+    if args.command == "check":
+        print(f"{args.workbook.name}: result store {status}")
+        if manifest is not None:
+            print(f"  {len(manifest['entries'])} tables, presets: {', '.join(manifest['presets'])}")
+        return 0 if status == "fresh" else 1
+
+    if status == "fresh" and not args.force:
+        print(f"{args.workbook.name}: result store already fresh")
+        return 0
+
+    loaded = time.perf_counter()
+    entries, folder = precompute(
+        data, args.workbook, pages=args.pages, workers=args.workers, split=args.split
+    )
+    done = time.perf_counter()
+
+    if not args.keep_old:
+        result_store.prune(data["fingerprint"])
+
+    print(
+        f"{args.workbook.name}: {len(entries)} tables in {done - loaded:.2f}s "
+        f"(load {loaded - started:.2f}s) -> {folder}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from data.filters import normalize_filters
+from data.ingest_cache import CACHE_ROOT, cache_available
+
+# ==================== CONFIG ====================
+# Precomputed page tables, one directory per dataset fingerprint. Bump
+# RESULT_VERSION whenever an aggregation's output changes shape.
+RESULT_VERSION = 2
+RESULT_ROOT = CACHE_ROOT / "results"
+MANIFEST_NAME = "manifest.json"
+
+_manifests = {}
+_lock = threading.Lock()
+
+
+def store_dir(fingerprint):
+    return RESULT_ROOT / hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+
+def result_key(name, filters, args=()):
+    token = repr((name, normalize_filters(filters), tuple(args)))
+    return hashlib.sha1(token.encode("utf-8")).hexdigest()[:20]
+
+
+# ==================== READ ====================
+def _manifest(fingerprint):
+    """The store manifest for a fingerprint, re-read only when the file changes."""
+    path = store_dir(fingerprint) / MANIFEST_NAME
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+    with _lock:
+        cached = _manifests.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    try:
+        with open(path, encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != RESULT_VERSION or manifest.get("fingerprint") != fingerprint:
+        manifest = None
+
+    with _lock:
+        _manifests[path] = (mtime, manifest)
+    return manifest
+
+
+def store_status(fingerprint):
+    manifest = _manifest(fingerprint)
+    return ("fresh" if manifest else "missing"), manifest
+
+
+def lookup(fingerprint, name, filters, args=()):
+    """(True, value) when the store holds this result for the dataset, else (False, None)."""
+    if fingerprint is None or not cache_available():
+        return False, None
+
+    manifest = _manifest(fingerprint)
+    if manifest is None:
+        return False, None
+
+    entry = manifest["entries"].get(result_key(name, filters, args))
+    if entry is None:
+        return False, None
+
+    folder = store_dir(fingerprint)
+    try:
+        if entry["parts"] is None:
+            return True, pd.read_parquet(folder / f"{entry['file']}.parquet")
+        return True, {
+            part: pd.read_parquet(folder / f"{entry['file']}.{part}.parquet")
+            for part in entry["parts"]
+        }
+    except OSError:
+        return False, None
+
+
+# ==================== WRITE ====================
+def write_result(folder, key, value):
+    """Write one result (a DataFrame or a dict of them); returns its manifest entry."""
+    if isinstance(value, dict):
+        for part, frame in value.items():
+            frame.to_parquet(folder / f"{key}.{part}.parquet", index=False)
+        return {"file": key, "parts": list(value)}
+
+    value.to_parquet(folder / f"{key}.parquet", index=False)
+    return {"file": key, "parts": None}
+
+
+def staging_dir(fingerprint):
+    folder = store_dir(fingerprint).with_name(f"{store_dir(fingerprint).name}.{os.getpid()}.tmp")
+    shutil.rmtree(folder, ignore_errors=True)
+    folder.mkdir(parents=True)
+    return folder
+
+
+def publish(fingerprint, staging, entries, meta=None):
+    """Swap a fully written staging directory in as the store for fingerprint."""
+    with open(staging / MANIFEST_NAME, "w", encoding="utf-8") as fh:
+        json.dump({
+            "version": RESULT_VERSION,
+            "fingerprint": fingerprint,
+            "created_at": time.time(),
+            **(meta or {}),
+            "entries": entries,
+        }, fh, indent=2)
+
+    target = store_dir(fingerprint)
+    old = target.with_name(f"{target.name}.{os.getpid()}.old")
+    if target.exists():
+        os.replace(target, old)
+    os.replace(staging, target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def prune(keep_fingerprint):
+    """Remove stores (and leftover staging dirs) for any other fingerprint."""
+    keep = store_dir(keep_fingerprint).name
+    removed = 0
+    if RESULT_ROOT.exists():
+        for folder in RESULT_ROOT.iterdir():
+            if folder.is_dir() and folder.name != keep:
+                shutil.rmtree(folder, ignore_errors=True)
+                removed += 1
+    return removed
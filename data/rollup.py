@@ -0,0 +1,69 @@
+from dataclasses import replace
+
+import pandas as pd
+
+from data.filters import apply_filters
+
+# ==================== CUBE LAYOUT ====================
+CUBE_DIMENSIONS = ["day", "cruise_key", "route_key", "partner_key", "booking_status"]
+CUBE_MEASURES = [
+    "total_booking_value",
+    "seats_booked",
+    "discount_amount",
+    "discount_percent",
+    "discount_value",
+]
+
+
+def _cube_rows(bookings):
+    dims = [d for d in CUBE_DIMENSIONS[1:] if d in bookings.columns]
+    measures = [m for m in CUBE_MEASURES if m in bookings.columns]
+
+    rows = bookings[dims + measures].assign(
+        day=bookings["booking_date"].dt.floor("D"),
+        bookings=1,
+    )
+    if "booking_status" in bookings.columns:
+        rows["cancellations"] = (bookings["booking_status"] == "Cancelled").astype("int64")
+
+    return rows, ["day"] + dims
+
+
+def _aggregate(rows, dims):
+    measures = [c for c in rows.columns if c not in dims]
+    return (
+        rows
+        .groupby(dims, as_index=False, observed=True, sort=True, dropna=False)[measures]
+        .sum()
+    )
+
+
+# ==================== BUILD ====================
+def build_cube(bookings):
+    """Daily rollup of bookings by cruise, route, partner and status.
+
+    Measures are the summed amounts plus booking and cancellation counts.
+    Rows are sorted by day, so the shared date filters slice it like the
+    bookings table.
+    """
+    rows, dims = _cube_rows(bookings)
+    # Undated bookings have no day to roll up into
+    return _aggregate(rows[rows["day"].notna()], dims)
+
+
+# ==================== QUERIES ====================
+def cube_window(cube, state):
+    """Cube rows inside a FilterState's dates and route/cruise/partner keys."""
+    if state.start is not None:
+        state = replace(state, start=pd.Timestamp(state.start).floor("D"))
+    return apply_filters(cube, state, date_column="day")
+
+
+def rollup(cube, by, measures=None):
+    measures = measures or [c for c in cube.columns if c not in CUBE_DIMENSIONS]
+    return cube.groupby(by, as_index=False, observed=True)[measures].sum()
+
+
+def totals(cube):
+    measures = [c for c in cube.columns if c not in CUBE_DIMENSIONS]
+    return {m: cube[m].to_numpy().sum() for m in measures}
@@ -0,0 +1,148 @@
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==================== DECLARED SCHEMA ====================
+# Low-cardinality text -> category, counts and amounts -> the narrowest
+# integer that fits. Integer casts only happen when the column is whole and
+# in range, so fractional amounts or larger exports keep their wider dtype.
+# Columns not listed here are left exactly as read.
+SHEET_SCHEMAS = {
+    "Bookings": {
+        "booking_id": "int32",
+        "booking_date": "datetime",
+        "cruise_date": "datetime",
+        "cruise_id": "category",
+        "route_id": "category",
+        "partner_id": "category",
+        "partner_name": "category",
+        "seats_booked": "int16",
+        "total_booking_value": "int32",
+        "booking_status": "category",
+        "discount_amount": "int32",
+        "booking_channel": "category",
+        "device_type": "category",
+        "customer_id": "int32",
+    },
+    "Cruises_Master": {
+        "cruise_type": "category",
+        "total_seats": "int16",
+        "duration_nights": "int16",
+    },
+    "Cruises_Updated": {
+        "cruise_type": "category",
+        "total_seats": "int16",
+        "duration_nights": "int16",
+    },
+    "Routes_Master": {
+        "seasonality_tag": "category",
+    },
+    "Routes_Updated": {
+        "origin": "category",
+        "destination": "category",
+        "seasonality_tag": "category",
+    },
+    "Partners_Master": {
+        "partner_type": "category",
+    },
+    "Customers": {
+        "customer_id": "int32",
+        "first_booking_date": "datetime",
+        "country": "category",
+        "city": "category",
+        "customer_type": "category",
+    },
+    "Cancellations": {
+        "booking_id": "int32",
+        "cancellation_date": "datetime",
+        "cancellation_reason": "category",
+        "refund_amount": "int32",
+    },
+}
+
+
+def date_columns(sheet_name):
+    return [
+        col for col, dtype in SHEET_SCHEMAS.get(sheet_name, {}).items()
+        if dtype == "datetime"
+    ]
+
+
+# ==================== ENFORCEMENT ====================
+def _fits_integer(series, dtype):
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return False
+
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    if len(values) == 0:
+        return True
+    if np.isnan(values).any() or not np.all(values == np.floor(values)):
+        return False
+
+    info = np.iinfo(dtype)
+    return info.min <= values.min() and values.max() <= info.max
+
+
+def coerce_column(series, dtype):
+    if dtype == "datetime":
+        return pd.to_datetime(series)
+
+    if dtype == "category":
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        return series.astype("category")
+
+    if _fits_integer(series, dtype):
+        return series.astype(dtype)
+
+    logger.debug("Keeping %s as %s (does not fit %s)", series.name, series.dtype, dtype)
+    return series
+
+
+def apply_schema(df, sheet_name):
+    schema = SHEET_SCHEMAS.get(sheet_name, {})
+
+    for col, dtype in schema.items():
+        if col in df.columns:
+            df[col] = coerce_column(df[col], dtype)
+
+    return df
+
+
+# ==================== MEMORY REPORT ====================
+def memory_report(before, after):
+    """Per-sheet deep memory footprint before and after the schema is applied."""
+    rows = []
+    for sheet_name, df in after.items():
+        raw = before.get(sheet_name)
+        before_bytes = int(raw.memory_usage(deep=True).sum()) if raw is not None else 0
+        after_bytes = int(df.memory_usage(deep=True).sum())
+
+        rows.append({
+            "Sheet": sheet_name,
+            "Rows": len(df),
+            "Before (KB)": before_bytes / 1024,
+            "After (KB)": after_bytes / 1024,
+            "Saved %": (1 - after_bytes / before_bytes) * 100 if before_bytes else 0.0,
+        })
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    from data.data_loader import WORKBOOK_PATH, read_workbook
+
+    typed = read_workbook(WORKBOOK_PATH)
+    raw = read_workbook(WORKBOOK_PATH, enforce_schema=False)
+
+    report = memory_report(raw, typed)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:,.1f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.metrics import customer_type
+
+# Per-day customer sketches for page 6 on very large booking tables.
+# Each structure is kept per booking day and merges cheaply, so any date
+# window is answered without grouping every booking by customer:
+#
+#   HyperLogLog   distinct customers (register-wise max over the days)
+#   bottom-k      a uniform sample of customers by hash, with their exact
+#                 bookings and revenue for the window: repeat share,
+#                 booking frequency and revenue-concentration quantiles
+#   heavy hitters per-day rows of the all-time highest-revenue customers;
+#                 a window's top list from them is exact whenever its k-th
+#                 revenue beats every customer left out of the set
+
+# ==================== CONFIG ====================
+# "auto" builds sketches only for tables above SKETCH_MIN_BOOKINGS rows
+CUSTOMER_SKETCHES = os.environ.get("ICRUISE_CUSTOMER_SKETCHES", "auto")
+SKETCH_MIN_BOOKINGS = 1_000_000
+# Windows with at most this many bookings are always computed exactly
+SKETCH_EXACT_BOOKINGS = int(os.environ.get("ICRUISE_SKETCH_EXACT_BOOKINGS", 250_000))
+
+HLL_PRECISION = 12  # 4,096 registers per day, ~1.6% standard error
+SAMPLE_SIZE = 2048  # bottom-k customers per day and per window
+HEAVY_HITTERS = 5000  # all-time top customers tracked for the high-value list
+
+
+def sketches_enabled(n_bookings):
+    if CUSTOMER_SKETCHES == "auto":
+        return n_bookings > SKETCH_MIN_BOOKINGS
+    return CUSTOMER_SKETCHES == "1"
+
+
+def hash64(values):
+    return pd.util.hash_array(np.asarray(values), categorize=False)
+
+
+# ==================== HYPERLOGLOG ====================
+def hll_ranks(hashes, precision=HLL_PRECISION):
+    """(register index, rank) of each hash: top bits pick the register,
+    rank is 1 + the leading zeros of the remaining bits."""
+    width = 64 - precision
+    index = (hashes >> np.uint64(width)).astype(np.int64)
+    rest = hashes & np.uint64((1 << width) - 1)
+
+    # rest < 2**52, so float64 holds it exactly and log2 gives its bit length
+    ranks = np.full(len(hashes), width + 1, dtype=np.uint8)
+    nonzero = rest > 0
+    bits = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+    ranks[nonzero] = (width - bits + 1).astype(np.uint8)
+    return index, ranks
+
+
+def hll_estimate(registers):
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * m and zeros:
+        # Small-range correction: linear counting
+        return m * np.log(m / zeros)
+    return raw
+
+
+# ==================== STORE ====================
+class CustomerSketches:
+    """Per-day sketches of bookings by customer, merged over a date window."""
+
+    def __init__(self, days, registers, sample, heavy, outside_max):
+        self.days = days  # sorted booking days (datetime64)
+        self.registers = registers  # (n_days, 2**precision) uint8
+        self.sample = sample  # day, hash, customer_id, bookings, revenue
+        self.heavy = heavy  # day, customer_id, bookings, revenue
+        self.outside_max = outside_max  # all-time revenue of the best customer not in `heavy`
+
+    @classmethod
+    def build(cls, bookings):
+        bookings = bookings.dropna(subset=["customer_id", "booking_date"])
+        day = bookings["booking_date"].dt.floor("D").to_numpy()
+        days, day_code = np.unique(day, return_inverse=True)
+
+        per_day = (
+            pd.DataFrame({
+                "day": day_code,
+                "customer_id": bookings["customer_id"].to_numpy(),
+                "revenue": bookings["total_booking_value"].to_numpy().astype(np.float64),
+            })
+            .groupby(["day", "customer_id"], sort=False)
+            .agg(bookings=("revenue", "size"), revenue=("revenue", "sum"))
+            .reset_index()
+        )
+        per_day["hash"] = hash64(per_day["customer_id"].to_numpy())
+
+        # ---------- HyperLogLog registers ----------
+        index, ranks = hll_ranks(per_day["hash"].to_numpy())
+        registers = np.zeros((len(days), 1 << HLL_PRECISION), dtype=np.uint8)
+        best = (
+            pd.DataFrame({"day": per_day["day"].to_numpy(), "index": index, "rank": ranks})
+            .groupby(["day", "index"], sort=False)["rank"].max()
+        )
+        registers[
+            best.index.get_level_values("day"), best.index.get_level_values("index")
+        ] = best.to_numpy()
+
+        # ---------- Bottom-k sample by hash ----------
+        by_hash = per_day.sort_values(["day", "hash"], kind="stable")
+        sample = by_hash[by_hash.groupby("day").cumcount() < SAMPLE_SIZE]
+
+        # ---------- Heavy hitters: the all-time top customers, per day ----------
+        totals = per_day.groupby("customer_id")["revenue"].sum()
+        ranked = totals.nlargest(HEAVY_HITTERS + 1)
+        outside_max = ranked.iloc[HEAVY_HITTERS] if len(ranked) > HEAVY_HITTERS else 0.0
+        heavy = per_day[per_day["customer_id"].isin(ranked.index[:HEAVY_HITTERS])]
+
+        return cls(
+            days,
+            registers,
+            sample[["day", "hash", "customer_id", "bookings", "revenue"]].reset_index(drop=True),
+            heavy[["day", "customer_id", "bookings", "revenue"]].reset_index(drop=True),
+            float(outside_max),
+        )
+
+    @property
+    def nbytes(self):
+        return (
+            self.registers.nbytes
+            + int(self.sample.memory_usage(deep=True).sum())
+            + int(self.heavy.memory_usage(deep=True).sum())
+        )
+
+    # ---------- Windows ----------
+    def day_bounds(self, start=None, end=None):
+        lo, hi = 0, len(self.days)
+        if start is not None:
+            lo = int(self.days.searchsorted(pd.Timestamp(start).to_datetime64(), "left"))
+        if end is not None:
+            hi = int(self.days.searchsorted(pd.Timestamp(end).to_datetime64(), "left"))
+        return lo, hi
+
+    @staticmethod
+    def _rows(frame, lo, hi):
+        days = frame["day"].to_numpy()
+        return frame.iloc[days.searchsorted(lo, "left"):days.searchsorted(hi, "left")]
+
+    def distinct(self, lo, hi):
+        if hi <= lo:
+            return 0.0
+        return float(hll_estimate(self.registers[lo:hi].max(axis=0)))
+
+    def customer_sample(self, lo, hi):
+        """Bottom-k customers of the window with their exact window totals.
+
+        A customer in the window's bottom k is in the bottom k of every day
+        it booked on, so summing its per-day rows gives exact totals.
+        """
+        rows = self._rows(self.sample, lo, hi)
+        merged = (
+            rows.groupby(["hash", "customer_id"], sort=True)
+            .agg(Bookings=("bookings", "sum"), Revenue=("revenue", "sum"))
+            .reset_index()
+        )
+        return merged.head(SAMPLE_SIZE).drop(columns="hash")
+
+    def top_customers(self, lo, hi, k=100):
+        """(top k customers of the window by revenue, whether the list is exact).
+
+        Customers outside the heavy-hitter set spent at most outside_max in
+        total, so once the k-th listed revenue reaches it nobody is missing.
+        """
+        top = (
+            self._rows(self.heavy, lo, hi)
+            .groupby("customer_id")
+            .agg(Bookings=("bookings", "sum"), Revenue=("revenue", "sum"))
+            .nlargest(k, "Revenue")
+            .reset_index()
+        )
+        exact = len(top) == k and top["Revenue"].iloc[-1] >= self.outside_max
+        top["Customer Type"] = customer_type(top["Bookings"])
+        return top, exact or self.outside_max == 0
+
+
+# ==================== PAGE SUMMARY ====================
+def summary_from_sketches(sketches, lo, hi, total_revenue):
+    """Page 6 figures for days [lo, hi), in the layout of the exact summary.
+
+    Counts are scaled up from the bottom-k sample to the HyperLogLog
+    distinct estimate; the top-20% split applies the sample's revenue
+    share to the window's exact total.
+    """
+    customers = sketches.distinct(lo, hi)
+    sample = sketches.customer_sample(lo, hi)
+    scale = customers / len(sample) if len(sample) else 0.0
+
+    def scaled_counts(column):
+        return (
+            sample.groupby(column, as_index=False, observed=True)
+            .agg(Customers=("customer_id", "size"))
+            .assign(Customers=lambda f: (f["Customers"] * scale).round().astype("int64"))
+        )
+
+    sample["Customer Type"] = customer_type(sample["Bookings"])
+    revenue = np.sort(sample["Revenue"].to_numpy())[::-1]
+    top_share = revenue[:int(len(revenue) * 0.2)].sum() / revenue.sum() if revenue.sum() else 0.0
+
+    top, top_exact = sketches.top_customers(lo, hi)
+    return {
+        "exact": False,
+        "top_exact": top_exact,
+        "customers": customers,
+        "types": scaled_counts("Customer Type"),
+        "frequency": scaled_counts("Bookings"),
+        "revenue_split": revenue_split(total_revenue * top_share, total_revenue * (1 - top_share)),
+        "top": top,
+    }
+
+
+def revenue_split(top, other):
+    return pd.DataFrame({
+        "Group": ["Top 20% Customers", "Other Customers"],
+        "Revenue": [top, other],
+    })
@@ -0,0 +1,579 @@
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from data.inventory import SAILING_MEASURES, build_sailings, has_inventory
+from data.kpi import KpiEngine
+from data.rollup import CUBE_DIMENSIONS, CUBE_MEASURES
+from data.schema import apply_schema
+from data.star_schema import DIMENSIONS, KEY_COLUMNS, build_dimension
+
+# Pluggable data sources. The workbook (data_loader.build_dataset) is the
+# default; the SQL source reads a relational database through a pooled
+# DB-API connection. Only the small master tables are fetched whole.
+# Everything sized like bookings is aggregated in the database with
+# parameterized, pushed-down filters.
+
+# ==================== CONFIG ====================
+SQL_URL = os.environ.get("ICRUISE_SQL_URL")  # e.g. sqlite:///data/icruise.db
+SQL_POOL_SIZE = int(os.environ.get("ICRUISE_SQL_POOL_SIZE", 4))
+
+# dataset -> table name; ICRUISE_SQL_TABLES="bookings=fact_bookings,..." overrides
+SQL_TABLES = {
+    "cruises": "cruises",
+    "routes": "routes",
+    "partners": "partners",
+    "customers": "customers",
+    "bookings": "bookings",
+    "cancellations": "cancellations",
+    "stops": "excursion_stops",
+}
+MASTER_DATASETS = ["cruises", "routes", "partners", "stops"]
+OUT_OF_CORE_DATASETS = ["bookings", "customers", "cancellations"]
+
+# Which sheet's declared schema applies to each table
+SCHEMA_SHEETS = {
+    "cruises": "Cruises_Master",
+    "routes": "Routes_Master",
+    "partners": "Partners_Master",
+    "customers": "Customers",
+    "bookings": "Bookings",
+    "cancellations": "Cancellations",
+}
+
+MS_PER_DAY = 86_400_000
+
+
+def sql_tables():
+    tables = dict(SQL_TABLES)
+    override = os.environ.get("ICRUISE_SQL_TABLES", "")
+    for item in filter(None, (part.strip() for part in override.split(","))):
+        dataset, _, table = item.partition("=")
+        tables[dataset.strip()] = table.strip()
+    return tables
+
+
+def _ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# ==================== CONNECTION POOL ====================
+class ConnectionPool:
+    """At most `size` DB-API connections, reused across queries and threads.
+
+    A connection that raises is closed instead of going back to the pool.
+    """
+
+    def __init__(self, connect, size=SQL_POOL_SIZE, timeout=30):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.timeout = timeout
+        self.opened = 0
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("no database connection became free in time")
+        con = None
+        try:
+            try:
+                con = self._idle.get_nowait()
+            except queue.Empty:
+                con = self._connect()
+                self.opened += 1
+            yield con
+        except Exception:
+            if con is not None:
+                con.close()
+                con = None
+            raise
+        finally:
+            if con is not None:
+                self._idle.put(con)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# ==================== DIALECTS ====================
+class SqliteDialect:
+    """Dates are ISO-8601 text with a space separator, as DataFrame.to_sql writes them."""
+
+    placeholder = "?"
+
+    def param(self, ts):
+        return pd.Timestamp(ts).to_pydatetime().isoformat(sep=" ")
+
+    def day(self, column):
+        return f"date({column})"
+
+    def month(self, column):
+        # year * 12 + month - 1, like cohorts.month_codes
+        return (
+            f"(CAST(strftime('%Y', {column}) AS INTEGER) * 12 "
+            f"+ CAST(strftime('%m', {column}) AS INTEGER) - 1)"
+        )
+
+    # Quoted identifiers still match case-insensitively in SQLite
+    table_exists = (
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ? COLLATE NOCASE"
+    )
+
+    def lead_days(self, start, end):
+        # Whole days, floored like pandas' Timedelta.days (integer maths only)
+        ms = f"CAST(round((julianday({end}) - julianday({start})) * {MS_PER_DAY}) AS INTEGER)"
+        return f"(({ms}) - ((({ms}) % {MS_PER_DAY}) + {MS_PER_DAY}) % {MS_PER_DAY}) / {MS_PER_DAY}"
+
+    def connect(self, url):
+        path = url.split("sqlite:///", 1)[1]
+        return lambda: sqlite3.connect(path, check_same_thread=False)
+
+
+class PostgresDialect:
+    placeholder = "%s"
+    # Tables and views on the search path, as an unqualified name resolves
+    table_exists = (
+        "SELECT 1 FROM information_schema.tables "
+        "WHERE table_name = ? AND table_schema = ANY(current_schemas(false))"
+    )
+
+    def param(self, ts):
+        return pd.Timestamp(ts).to_pydatetime()
+
+    def day(self, column):
+        return f"date_trunc('day', {column})"
+
+    def month(self, column):
+        return f"CAST(EXTRACT(YEAR FROM {column}) * 12 + EXTRACT(MONTH FROM {column}) - 1 AS INTEGER)"
+
+    def lead_days(self, start, end):
+        return f"CAST(floor(EXTRACT(EPOCH FROM ({end} - {start})) / 86400) AS BIGINT)"
+
+    def connect(self, url):
+        import psycopg2
+
+        return lambda: psycopg2.connect(url)
+
+
+DIALECTS = {"sqlite": SqliteDialect, "postgresql": PostgresDialect, "postgres": PostgresDialect}
+
+
+def dialect_for(url):
+    scheme = url.split(":", 1)[0].split("+", 1)[0]
+    if scheme not in DIALECTS:
+        raise ValueError(f"Unsupported SQL source: {scheme} (known: {', '.join(DIALECTS)})")
+    return DIALECTS[scheme]()
+
+
+# ==================== SQL BACKEND ====================
+# Pools live outside the backend, per (backend, process): the one backend in
+# the shared st.cache_resource dataset serves every session, and a copy in
+# another process opens its own
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class SqlBackend:
+    """Same query interface as DuckDbBackend, answered by a remote database.
+
+    Dimension keys never reach the database: filters are rewritten to the
+    raw IDs behind each key, and grouped rows are keyed after they arrive.
+    """
+
+    def __init__(self, url, tables=None):
+        self.url = url
+        self.tables = tables or sql_tables()
+        self.maps = {}
+        self.token = uuid.uuid4().hex
+
+    def __getstate__(self):
+        return {"url": self.url, "tables": self.tables, "maps": self.maps, "token": self.token}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    @property
+    def dialect(self):
+        return dialect_for(self.url)
+
+    @property
+    def pool(self):
+        key = (self.token, os.getpid())
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(self.dialect.connect(self.url))
+                _pools[key] = pool
+        return pool
+
+    def table(self, dataset):
+        return _ident(self.tables[dataset])
+
+    def query(self, sql, params=()):
+        sql = sql.replace("?", self.dialect.placeholder)
+        with self.pool.connection() as con:
+            cur = con.cursor()
+            try:
+                cur.execute(sql, list(params))
+                columns = [d[0] for d in cur.description]
+                return pd.DataFrame.from_records(cur.fetchall(), columns=columns)
+            finally:
+                cur.close()
+
+    # ---------- Schema ----------
+    def has_table(self, dataset):
+        # Asks the catalog, so connection or permission errors still raise
+        return not self.query(self.dialect.table_exists, [self.tables[dataset]]).empty
+
+    def schema_frame(self, dataset):
+        return self.query(f"SELECT * FROM {self.table(dataset)} WHERE 1 = 0")
+
+    def fetch(self, dataset):
+        return self.query(f"SELECT * FROM {self.table(dataset)}")
+
+    def span(self, date_column="booking_date"):
+        row = self.query(
+            f"SELECT MIN({_ident(date_column)}), MAX({_ident(date_column)}) "
+            f"FROM {self.table('bookings')}"
+        ).iloc[0]
+        if pd.isna(row.iloc[0]):
+            return None
+        return pd.Timestamp(row.iloc[0]), pd.Timestamp(row.iloc[1])
+
+    def fingerprint(self):
+        # Changes whenever bookings are added, removed or re-dated
+        row = self.query(
+            f"SELECT COUNT(*), MAX(booking_id), MAX(booking_date) FROM {self.table('bookings')}"
+        ).iloc[0]
+        return f"sql:{self.url}:{':'.join(str(v) for v in row.tolist())}"
+
+    # ---------- Star schema ----------
+    def build_star(self, data):
+        columns = set(data["bookings"].columns)
+        for name, (_, _, fact_cols) in DIMENSIONS.items():
+            join_col = next((c for c in fact_cols if c in columns), None)
+            if join_col is None:
+                data[f"dim_{name}"] = None
+                continue
+
+            distinct = self.query(
+                f"SELECT DISTINCT {_ident(join_col)} FROM {self.table('bookings')} "
+                f"WHERE {_ident(join_col)} IS NOT NULL"
+            )
+            dim, fact_keys = build_dimension(name, data.get(name), distinct)
+            self.maps[name] = (join_col, dict(zip(distinct[join_col].tolist(), fact_keys.tolist())))
+            data[f"dim_{name}"] = dim
+        return data
+
+    def _raw_ids(self, name, keys):
+        join_col, mapping = self.maps[name]
+        wanted = set(int(k) for k in keys)
+        return join_col, [raw for raw, key in mapping.items() if key in wanted]
+
+    def _attach_keys(self, frame):
+        for name, (join_col, mapping) in self.maps.items():
+            if join_col in frame.columns:
+                keys = frame[join_col].map(mapping)
+                frame[KEY_COLUMNS[name]] = keys.fillna(-1).astype("int32")
+        return frame
+
+    # ---------- Filters ----------
+    def where(self, state, date_column="booking_date", extra=(), prefix=""):
+        clauses, params = list(extra), []
+        if state.start is not None:
+            clauses.append(f"{prefix}{_ident(date_column)} >= ?")
+            params.append(self.dialect.param(state.start))
+        if state.end is not None:
+            clauses.append(f"{prefix}{_ident(date_column)} < ?")
+            params.append(self.dialect.param(state.end))
+
+        for name, field in (("routes", "routes"), ("cruises", "cruises"), ("partners", "partners")):
+            keys = getattr(state, field)
+            if not keys or name not in self.maps:
+                continue
+            join_col, raws = self._raw_ids(name, keys)
+            if not raws:
+                clauses.append("1 = 0")
+                continue
+            clauses.append(f"{prefix}{_ident(join_col)} IN ({', '.join('?' * len(raws))})")
+            params.extend(raws)
+
+        sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return sql, params
+
+    # ==================== QUERIES ====================
+    def cube(self, dimensions, measures):
+        """Same layout as rollup.build_cube: grouped by raw IDs server-side, keyed here."""
+        columns = set(self.schema_frame("bookings").columns)
+        raw_dims = [join_col for join_col, _ in self.maps.values()]
+        if "booking_status" in columns:
+            raw_dims.append("booking_status")
+        measures = [m for m in measures if m in columns]
+
+        day = self.dialect.day(_ident("booking_date"))
+        select = [f"{day} AS day"] + [_ident(d) for d in raw_dims]
+        select += [f"SUM({_ident(m)}) AS {_ident(m)}" for m in measures]
+        select.append("COUNT(*) AS bookings")
+        if "booking_status" in columns:
+            select.append(
+                "SUM(CASE WHEN booking_status = 'Cancelled' THEN 1 ELSE 0 END) AS cancellations"
+            )
+        group = ", ".join([day] + [_ident(d) for d in raw_dims])
+
+        rows = self._attach_keys(self.query(
+            f"SELECT {', '.join(select)} FROM {self.table('bookings')} "
+            f"WHERE booking_date IS NOT NULL GROUP BY {group}"
+        ))
+        rows["day"] = pd.to_datetime(rows["day"]).astype("datetime64[us]")
+
+        # Several raw IDs can share one key ("C4", "c04"), so re-aggregate by key
+        dims = [d for d in dimensions if d in rows.columns]
+        values = [c for c in rows.columns if c not in dims and c not in raw_dims]
+        if "booking_status" in rows.columns:
+            rows["booking_status"] = rows["booking_status"].astype("category")
+        return (
+            rows
+            .groupby(dims, as_index=False, observed=True, sort=True, dropna=False)[values]
+            .sum()
+        )
+
+    def sailing_rows(self):
+        """Same layout as inventory.sailing_rows: grouped by raw IDs, keyed here."""
+        columns = set(self.schema_frame("bookings").columns)
+        raw_dims = [join_col for join_col, _ in self.maps.values()]
+        status = ["booking_status"] if "booking_status" in columns else []
+
+        day = self.dialect.day(_ident("cruise_date"))
+        select = [f"{day} AS departure"] + [_ident(d) for d in raw_dims + status]
+        select += [f"SUM({_ident(m)}) AS {_ident(m)}" for m in SAILING_MEASURES]
+        select.append("COUNT(*) AS bookings")
+        group = ", ".join([day] + [_ident(d) for d in raw_dims + status])
+
+        rows = self._attach_keys(self.query(
+            f"SELECT {', '.join(select)} FROM {self.table('bookings')} "
+            f"WHERE cruise_date IS NOT NULL GROUP BY {group}"
+        ))
+        rows["departure"] = pd.to_datetime(rows["departure"]).astype("datetime64[us]")
+        return rows.drop(columns=[c for c in raw_dims if c not in KEY_COLUMNS.values()])
+
+    def count_by(self, state, column):
+        where, params = self.where(state, extra=[f"{_ident(column)} IS NOT NULL"])
+        return self.query(
+            f"SELECT {_ident(column)}, COUNT(booking_id) AS Bookings "
+            f"FROM {self.table('bookings')} {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def booking_trend(self, state):
+        day = self.dialect.day("booking_date")
+        where, params = self.where(state, extra=["booking_date IS NOT NULL"])
+        trend = self.query(
+            f"SELECT {day} AS booking_date, COUNT(booking_id) AS Bookings "
+            f"FROM {self.table('bookings')} {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+        trend["booking_date"] = pd.to_datetime(trend["booking_date"]).dt.date
+        return trend
+
+    def lead_time_counts(self, state):
+        lead = self.dialect.lead_days("booking_date", "cruise_date")
+        where, params = self.where(
+            state, extra=["cruise_date IS NOT NULL", "booking_date IS NOT NULL"]
+        )
+        return self.query(
+            f"SELECT {lead} AS lead_time_days, COUNT(booking_id) AS Bookings "
+            f"FROM {self.table('bookings')} {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def origin_counts(self, state):
+        where, params = self.where(state, extra=["c.customer_type IS NOT NULL"], prefix="b.")
+        return self.query(
+            f"SELECT c.customer_type, COUNT(b.booking_id) AS Bookings "
+            f"FROM {self.table('bookings')} b "
+            f"LEFT JOIN {self.table('customers')} c ON b.customer_id = c.customer_id "
+            f"{where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def customer_totals(self, state):
+        where, params = self.where(state, extra=["customer_id IS NOT NULL"])
+        return self.query(
+            "SELECT customer_id, COUNT(booking_id) AS Bookings, "
+            "SUM(total_booking_value) AS Revenue "
+            f"FROM {self.table('bookings')} {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+    def customer_months(self, state):
+        """Revenue per (customer, booking month) in the window."""
+        month = self.dialect.month("booking_date")
+        where, params = self.where(
+            state, extra=["customer_id IS NOT NULL", "booking_date IS NOT NULL"]
+        )
+        return self.query(
+            f"SELECT customer_id, {month} AS month, SUM(total_booking_value) AS revenue "
+            f"FROM {self.table('bookings')} {where} GROUP BY 1, 2",
+            params,
+        )
+
+    def first_months(self, sheet_dates=False):
+        """First booking month per customer, over all bookings and the Customers sheet."""
+        months = [
+            f"SELECT customer_id, {self.dialect.month('booking_date')} AS month "
+            f"FROM {self.table('bookings')} "
+            "WHERE customer_id IS NOT NULL AND booking_date IS NOT NULL"
+        ]
+        if sheet_dates:
+            months.append(
+                f"SELECT customer_id, {self.dialect.month('first_booking_date')} "
+                f"FROM {self.table('customers')} WHERE first_booking_date IS NOT NULL"
+            )
+        return self.query(
+            "SELECT customer_id, MIN(month) AS first_month "
+            f"FROM ({' UNION ALL '.join(months)}) AS months GROUP BY 1"
+        )
+
+    def partner_totals(self, state, partner_col):
+        where, params = self.where(state, extra=[f"{_ident(partner_col)} IS NOT NULL"])
+        return self.query(
+            f"SELECT {_ident(partner_col)}, SUM(total_booking_value) AS Revenue, "
+            "COUNT(booking_id) AS Bookings, "
+            "SUM(CASE WHEN booking_status = 'Cancelled' THEN 1 ELSE 0 END) AS Cancellations "
+            f"FROM {self.table('bookings')} {where} GROUP BY 1 ORDER BY 1",
+            params,
+        )
+
+
+# ==================== DATASET ====================
+def build_sql_dataset(url=SQL_URL, tables=None):
+    """The dataset dict pages expect, sourced from a database.
+
+    Masters are fetched whole; bookings, customers and cancellations are
+    zero-row frames (columns only) with queries going through data["backend"].
+    """
+    if not url:
+        raise ValueError("ICRUISE_SQL_URL is not set")
+
+    backend = SqlBackend(url, tables)
+    data = {}
+    for dataset in SQL_TABLES:
+        if not backend.has_table(dataset):
+            data[dataset] = None
+        elif dataset in MASTER_DATASETS:
+            data[dataset] = apply_schema(backend.fetch(dataset), SCHEMA_SHEETS.get(dataset, ""))
+        else:
+            data[dataset] = backend.schema_frame(dataset)
+
+    data["missing_sheets"] = [backend.tables[d] for d in SQL_TABLES if data[d] is None]
+    data["backend"] = backend
+
+    if data["bookings"] is None or "booking_date" not in data["bookings"].columns:
+        data["fingerprint"] = f"sql:{url}"
+        data["cube"] = None
+        data["kpi"] = None
+        data["sailings"] = None
+        return data
+
+    data["fingerprint"] = backend.fingerprint()
+    data["bookings"].attrs["span"] = backend.span()
+
+    data = backend.build_star(data)
+    data["cube"] = backend.cube(CUBE_DIMENSIONS, CUBE_MEASURES)
+    data["kpi"] = KpiEngine(data["cube"])
+    data["sailings"] = (
+        build_sailings(backend.sailing_rows(), data["dim_cruises"])
+        if has_inventory(data["bookings"], data["dim_cruises"])
+        else None
+    )
+    return data
+
+
+# ==================== CLI ====================
+def export_sqlite(workbook_path, db_path):
+    """Copy a workbook (or Parquet directory) into SQLite tables, for local testing."""
+    from data.data_loader import SHEET_GROUPS, read_workbook
+
+    workbook_path = Path(workbook_path)
+    if workbook_path.is_dir():
+        sheets = {p.stem: pd.read_parquet(p) for p in workbook_path.glob("*.parquet")}
+    else:
+        sheets = read_workbook(workbook_path, enforce_schema=False)
+
+    tables = sql_tables()
+    counts = {}
+    with sqlite3.connect(db_path) as con:
+        for dataset, names in SHEET_GROUPS.items():
+            name = next((n for n in names if n in sheets), None)
+            if name is None:
+                continue
+            df = sheets[name]
+            df.to_sql(tables[dataset], con, if_exists="replace", index=False, chunksize=50_000)
+            counts[tables[dataset]] = len(df)
+
+        # Bookings are always filtered by date; customers are joined by id
+        if "bookings" in counts:
+            con.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_bookings_date "
+                f"ON {_ident(tables['bookings'])} (booking_date)"
+            )
+        if "customers" in counts:
+            con.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_customers_id "
+                f"ON {_ident(tables['customers'])} (customer_id)"
+            )
+    return counts
+
+
+def main(argv=None):
+    from data.data_loader import WORKBOOK_PATH
+
+    parser = argparse.ArgumentParser(
+        prog="python -m data.sources",
+        description="Utilities for the SQL data source.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export-sqlite", help="load a workbook into a SQLite database")
+    export.add_argument("--workbook", type=Path, default=WORKBOOK_PATH,
+                        help="an .xlsx workbook or a directory of <Sheet>.parquet files")
+    export.add_argument("--out", type=Path, required=True)
+
+    check = sub.add_parser("check", help="build the dataset from ICRUISE_SQL_URL and time it")
+    check.add_argument("--url", default=SQL_URL)
+    args = parser.parse_args(argv)
+
+    if args.command == "export-sqlite":
+        started = time.perf_counter()
+        counts = export_sqlite(args.workbook, args.out)
+        print(f"{args.out}: written in {time.perf_counter() - started:.1f}s")
+        for table, rows in counts.items():
+            print(f"  {table}: {rows:,} rows")
+        return 0
+
+    started = time.perf_counter()
+    data = build_sql_dataset(args.url)
+    elapsed = time.perf_counter() - started
+    cube_rows = 0 if data["cube"] is None else len(data["cube"])
+    print(f"{args.url}: dataset built in {elapsed:.2f}s ({cube_rows:,} cube rows)")
+    print(f"  connections opened: {data['backend'].pool.opened}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
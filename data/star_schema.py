@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# ==================== DIMENSIONS ====================
+# dimension -> (master id column, id prefix, fact columns to join on, in order)
+DIMENSIONS = {
+    "cruises": ("cruise_id", "C", ["cruise_id"]),
+    "routes": ("route_id", "R", ["route_id"]),
+    "partners": ("partner_id", "P", ["partner_id", "partner_name"]),
+}
+
+KEY_COLUMNS = {
+    "cruises": "cruise_key",
+    "routes": "route_key",
+    "partners": "partner_key",
+}
+
+
+def normalize_ids(values, prefix):
+    """Canonical text form of an ID: "C4", "c04", 4 and "4" all become "4"."""
+    ids = pd.Series(values, dtype="object").astype("string").str.strip().str.upper()
+    ids = ids.str.replace(rf"^{prefix}(?=\d)", "", regex=True)
+
+    numeric = ids.str.fullmatch(r"\d+").fillna(False).astype(bool)
+    ids[numeric] = ids[numeric].str.lstrip("0").replace("", "0")
+    return ids
+
+
+def _text_ids(values):
+    return pd.Series(values, dtype="object").astype("string").str.strip()
+
+
+def build_dimension(name, master, fact):
+    id_col, prefix, fact_cols = DIMENSIONS[name]
+    key_col = KEY_COLUMNS[name]
+
+    join_col = next((c for c in fact_cols if c in fact.columns), None)
+    if join_col is None:
+        return None, None
+
+    if join_col == id_col:
+        normalize = lambda values: normalize_ids(values, prefix).to_numpy()
+    else:
+        normalize = lambda values: _text_ids(values).to_numpy()
+
+    # ---------- Join on the id when the master has it, else on the name ----------
+    if master is not None and join_col in master.columns:
+        dim_ids = normalize(master[join_col].to_numpy())
+        keep = ~pd.Index(dim_ids).duplicated() & pd.notna(dim_ids)
+        dim = master[keep].reset_index(drop=True)
+        dim_ids = dim_ids[keep]
+    else:
+        dim = pd.DataFrame({join_col: pd.Series(dtype="string")})
+        dim_ids = np.array([], dtype="object")
+
+    # ---------- Normalize each distinct fact value once, via its codes ----------
+    fact_values = pd.Categorical(fact[join_col])
+    categories = fact_values.categories.to_numpy()
+    category_ids = normalize(categories)
+
+    # Fact IDs the master doesn't know become extra members
+    unknown = ~pd.Index(category_ids).isin(dim_ids)
+    if unknown.any():
+        first = ~pd.Index(category_ids).duplicated()
+        extra = unknown & first
+        dim = pd.concat(
+            [dim, pd.DataFrame({join_col: categories[extra]})], ignore_index=True
+        )
+        dim_ids = np.concatenate([dim_ids, category_ids[extra]])
+
+    dim.insert(0, key_col, np.arange(len(dim), dtype="int32"))
+
+    category_keys = pd.Index(dim_ids).get_indexer(category_ids).astype("int32")
+    codes = fact_values.codes
+    fact_keys = np.where(codes >= 0, category_keys[codes], -1).astype("int32")
+
+    return dim, fact_keys
+
+
+def build_star(data):
+    """Resolve cruises, routes and partners into dense integer-keyed dimensions.
+
+    Adds dim_<name> tables to the dataset and <name>_key foreign keys to the
+    bookings fact table, so pages join through array lookups instead of
+    string merges.
+    """
+    bookings = data.get("bookings")
+    if bookings is None:
+        return data
+
+    keys = {}
+    for name in DIMENSIONS:
+        dim, fact_keys = build_dimension(name, data.get(name), bookings)
+        data[f"dim_{name}"] = dim
+        if fact_keys is not None:
+            keys[KEY_COLUMNS[name]] = fact_keys
+
+    data["bookings"] = bookings.assign(**keys)
+    return data
+
+
+# ==================== LOOKUPS ====================
+def lookup(dim, column, keys):
+    keys = np.asarray(keys)
+    values = dim[column].array
+    if len(keys) and keys.min() < 0:
+        return values.take(keys, allow_fill=True)
+    return values.take(keys)
+
+
+def attach_dimensions(fact, dim, columns=None):
+    """Return fact with dimension attributes looked up through its key column."""
+    key_col = dim.columns[0]
+    keys = fact[key_col].to_numpy()
+
+    if columns is None:
+        columns = [c for c in dim.columns[1:] if c not in fact.columns]
+
+    return fact.assign(**{
+        col: pd.Series(lookup(dim, col, keys), index=fact.index)
+        for col in columns
+    })
+
+
+def denormalize(data):
+    """Bookings with every cruise, route and partner attribute pre-joined."""
+    view = data["bookings"]
+    for name in DIMENSIONS:
+        dim = data.get(f"dim_{name}")
+        if dim is not None:
+            view = attach_dimensions(view, dim)
+    return view
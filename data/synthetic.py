@@ -0,0 +1,479 @@
+import argparse
+import sys
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Seeded generator for iCruiseEgypt-shaped datasets, from 10k to 50M
+# bookings. Bookings are produced in fixed-size chunks with NumPy, so
+# memory depends on the chunk size, not on the total. The same seed and
+# chunk size always give the same data.
+
+# ==================== MASTER DATA ====================
+BASE_CRUISES = [
+    ("Nile Sunrise Cruise", "Standard", 120),
+    ("Nile Sunset Cruise", "Standard", 130),
+    ("Luxury Pharaoh Cruise", "Luxury", 90),
+    ("Family Fun Cruise", "Family", 150),
+    ("Romantic Dinner Cruise", "Premium", 80),
+    ("Budget Explorer Cruise", "Budget", 180),
+    ("Royal Heritage Cruise", "Luxury", 100),
+    ("Nile Vision Cruise", "Standard", 110),
+]
+BASE_ROUTES = [
+    "Luxor → Aswan",
+    "Aswan → Luxor",
+    "Luxor → Cairo",
+    "Cairo → Aswan",
+    "Aswan → Abu Simbel",
+]
+EXTRA_PORTS = ["Cairo", "Luxor", "Aswan", "Esna", "Edfu", "Kom Ombo", "Qena", "Abu Simbel"]
+
+BASE_PARTNERS = [
+    ("Direct Website", "Direct"),
+    ("Booking.com (OTA)", "OTA"),
+    ("TripAdvisor (OTA)", "OTA"),
+    ("Local Agent Luxor", "Agent"),
+    ("Global Cruise OTA", "OTA"),
+]
+
+# Price per seat (EGP) by cruise type
+SEAT_PRICE = {
+    "Budget": 18_000,
+    "Standard": 28_000,
+    "Family": 30_000,
+    "Premium": 36_000,
+    "Luxury": 45_000,
+}
+
+# Base cancellation probability by partner type
+CANCEL_RATE = {"Direct": 0.12, "OTA": 0.22, "Agent": 0.16}
+
+DEVICES = ["Mobile", "Desktop", "Tablet"]
+DEVICE_SHARE = [0.62, 0.31, 0.07]
+
+COUNTRIES = [
+    ("Egypt", ["Cairo", "Alexandria", "Giza", "Luxor"], "Domestic"),
+    ("United Kingdom", ["London", "Manchester"], "International"),
+    ("Germany", ["Berlin", "Munich", "Frankfurt"], "International"),
+    ("United States", ["New York", "Chicago", "Los Angeles"], "International"),
+    ("Italy", ["Rome", "Milan"], "International"),
+    ("Saudi Arabia", ["Riyadh", "Jeddah"], "International"),
+    ("China", ["Beijing", "Shanghai"], "International"),
+]
+COUNTRY_SHARE = [0.38, 0.14, 0.13, 0.11, 0.08, 0.09, 0.07]
+
+CANCELLATION_REASONS = [
+    "Change of plans",
+    "Found a better price",
+    "Medical reasons",
+    "Travel restrictions",
+    "Weather concerns",
+    "Duplicate booking",
+]
+REASON_SHARE = [0.38, 0.22, 0.14, 0.1, 0.08, 0.08]
+
+XLSX_MAX_ROWS = 1_048_575  # data rows under the header
+
+
+def _zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def make_cruises(n=len(BASE_CRUISES), seed=0):
+    rng = np.random.default_rng([seed, 1])
+    rows = list(BASE_CRUISES[:n])
+    types = list(SEAT_PRICE)
+    for i in range(len(rows), n):
+        cruise_type = types[rng.integers(len(types))]
+        rows.append((f"Nile Cruise {i + 1}", cruise_type, int(rng.integers(8, 19) * 10)))
+
+    return pd.DataFrame({
+        "cruise_id": [f"C{i + 1}" for i in range(n)],
+        "cruise_name": [r[0] for r in rows],
+        "cruise_type": [r[1] for r in rows],
+        "total_seats": [r[2] for r in rows],
+    })
+
+
+def make_routes(n=len(BASE_ROUTES)):
+    names = list(BASE_ROUTES[:n])
+    pairs = (
+        f"{a} → {b}" for a in EXTRA_PORTS for b in EXTRA_PORTS if a != b
+    )
+    for name in pairs:
+        if len(names) >= n:
+            break
+        if name not in names:
+            names.append(name)
+
+    return pd.DataFrame({
+        "route_id": [f"R{i + 1}" for i in range(len(names))],
+        "route_name": names,
+    })
+
+
+def make_partners(n=len(BASE_PARTNERS)):
+    rows = list(BASE_PARTNERS[:n])
+    kinds = ["OTA", "Agent"]
+    for i in range(len(rows), n):
+        kind = kinds[i % 2]
+        rows.append((f"Partner {i + 1} ({kind})", kind))
+
+    return pd.DataFrame({
+        "partner_id": [f"P{i + 1}" for i in range(n)],
+        "partner_name": [r[0] for r in rows],
+        "partner_type": [r[1] for r in rows],
+    })
+
+
+# ==================== CALENDAR ====================
+def day_weights(start, days):
+    """Relative booking volume per day.
+
+    Nile cruising peaks in winter and dips in the summer heat, weekends
+    (Fri/Sat) are busier, and volume grows slowly over the period.
+    """
+    calendar = pd.date_range(start, periods=days, freq="D")
+    doy = calendar.dayofyear.to_numpy()
+
+    season = 1 + 0.45 * np.cos(2 * np.pi * (doy - 15) / 365.25)
+    weekend = np.where(np.isin(calendar.dayofweek.to_numpy(), [4, 5]), 1.2, 1.0)
+    growth = np.linspace(1.0, 1.0 + 0.15 * days / 365, days)
+
+    weights = season * weekend * growth
+    return calendar, weights / weights.sum()
+
+
+# ==================== GENERATOR ====================
+class BookingGenerator:
+    """Yields the Bookings table chunk by chunk, then Customers and Cancellations.
+
+    Cancellations are emitted per chunk alongside the bookings; Customers
+    is only complete after the last chunk (it carries each customer's
+    first booking date).
+    """
+
+    def __init__(
+        self,
+        bookings,
+        seed=42,
+        start="2025-01-01",
+        days=365,
+        cruises=len(BASE_CRUISES),
+        routes=len(BASE_ROUTES),
+        partners=len(BASE_PARTNERS),
+        customers=None,
+        chunk_rows=500_000,
+    ):
+        self.bookings = int(bookings)
+        self.seed = seed
+        self.chunk_rows = int(chunk_rows)
+
+        self.cruises = make_cruises(cruises, seed)
+        self.routes = make_routes(routes)
+        self.partners = make_partners(partners)
+        self.n_customers = int(customers or max(1, self.bookings // 3))
+
+        self.calendar, self.day_p = day_weights(start, days)
+
+        # Skew: a few partners and cruises take most of the volume
+        self.partner_p = _zipf_weights(len(self.partners), 0.9)
+        self.cruise_p = _zipf_weights(len(self.cruises), 0.6)
+        self.route_p = _zipf_weights(len(self.routes), 0.7)
+
+        partner_type = self.partners["partner_type"].to_numpy()
+        self.partner_cancel = np.array([CANCEL_RATE[t] for t in partner_type])
+        self.partner_channel = partner_type
+
+        self.seat_price = self.cruises["cruise_type"].map(SEAT_PRICE).to_numpy()
+        self.first_booking = np.full(self.n_customers, np.iinfo(np.int64).max, dtype=np.int64)
+
+    def _rng(self, chunk_index):
+        return np.random.default_rng([self.seed, 2, chunk_index])
+
+    def chunks(self):
+        for index, offset in enumerate(range(0, self.bookings, self.chunk_rows)):
+            rows = min(self.chunk_rows, self.bookings - offset)
+            yield self._chunk(self._rng(index), offset, rows)
+
+    def _chunk(self, rng, offset, rows):
+        # ---------- Dates ----------
+        day = rng.choice(len(self.calendar), size=rows, p=self.day_p)
+        ms_in_day = rng.integers(7 * 3_600_000, 23 * 3_600_000, size=rows)
+        booking_date = (
+            self.calendar.to_numpy()[day].astype("datetime64[ms]")
+            + ms_in_day.astype("timedelta64[ms]")
+        )
+        lead_days = np.minimum(rng.lognormal(3.0, 0.8, size=rows).astype(np.int64), 365)
+        cruise_date = booking_date + lead_days.astype("timedelta64[D]")
+
+        # ---------- Dimensions ----------
+        cruise = rng.choice(len(self.cruises), size=rows, p=self.cruise_p)
+        route = rng.choice(len(self.routes), size=rows, p=self.route_p)
+        partner = rng.choice(len(self.partners), size=rows, p=self.partner_p)
+
+        # Most bookings pick a customer at random; a third come from a
+        # heavy-tailed pool of frequent travellers (scattered over the ids)
+        customer = rng.integers(self.n_customers, size=rows)
+        loyal = rng.random(rows) < 0.35
+        heavy = np.minimum(
+            (rng.pareto(1.5, size=int(loyal.sum())) * self.n_customers / 50).astype(np.int64),
+            self.n_customers - 1,
+        )
+        customer[loyal] = (heavy * 2_654_435_761) % self.n_customers
+        np.minimum.at(self.first_booking, customer, booking_date.astype(np.int64))
+
+        # ---------- Measures ----------
+        seats = rng.choice([1, 2, 3, 4, 5, 6], size=rows, p=[0.12, 0.38, 0.2, 0.18, 0.08, 0.04])
+        season_markup = 1 + 0.25 * self.day_p[day] / self.day_p.max()
+        value = np.round(
+            seats * self.seat_price[cruise] * season_markup * rng.normal(1.0, 0.12, size=rows)
+        ).clip(1_000).astype(np.int64)
+        discount = np.round(value * rng.beta(1.2, 30, size=rows)).astype(np.int64)
+
+        # Late bookings cancel less, OTAs cancel more
+        cancel_p = self.partner_cancel[partner] * np.where(lead_days < 15, 0.6, 1.1)
+        cancelled = rng.random(rows) < cancel_p
+
+        bookings = pd.DataFrame({
+            "booking_id": np.arange(offset + 1, offset + rows + 1, dtype=np.int64),
+            "booking_date": booking_date,
+            "cruise_date": cruise_date,
+            "cruise_id": self.cruises["cruise_id"].to_numpy()[cruise],
+            "route_id": self.routes["route_id"].to_numpy()[route],
+            "partner_name": self.partners["partner_name"].to_numpy()[partner],
+            "seats_booked": seats,
+            "total_booking_value": value,
+            "booking_status": np.where(cancelled, "Cancelled", "Confirmed"),
+            "discount_amount": discount,
+            "customer_id": customer + 1,
+            "booking_channel": self.partner_channel[partner],
+            "device_type": np.array(DEVICES)[rng.choice(3, size=rows, p=DEVICE_SHARE)],
+        })
+
+        # ---------- Cancellations ----------
+        idx = np.flatnonzero(cancelled)
+        notice = (rng.random(len(idx)) * np.maximum(lead_days[idx], 1) * 86_400_000).astype(np.int64)
+        refund_share = np.where(lead_days[idx] >= 15, 0.9, 0.5)
+        cancellations = pd.DataFrame({
+            "booking_id": bookings["booking_id"].to_numpy()[idx],
+            "cancellation_date": booking_date[idx] + notice.astype("timedelta64[ms]"),
+            "cancellation_reason": np.array(CANCELLATION_REASONS)[
+                rng.choice(len(CANCELLATION_REASONS), size=len(idx), p=REASON_SHARE)
+            ],
+            "refund_amount": np.round((value - discount)[idx] * refund_share).astype(np.int64),
+        })
+
+        return bookings, cancellations
+
+    def customers(self):
+        rng = np.random.default_rng([self.seed, 3])
+        n = self.n_customers
+
+        country = rng.choice(len(COUNTRIES), size=n, p=COUNTRY_SHARE)
+        city = np.empty(n, dtype=object)
+        for i, (_, cities, _) in enumerate(COUNTRIES):
+            rows = np.flatnonzero(country == i)
+            city[rows] = np.array(cities, dtype=object)[rng.integers(len(cities), size=len(rows))]
+
+        first = self.first_booking.copy()
+        never = first == np.iinfo(np.int64).max
+        first[never] = np.datetime64("NaT").astype(np.int64)
+
+        return pd.DataFrame({
+            "customer_id": np.arange(1, n + 1, dtype=np.int64),
+            "first_booking_date": first.astype("datetime64[ms]"),
+            "country": np.array([c[0] for c in COUNTRIES])[country],
+            "city": city,
+            "customer_type": np.array([c[2] for c in COUNTRIES])[country],
+        })
+
+    def masters(self):
+        return {
+            "Cruises_Master": self.cruises,
+            "Routes_Master": self.routes,
+            "Partners_Master": self.partners,
+        }
+
+
+# ==================== WRITERS ====================
+class CsvWriter:
+    """One CSV file per sheet in a directory."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._started = set()
+
+    def append(self, sheet, df):
+        first = sheet not in self._started
+        self._started.add(sheet)
+        df.to_csv(
+            self.path / f"{sheet}.csv", mode="w" if first else "a", header=first, index=False
+        )
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """One Parquet file per sheet in a directory, written a chunk at a time."""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa, self._pq = pa, pq
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._writers = {}
+
+    def append(self, sheet, df):
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        writer = self._writers.get(sheet)
+        if writer is None:
+            writer = self._pq.ParquetWriter(self.path / f"{sheet}.parquet", table.schema)
+            self._writers[sheet] = writer
+        writer.write_table(table)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+
+
+class XlsxWriter:
+    """Streaming .xlsx (openpyxl write-only); each sheet is capped at Excel's row limit."""
+
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._book = Workbook(write_only=True)
+        self._sheets = {}
+        self._rows = {}
+
+    def append(self, sheet, df):
+        ws = self._sheets.get(sheet)
+        if ws is None:
+            ws = self._book.create_sheet(sheet)
+            ws.append(list(df.columns))
+            self._sheets[sheet] = ws
+            self._rows[sheet] = 0
+
+        if self._rows[sheet] + len(df) > XLSX_MAX_ROWS:
+            raise ValueError(
+                f"{sheet} would exceed {XLSX_MAX_ROWS:,} rows; use csv or parquet for this size"
+            )
+        self._rows[sheet] += len(df)
+
+        columns = []
+        for col in df.columns:
+            values = df[col]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                columns.append([None if pd.isna(v) else v.to_pydatetime() for v in values])
+            else:
+                columns.append(values.tolist())
+        for row in zip(*columns):
+            ws.append(row)
+
+    def close(self):
+        self._book.save(self.path)
+
+
+WRITERS = {"xlsx": XlsxWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def generate(out, fmt="xlsx", **options):
+    """Write a synthetic dataset to `out` (a file for xlsx, a directory otherwise)."""
+    if fmt == "parquet" and find_spec("pyarrow") is None:
+        raise RuntimeError("pyarrow is required for parquet output")
+
+    generator = BookingGenerator(**options)
+    if fmt == "xlsx" and generator.bookings > XLSX_MAX_ROWS:
+        raise ValueError(
+            f"{generator.bookings:,} bookings exceed the xlsx limit of {XLSX_MAX_ROWS:,} rows"
+        )
+
+    writer = WRITERS[fmt](out)
+    counts = {}
+    try:
+        for sheet, df in generator.masters().items():
+            writer.append(sheet, df)
+            counts[sheet] = len(df)
+
+        # Cancellations follow Bookings on disk, so hold them until the end
+        # for xlsx (write-only sheets are created in order); other formats stream.
+        held = []
+        for bookings, cancellations in generator.chunks():
+            writer.append("Bookings", bookings)
+            counts["Bookings"] = counts.get("Bookings", 0) + len(bookings)
+            if fmt == "xlsx":
+                held.append(cancellations)
+            elif len(cancellations):
+                writer.append("Cancellations", cancellations)
+            counts["Cancellations"] = counts.get("Cancellations", 0) + len(cancellations)
+
+        if held:
+            writer.append("Cancellations", pd.concat(held, ignore_index=True))
+
+        customers = generator.customers()
+        writer.append("Customers", customers)
+        counts["Customers"] = len(customers)
+    finally:
+        writer.close()
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m data.synthetic",
+        description="Generate a seeded synthetic iCruiseEgypt dataset.",
+    )
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--format", choices=list(WRITERS), default="xlsx")
+    parser.add_argument("--out", type=Path, help="output file (xlsx) or directory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--cruises", type=int, default=len(BASE_CRUISES))
+    parser.add_argument("--routes", type=int, default=len(BASE_ROUTES))
+    parser.add_argument("--partners", type=int, default=len(BASE_PARTNERS))
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    out = args.out or Path(__file__).resolve().parent / "generated" / (
+        f"icruise_{args.bookings}" + (".xlsx" if args.format == "xlsx" else "")
+    )
+
+    started = time.perf_counter()
+    counts = generate(
+        out,
+        args.format,
+        bookings=args.bookings,
+        seed=args.seed,
+        start=args.start,
+        days=args.days,
+        cruises=args.cruises,
+        routes=args.routes,
+        partners=args.partners,
+        customers=args.customers,
+        chunk_rows=args.chunk_rows,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"{out}: written in {elapsed:.1f}s")
+    for sheet, rows in counts.items():
+        print(f"  {sheet}: {rows:,} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
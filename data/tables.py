@@ -0,0 +1,95 @@
+import io
+
+import pandas as pd
+import streamlit as st
+
+# Action tables can cover thousands of cruises, partners or customers.
+# Sorting and paging happen here on the server; only the visible page is
+# formatted and sent to the browser, and the full table goes out as CSV.
+
+# ==================== CONFIG ====================
+PAGE_SIZE = 25
+CSV_CHUNK_ROWS = 50_000
+
+
+# ==================== FORMATTERS ====================
+# Whole-column formatters: Series in, Series of display strings out
+def _formatter(pattern):
+    def fmt(values):
+        return values.map(pattern.format).where(values.notna(), "")
+    return fmt
+
+
+money = _formatter("₹ {:,.0f}")
+percent = _formatter("{:.1f}%")
+count = _formatter("{:,.0f}")
+
+
+def format_page(rows, formats=None):
+    rows = rows.copy()
+    for column, fmt in (formats or {}).items():
+        if column in rows.columns:
+            rows[column] = fmt(rows[column])
+    return rows
+
+
+# ==================== PAGING ====================
+def page_rows(frame, column, ascending, start, stop):
+    """Rows [start, stop) of frame ordered by column, without sorting it all.
+
+    Early pages of a numeric column come from a partial top-N selection;
+    later pages and other dtypes fall back to a stable full sort.
+    """
+    values = frame[column]
+    numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+    if numeric and stop * 4 <= len(frame) and stop <= values.notna().sum():
+        top = frame.nsmallest(stop, column) if ascending else frame.nlargest(stop, column)
+        return top.iloc[start:stop]
+
+    ordered = frame.sort_values(column, ascending=ascending, kind="stable", na_position="last")
+    return ordered.iloc[start:stop]
+
+
+def csv_bytes(frame):
+    """The whole frame as UTF-8 CSV, encoded a chunk at a time."""
+    out = io.BytesIO()
+    for lo in range(0, max(len(frame), 1), CSV_CHUNK_ROWS):
+        chunk = frame.iloc[lo:lo + CSV_CHUNK_ROWS]
+        out.write(chunk.to_csv(index=False, header=lo == 0).encode("utf-8"))
+    return out.getvalue()
+
+
+# ==================== COMPONENT ====================
+def paged_table(frame, key, formats=None, sort_by=None, ascending=False,
+                page_size=PAGE_SIZE, file_name=None):
+    """Sortable, paginated table with a CSV download of every row."""
+    columns = list(frame.columns)
+    total = len(frame)
+    pages = max(-(-total // page_size), 1)
+
+    sort_col, order_col, page_col = st.columns([2, 1, 1])
+    column = sort_col.selectbox(
+        "Sort by", columns,
+        index=columns.index(sort_by) if sort_by in columns else 0,
+        key=f"{key}_sort",
+    )
+    descending = order_col.toggle("Descending", value=not ascending, key=f"{key}_desc")
+    page = page_col.number_input(
+        f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=f"{key}_page"
+    )
+
+    start = (int(page) - 1) * page_size
+    rows = page_rows(frame, column, not descending, start, start + page_size)
+
+    st.dataframe(format_page(rows, formats), hide_index=True, use_container_width=True)
+    st.caption(f"Rows {start + 1:,}–{start + len(rows):,} of {total:,}")
+
+    st.download_button(
+        "⬇️ Download CSV",
+        # Encoded only when clicked, on Streamlit's download thread
+        data=lambda: csv_bytes(frame),
+        file_name=file_name or f"{key}.csv",
+        mime="text/csv",
+        key=f"{key}_csv",
+    )
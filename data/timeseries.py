@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Trend charts get at most TREND_POINTS points whatever the history length:
+# the series is first summed into the finest bucket that keeps it under
+# MAX_BUCKETS, then thinned with largest-triangle-three-buckets (LTTB),
+# which keeps the peaks and dips a plain stride would drop.
+
+# ==================== CONFIG ====================
+TREND_POINTS = int(os.environ.get("ICRUISE_TREND_POINTS", 500))
+MAX_BUCKETS = 3 * TREND_POINTS
+
+# Finest first: label -> (pandas frequency, approximate length)
+BUCKETS = {
+    "hour": ("h", pd.Timedelta(hours=1)),
+    "day": ("D", pd.Timedelta(days=1)),
+    "week": ("W-MON", pd.Timedelta(weeks=1)),
+    "month": ("MS", pd.Timedelta(days=30.44)),
+}
+
+
+# ==================== BUCKETING ====================
+def pick_bucket(start, end, finest="day", max_buckets=None):
+    """Finest bucket (no finer than `finest`) that splits [start, end] into few enough points."""
+    max_buckets = max_buckets or MAX_BUCKETS
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    labels = list(BUCKETS)
+
+    for label in labels[labels.index(finest):]:
+        if span / BUCKETS[label][1] <= max_buckets:
+            return label
+    return labels[-1]
+
+
+def bucket_series(frame, x, y, bucket):
+    """Sum y per bucket of x; empty buckets in between become 0."""
+    freq = BUCKETS[bucket][0]
+    series = pd.Series(
+        frame[y].to_numpy(), index=pd.DatetimeIndex(pd.to_datetime(frame[x])), name=y
+    )
+    # Every bin labelled by its start: weeks by their Monday, months by the 1st
+    return (
+        series.resample(freq, closed="left", label="left").sum()
+        .rename_axis(x)
+        .reset_index()
+    )
+
+
+# ==================== DOWNSAMPLING ====================
+def lttb(x, y, n_out):
+    """Indices of the n_out points largest-triangle-three-buckets keeps.
+
+    The first and last points always stay; every bucket in between keeps
+    the point forming the largest triangle with the previous pick and the
+    next bucket's average.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+
+        area = np.abs(
+            (x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a])
+        )
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(frame, x, y, n_out=None):
+    n_out = n_out or TREND_POINTS
+    if len(frame) <= n_out:
+        return frame
+    x_values = pd.to_datetime(frame[x]).to_numpy().astype(np.int64)
+    return frame.iloc[lttb(x_values, frame[y].to_numpy(), n_out)].reset_index(drop=True)
+
+
+def prepare_trend(frame, x, y, finest="day", n_out=None):
+    """(chart frame, bucket label) for a summed series over time.
+
+    `finest` is the resolution of the input: a daily rollup can't be shown
+    per hour.
+    """
+    frame = frame.dropna(subset=[x])
+    if frame.empty:
+        return frame, finest
+
+    dates = pd.to_datetime(frame[x])
+    bucket = pick_bucket(dates.min(), dates.max(), finest)
+    series = bucket_series(frame, x, y, bucket)
+    return downsample(series, x, y, n_out), bucket
@@ -0,0 +1,234 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Cold-start warm-up. The home page starts it once per server process, on
+# a background thread: heavy modules are imported, the shared dataset is
+# loaded into the resource cache, derived indexes are built, and every
+# page's default-preset aggregates are memoized. The first visitor to an
+# analytics page then finds them all warm.
+#
+# This module stays cheap to import (stdlib + streamlit only) so the home
+# page itself never waits on pandas, plotly or the workbook.
+
+# ==================== CONFIG ====================
+WARMUP_ENABLED = os.environ.get("ICRUISE_WARMUP", "1") == "1"
+WARMUP_PRESET = "Past 7 Days"  # the preset every page opens with
+COLD_START_BUDGET_S = float(os.environ.get("ICRUISE_COLD_START_BUDGET", 30))
+# Same switch as the cache admin panel
+ADMIN_ENABLED = os.environ.get("ICRUISE_ADMIN", "1") == "1"
+
+# Imported on the warm-up thread, so page scripts find them in sys.modules
+HEAVY_MODULES = [
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "plotly.express",
+    "plotly.graph_objects",
+    "data.data_loader",
+    "data.aggregations",
+    "data.forecast",
+    "data.alerts",
+]
+
+
+# ==================== REPORT ====================
+class StartupReport:
+    """Stage timings of one warm-up run, readable while it is still going."""
+
+    def __init__(self, budget=COLD_START_BUDGET_S):
+        self.budget = budget
+        self.stages = []  # (stage, seconds, detail, error)
+        self.status = "idle"
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self.stages = []
+            self.status = "running"
+            self.started_at = time.time()
+            self.finished_at = None
+
+    def add(self, stage, seconds, detail=False, error=None):
+        with self._lock:
+            self.stages.append((stage, seconds, detail, error))
+
+    @contextmanager
+    def stage(self, name, tolerate=False):
+        """Time a stage; with tolerate, a failure is recorded instead of raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as exc:
+            self.add(name, time.perf_counter() - started, error=f"{type(exc).__name__}: {exc}")
+            if not tolerate:
+                raise
+            logger.warning("Warm-up stage %s failed: %s", name, exc)
+        else:
+            self.add(name, time.perf_counter() - started)
+
+    def finish(self, error=None):
+        with self._lock:
+            self.status = "failed" if error else "done"
+            self.finished_at = time.time()
+
+    @property
+    def total(self):
+        # Detail rows break a stage down; they are already inside its time
+        return sum(seconds for _, seconds, detail, _ in self.stages if not detail)
+
+    @property
+    def over_budget(self):
+        return self.total > self.budget
+
+    def frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(
+            [
+                {
+                    "stage": f"   └ {stage}" if detail else stage,
+                    "seconds": round(seconds, 3),
+                    "error": error or "",
+                }
+                for stage, seconds, detail, error in self.stages
+            ],
+            columns=["stage", "seconds", "error"],
+        )
+
+
+REPORT = StartupReport()
+_thread = None
+_thread_lock = threading.Lock()
+
+
+# ==================== WARM-UP ====================
+def page_calls():
+    """Page -> [(memoized fn, pick_args)] for everything a page computes on open."""
+    from data.aggregations import cohort_retention, customer_summary
+    from data.alerts import alert_feed
+    from data.precompute import PAGE_TABLES
+
+    has_customers = lambda data: () if "customer_id" in data["bookings"].columns else None
+    calls = {page: list(tables) for page, tables in PAGE_TABLES.items()}
+    calls["5_Partner_Performance"].append((alert_feed, lambda data: ()))
+    calls["6_Customer_Behavior_&_Loyalty"] = [
+        (customer_summary, has_customers),
+        (cohort_retention, has_customers),
+    ]
+    return calls
+
+
+def warm_up(report=REPORT, preset=WARMUP_PRESET, load=None):
+    """Run every warm-up stage in order, recording each one in report."""
+    report.begin()
+    try:
+        for module in HEAVY_MODULES:
+            with report.stage(f"import {module}", tolerate=True):
+                import_module(module)
+
+        from data.data_loader import load_data
+        from data.forecast import forecast_models
+        from data.precompute import preset_filters
+
+        with report.stage("load dataset"):
+            data = (load or load_data)()
+        for stage, seconds in data.get("load_timings", {}).items():
+            report.add(stage, seconds, detail=True)
+
+        with report.stage("forecast models", tolerate=True):
+            forecast_models(data)
+
+        if data.get("cube") is not None:
+            filters = preset_filters(data["bookings"], preset)
+            for page, calls in page_calls().items():
+                with report.stage(f"page {page}", tolerate=True):
+                    for fn, pick_args in calls:
+                        args = pick_args(data)
+                        if args is not None:
+                            fn(data, filters, *args)
+    except Exception as exc:
+        logger.exception("Warm-up failed")
+        report.finish(error=exc)
+        return report
+
+    report.finish()
+    logger.info(
+        "Warm-up done in %.2fs (budget %.0fs)%s",
+        report.total, report.budget, " — over budget" if report.over_budget else "",
+    )
+    return report
+
+
+def start_warmup():
+    """Start the warm-up thread once per process; later calls return the same thread."""
+    global _thread
+    if not WARMUP_ENABLED:
+        return None
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warm_up, name="icruise-warmup", daemon=True)
+            _thread.start()
+    return _thread
+
+
+# ==================== HOME PAGE PANEL ====================
+def startup_panel(report=REPORT):
+    """Sidebar expander with the warm-up status and its stage breakdown."""
+    if not ADMIN_ENABLED or report.status == "idle":
+        return
+
+    with st.sidebar.expander("⏱️ Startup"):
+        if report.status == "running":
+            st.write(f"**Warming up…** {time.time() - report.started_at:.0f}s so far")
+        elif report.status == "failed":
+            st.error("Warm-up failed; pages will load on first use.")
+        else:
+            verdict = "over budget ⚠️" if report.over_budget else "within budget ✅"
+            st.write(f"**Ready** in {report.total:.1f}s — {verdict} ({report.budget:.0f}s)")
+
+        st.dataframe(report.frame(), hide_index=True, use_container_width=True)
+        if report.status == "running" and st.button("Refresh", use_container_width=True):
+            st.rerun()
+
+
+# ==================== CLI ====================
+def _build_dataset():
+    # Imported here, not at the top of main(), so the import stages are timed
+    from data.data_loader import build_dataset
+
+    return build_dataset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m data.warmup",
+        description="Run the cold-start warm-up once and report where the time goes.",
+    )
+    parser.add_argument("--budget", type=float, default=COLD_START_BUDGET_S,
+                        help="fail when the total exceeds this many seconds")
+    parser.add_argument("--preset", default=WARMUP_PRESET, help="date preset to warm")
+    args = parser.parse_args(argv)
+
+    report = warm_up(StartupReport(args.budget), args.preset, load=_build_dataset)
+    print(report.frame().to_string(index=False))
+    print(f"total {report.total:.2f}s, budget {report.budget:.0f}s: "
+          f"{'OVER BUDGET' if report.over_budget else 'ok'}")
+    if report.status == "failed":
+        return 2
+    return 1 if report.over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import mmap
+import posixpath
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from array import array
+
+import numpy as np
+import pandas as pd
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Shared-string tables above this size (uncompressed XML) are spilled to a
+# temporary file instead of a Python list
+SPILL_MIN_BYTES = 16 * 1024 * 1024
+
+
+# ==================== SHEET MANIFEST ====================
+def _resolve_target(target):
+    # Relationship targets are either package-absolute ("/xl/worksheets/...")
+    # or relative to the xl/ folder ("worksheets/...")
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def read_sheet_manifest(archive):
+    """Map sheet name -> worksheet part path, in workbook order.
+
+    Only xl/workbook.xml and its relationships are read, so listing sheets
+    costs a few KB of XML no matter how large the worksheets are.
+    """
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+
+    targets = {
+        rel.get("Id"): _resolve_target(rel.get("Target"))
+        for rel in rels.iter(f"{{{PKG_REL_NS}}}Relationship")
+    }
+
+    return {
+        sheet.get("name"): targets.get(sheet.get(f"{{{REL_NS}}}id"))
+        for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet")
+    }
+
+
+def list_sheets(file_path):
+    with zipfile.ZipFile(file_path) as archive:
+        return list(read_sheet_manifest(archive))
+
+
+def sheet_part_sizes(file_path):
+    # Uncompressed worksheet sizes come from the zip directory, no XML parsing
+    with zipfile.ZipFile(file_path) as archive:
+        return {
+            name: archive.getinfo(part).file_size
+            for name, part in read_sheet_manifest(archive).items()
+            if part in archive.NameToInfo
+        }
+
+
+def uses_1904_dates(archive):
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    props = workbook.find(f"{{{MAIN_NS}}}workbookPr")
+    return props is not None and props.get("date1904") in ("1", "true")
+
+
+# ==================== SINGLE-PASS READER ====================
+def read_sheets(file_path, sheet_names):
+    """Parse every requested sheet that exists, opening the workbook once.
+
+    Returns (sheets, missing): the parsed frames keyed by sheet name, and the
+    requested names that are not in the workbook. Absent sheets are never
+    probed, so they cost nothing and raise nothing.
+    """
+    available = set(list_sheets(file_path))
+
+    wanted = [name for name in sheet_names if name in available]
+    missing = [name for name in sheet_names if name not in available]
+
+    sheets = {}
+    if wanted:
+        with pd.ExcelFile(file_path) as workbook:
+            for name in wanted:
+                sheets[name] = workbook.parse(name)
+
+    return sheets, missing
+
+
+# ==================== STREAMING ROW READER ====================
+def _text(elem):
+    # Rich-text cells split their value across several <t> runs
+    return "".join(t.text or "" for t in elem.iter(f"{{{MAIN_NS}}}t"))
+
+
+def _iter_shared_strings(archive):
+    with archive.open("xl/sharedStrings.xml") as part:
+        for _, elem in ET.iterparse(part):
+            if elem.tag == f"{{{MAIN_NS}}}si":
+                yield _text(elem)
+                elem.clear()
+
+
+class SpilledStrings:
+    """Shared strings in a temporary file, looked up by index through mmap.
+
+    Memory holds one 8-byte offset per string; the text itself is in the
+    OS page cache, which can drop it under pressure.
+    """
+
+    def __init__(self, strings):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array("q", [0])
+        chunk = []
+        for text in strings:
+            encoded = text.encode("utf-8")
+            chunk.append(encoded)
+            self._offsets.append(self._offsets[-1] + len(encoded))
+            if len(chunk) >= 10_000:
+                self._file.write(b"".join(chunk))
+                chunk = []
+        self._file.write(b"".join(chunk))
+        self._file.flush()
+
+        # mmap refuses empty files
+        self._map = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._offsets[-1] else b""
+        )
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self._map[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+def read_shared_strings(archive):
+    """The workbook's shared-string table, indexable by position.
+
+    Small tables come back as a list. Larger ones (many unique booking or
+    customer IDs) are spilled to a SpilledStrings, so the reader's memory
+    doesn't grow with the number of distinct strings; call close() on it
+    when done.
+    """
+    info = archive.NameToInfo.get("xl/sharedStrings.xml")
+    if info is None:
+        return []
+    if info.file_size < SPILL_MIN_BYTES:
+        return list(_iter_shared_strings(archive))
+    return SpilledStrings(_iter_shared_strings(archive))
+
+
+def _column_index(ref):
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _cell_value(cell, shared_strings):
+    cell_type = cell.get("t", "n")
+
+    if cell_type == "inlineStr":
+        return _text(cell)
+
+    value = cell.find(f"{{{MAIN_NS}}}v")
+    if value is None or value.text is None:
+        return None
+
+    if cell_type == "n":
+        return float(value.text)
+    if cell_type == "s":
+        return shared_strings[int(value.text)]
+    if cell_type == "b":
+        return value.text == "1"
+    if cell_type == "e":
+        return None
+    return value.text
+
+
+def _iter_rows(part, shared_strings):
+    sheet_data = None
+    row_tag = f"{{{MAIN_NS}}}row"
+    cell_tag = f"{{{MAIN_NS}}}c"
+
+    for event, elem in ET.iterparse(part, events=("start", "end")):
+        if event == "start":
+            if elem.tag == f"{{{MAIN_NS}}}sheetData":
+                sheet_data = elem
+            continue
+
+        if elem.tag != row_tag:
+            continue
+
+        row = []
+        for position, cell in enumerate(elem.iter(cell_tag)):
+            ref = cell.get("r")
+            col = _column_index(ref) if ref else position
+            if col >= len(row):
+                row.extend([None] * (col + 1 - len(row)))
+            row[col] = _cell_value(cell, shared_strings)
+
+        # Drop the parsed row so the tree never holds more than one of them
+        if sheet_data is not None:
+            sheet_data.clear()
+        else:
+            elem.clear()
+
+        if any(value is not None for value in row):
+            yield row
+
+
+def iter_sheet_rows(file_path, sheet_name, batch_size=50_000):
+    """Yield a sheet's rows as lists of raw cell values, batch_size rows at a time.
+
+    Numbers (including date cells) come back as raw floats and text as str,
+    so callers decide the column types. Only one batch of rows is alive at
+    a time, and large shared-string tables are read from disk.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        manifest = read_sheet_manifest(archive)
+        if sheet_name not in manifest:
+            return
+
+        shared_strings = read_shared_strings(archive)
+        try:
+            batch = []
+            with archive.open(manifest[sheet_name]) as part:
+                for row in _iter_rows(part, shared_strings):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+
+            if batch:
+                yield batch
+        finally:
+            if isinstance(shared_strings, SpilledStrings):
+                shared_strings.close()
+
+
+def excel_epoch(file_path):
+    with zipfile.ZipFile(file_path) as archive:
+        if uses_1904_dates(archive):
+            return np.datetime64("1904-01-01", "ms")
+    return np.datetime64("1899-12-30", "ms")
@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
-from datetime import timedelta
+from data.cache_admin import cache_admin_sidebar
 from data.data_loader import load_data
+from data.filters import FilterState, booking_span, date_range_sidebar, dimension_sidebar
+from data.inventory import occupancy_compare
+from data.aggregations import revenue_trend
+from data.kpi import kpi_delta
+from data.timeseries import prepare_trend
 
 st.title("📊 Executive Overview")
 
@@ -9,85 +14,79 @@ st.title("📊 Executive Overview")
 data = load_data()
 bookings = data["bookings"]
 cruises = data["cruises"]
-routes = data["routes"]
+kpi = data["kpi"]
 
 # -------------------- FILTERS --------------------
 st.sidebar.header("Filters")
 
-# Preset date ranges
-date_option = st.sidebar.selectbox(
-    "Choose a date range",
-    [
-        "Past 7 Days",
-        "Past 30 Days",
-        "Past 3 Months",
-        "Past 6 Months",
-        "All Time"
-    ]
-)
+date_option, start_date, end_date = date_range_sidebar(bookings)
 
-latest_date = bookings["booking_date"].max()
+selected_routes = dimension_sidebar("Route", data["dim_routes"], "route_name")
+selected_cruises = dimension_sidebar("Cruise", data["dim_cruises"], "cruise_name")
 
-if date_option == "Past 7 Days":
-    start_date = latest_date - timedelta(days=7)
-elif date_option == "Past 30 Days":
-    start_date = latest_date - timedelta(days=30)
-elif date_option == "Past 3 Months":
-    start_date = latest_date - timedelta(days=90)
-elif date_option == "Past 6 Months":
-    start_date = latest_date - timedelta(days=180)
-else:
-    start_date = bookings["booking_date"].min()
-
-selected_routes = st.sidebar.multiselect(
-    "Route",
-    options=routes["route_name"].unique()
-)
-
-selected_cruises = st.sidebar.multiselect(
-    "Cruise",
-    options=cruises["cruise_name"].unique()
-)
+cache_admin_sidebar(data)
 
 # -------------------- APPLY FILTERS --------------------
-filtered = bookings[bookings["booking_date"] >= start_date]
-
-if selected_routes:
-    route_ids = routes[routes["route_name"].isin(selected_routes)]["route_id"]
-    filtered = filtered[filtered["route_id"].isin(route_ids)]
-
-if selected_cruises:
-    cruise_ids = cruises[cruises["cruise_name"].isin(selected_cruises)]["cruise_id"]
-    filtered = filtered[filtered["cruise_id"].isin(cruise_ids)]
+filters = FilterState(
+    start=start_date,
+    end=end_date,
+    routes=selected_routes,
+    cruises=selected_cruises,
+)
 
 # -------------------- KPIs --------------------
-total_revenue = filtered["total_booking_value"].sum()
-total_bookings = len(filtered)
-
-cancelled = filtered[filtered["booking_status"] == "Cancelled"]
-cancellation_rate = (len(cancelled) / total_bookings * 100) if total_bookings else 0
+# Current window and the equally long window before it, from prefix sums
+current, previous = kpi.compare(filters)
+
+total_revenue = current["revenue"]
+total_bookings = current["bookings"]
+cancellation_rate = current["cancellation_rate"]
+
+sailings = data["sailings"]
+span = booking_span(bookings)
+if sailings is not None and span is not None:
+    # Seats sold over the capacity of the sailings that departed in each window
+    for period, sailed in zip((current, previous), occupancy_compare(sailings, filters, span[1])):
+        if period is not None and sailed is not None:
+            period["occupancy"] = sailed["occupancy"]
+else:
+    total_seats = cruises["total_seats"].sum()
+    for period in (current, previous):
+        if period is not None:
+            period["occupancy"] = (period["seats_booked"] / total_seats * 100) if total_seats else 0
 
-seats_booked = filtered["seats_booked"].sum()
-total_seats = cruises["total_seats"].sum()
-occupancy = (seats_booked / total_seats * 100) if total_seats else 0
+occupancy = current["occupancy"]
 
 # -------------------- DISPLAY KPIs --------------------
 col1, col2, col3, col4 = st.columns([2.2, 1.2, 1.3, 1.1])
 
-col1.metric("Total Revenue", f"₹ {total_revenue:,.0f}")
-col2.metric("Occupancy %", f"{occupancy:.1f}%")
-col3.metric("Cancellation Rate", f"{cancellation_rate:.1f}%")
-col4.metric("Total Bookings", total_bookings)
+col1.metric(
+    "Total Revenue", f"₹ {total_revenue:,.0f}",
+    delta=kpi_delta(current, previous, "revenue")
+)
+col2.metric(
+    "Occupancy %", f"{occupancy:.1f}%",
+    delta=kpi_delta(current, previous, "occupancy", "points")
+)
+col3.metric(
+    "Cancellation Rate", f"{cancellation_rate:.1f}%",
+    delta=kpi_delta(current, previous, "cancellation_rate", "points"),
+    delta_color="inverse"
+)
+col4.metric(
+    "Total Bookings", int(total_bookings),
+    delta=kpi_delta(current, previous, "bookings", "count")
+)
+
+if previous is not None:
+    st.caption(f"Change vs. the previous {current['days']} days.")
 
 st.divider()
 
 # -------------------- TREND --------------------
 st.subheader("Revenue Trend")
 
-trend = (
-    filtered.groupby("booking_date")["total_booking_value"]
-    .sum()
-    .reset_index()
-)
+trend, bucket = prepare_trend(revenue_trend(data, filters), "day", "total_booking_value")
 
-st.line_chart(trend, x="booking_date", y="total_booking_value")
+st.line_chart(trend, x="day", y="total_booking_value")
+st.caption(f"Revenue per {bucket}.")
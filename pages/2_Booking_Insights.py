@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import timedelta
+from data.cache_admin import cache_admin_sidebar
 from data.data_loader import load_data
+from data.aggregations import booking_insights
+from data.filters import FilterState, date_range_sidebar
+from data.timeseries import prepare_trend
 
 st.title("📈 Booking & Demand Insights")
 st.caption("How customers book, where they come from, and how early they plan.")
@@ -10,61 +13,27 @@ st.caption("How customers book, where they come from, and how early they plan.")
 # -------------------- LOAD DATA --------------------
 data = load_data()
 bookings = data["bookings"]
-customers = data["customers"]
 
 # -------------------- FILTERS --------------------
 st.sidebar.header("Filters")
 
-date_option = st.sidebar.selectbox(
-    "Choose a date range",
-    [
-        "Past 7 Days",
-        "Past 30 Days",
-        "Past 3 Months",
-        "Past 6 Months",
-        "All Time"
-    ]
-)
-
-latest_date = bookings["booking_date"].max()
+date_option, start_date, end_date = date_range_sidebar(bookings)
 
-if date_option == "Past 7 Days":
-    start_date = latest_date - timedelta(days=7)
-elif date_option == "Past 30 Days":
-    start_date = latest_date - timedelta(days=30)
-elif date_option == "Past 3 Months":
-    start_date = latest_date - timedelta(days=90)
-elif date_option == "Past 6 Months":
-    start_date = latest_date - timedelta(days=180)
-else:
-    start_date = bookings["booking_date"].min()
+cache_admin_sidebar(data)
 
 # -------------------- APPLY FILTERS --------------------
-filtered = bookings[bookings["booking_date"] >= start_date].copy()
-
-filtered = filtered.merge(
-    customers,
-    on="customer_id",
-    how="left"
-)
+insights = booking_insights(data, FilterState(start=start_date, end=end_date))
 
 # ==================== SECTION 1: BOOKING TREND ====================
 st.subheader("📅 Booking Volume Trend")
 
-trend = (
-    filtered
-    .assign(day=filtered["booking_date"].dt.date)
-    .groupby("day", as_index=False)
-    .agg(Bookings=("booking_id", "count"))
-)
-
-trend.rename(columns={"day": "booking_date"}, inplace=True)
+trend, bucket = prepare_trend(insights["trend"], "booking_date", "Bookings")
 
 fig_trend = px.area(
     data_frame=trend,
     x="booking_date",
     y="Bookings",
-    title="Daily Booking Volume",
+    title=f"Booking Volume per {bucket.title()}",
 )
 
 fig_trend.update_layout(
@@ -84,11 +53,7 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("🧭 Booking Channel Mix")
 
-    channel_df = (
-        filtered
-        .groupby("booking_channel", as_index=False)
-        .agg(Bookings=("booking_id", "count"))
-    )
+    channel_df = insights["channel"]
 
     fig_channel = px.bar(
         channel_df,
@@ -107,11 +72,7 @@ with col1:
 with col2:
     st.subheader("📱 Device Usage")
 
-    device_df = (
-        filtered
-        .groupby("device_type", as_index=False)
-        .agg(Bookings=("booking_id", "count"))
-    )
+    device_df = insights["device"]
 
     fig_device = px.pie(
         device_df,
@@ -128,19 +89,7 @@ st.divider()
 # ==================== SECTION 3: BOOKING LEAD TIME ====================
 st.subheader("⏳ Booking Lead Time Behavior")
 
-filtered["lead_time_days"] = (
-    filtered["cruise_date"] - filtered["booking_date"]
-).dt.days
-
-filtered["booking_behavior"] = filtered["lead_time_days"].apply(
-    lambda x: "Early Booking (15+ days)" if x >= 15 else "Last-Minute Booking (<15 days)"
-)
-
-lead_df = (
-    filtered
-    .groupby("booking_behavior", as_index=False)
-    .agg(Bookings=("booking_id", "count"))
-)
+lead_df = insights["lead"]
 
 fig_lead = px.bar(
     lead_df,
@@ -160,11 +109,7 @@ st.divider()
 # ==================== SECTION 4: CUSTOMER ORIGIN ====================
 st.subheader("🌍 Customer Origin")
 
-origin_df = (
-    filtered
-    .groupby("customer_type", as_index=False)
-    .agg(Bookings=("booking_id", "count"))
-)
+origin_df = insights["origin"]
 
 fig_origin = px.bar(
     origin_df,
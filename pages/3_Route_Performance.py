@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import timedelta
+from data.cache_admin import cache_admin_sidebar
 from data.data_loader import load_data
+from data.aggregations import cruise_performance, low_load_sailing_table, revenue_by_route
+from data.filters import FilterState, date_range_sidebar
+from data.inventory import LOW_LOAD_PCT
+from data.tables import count, money, paged_table, percent
 
 st.title("🚢 Route & Cruise Performance")
 st.caption(
@@ -13,61 +17,21 @@ st.caption(
 # ==================== LOAD DATA ====================
 data = load_data()
 bookings = data["bookings"]
-cruises = data["cruises"]
-routes = data["routes"]
-
-# ==================== NORMALIZE IDS (CRITICAL FIX) ====================
-if "cruise_id" in bookings.columns and "cruise_id" in cruises.columns:
-    bookings["cruise_id"] = bookings["cruise_id"].astype(str)
-    cruises["cruise_id"] = cruises["cruise_id"].astype(str).str.replace("C", "", regex=False)
-
-if "route_id" in bookings.columns and "route_id" in routes.columns:
-    bookings["route_id"] = bookings["route_id"].astype(str)
-    routes["route_id"] = routes["route_id"].astype(str).str.replace("R", "", regex=False)
 
 # ==================== FILTERS ====================
 st.sidebar.header("Filters")
 
-date_option = st.sidebar.selectbox(
-    "Choose a date range",
-    ["Past 7 Days", "Past 30 Days", "Past 3 Months", "Past 6 Months", "All Time"]
-)
+date_option, start_date, end_date = date_range_sidebar(bookings)
 
-latest_date = bookings["booking_date"].max()
-
-if date_option == "Past 7 Days":
-    start_date = latest_date - timedelta(days=7)
-elif date_option == "Past 30 Days":
-    start_date = latest_date - timedelta(days=30)
-elif date_option == "Past 3 Months":
-    start_date = latest_date - timedelta(days=90)
-elif date_option == "Past 6 Months":
-    start_date = latest_date - timedelta(days=180)
-else:
-    start_date = bookings["booking_date"].min()
+cache_admin_sidebar(data)
 
 # ==================== APPLY FILTER ====================
-filtered = bookings[bookings["booking_date"] >= start_date].copy()
-filtered = filtered.merge(cruises, on="cruise_id", how="left")
-filtered = filtered.merge(routes, on="route_id", how="left")
-
-# ==================== ROUTE LABEL ====================
-if "origin" in filtered.columns and "destination" in filtered.columns:
-    filtered["Route"] = filtered["origin"] + " → " + filtered["destination"]
-else:
-    filtered["Route"] = filtered["route_name"]
+filters = FilterState(start=start_date, end=end_date)
 
 # ==================== SECTION 1: ROUTE REVENUE ====================
 st.subheader("🗺️ Revenue by Route (Origin → Destination)")
 
-route_revenue = (
-    filtered
-    .groupby("Route", as_index=False)
-    .agg(
-        Revenue=("total_booking_value", "sum"),
-        Bookings=("booking_id", "count")
-    )
-)
+route_revenue = revenue_by_route(data, filters)
 
 fig_route = px.bar(
     route_revenue.sort_values("Revenue"),
@@ -85,29 +49,7 @@ st.divider()
 # ==================== SECTION 2: CRUISE OCCUPANCY ====================
 st.subheader("🛳️ Cruise Capacity Utilization")
 
-# ---- SAFE GROUP BY (ADAPTIVE TO DATASET) ----
-base_dims = ["cruise_name", "total_seats"]
-optional_dims = []
-
-for col in ["cruise_type", "duration_nights"]:
-    if col in filtered.columns:
-        optional_dims.append(col)
-
-group_cols = base_dims + optional_dims
-
-cruise_perf = (
-    filtered
-    .groupby(group_cols, as_index=False)
-    .agg(
-        Seats_Booked=("seats_booked", "sum"),
-        Revenue=("total_booking_value", "sum"),
-        Sailings=("booking_id", "count")
-    )
-)
-
-cruise_perf["Occupancy %"] = (
-    cruise_perf["Seats_Booked"] / cruise_perf["total_seats"] * 100
-)
+cruise_perf = cruise_performance(data, filters)
 
 median_occupancy = cruise_perf["Occupancy %"].median()
 median_revenue = cruise_perf["Revenue"].median()
@@ -136,13 +78,37 @@ underperforming = cruise_perf[
 if underperforming.empty:
     st.success("No underperforming cruises detected 🎉")
 else:
-    st.dataframe(
-        underperforming.style.format({
-            "Occupancy %": "{:.1f}%",
-            "Revenue": "₹ {:,.0f}"
-        })
+    paged_table(
+        underperforming,
+        key="underperforming_cruises",
+        formats={"Occupancy %": percent, "Revenue": money, "Revenue per Sailing": money},
+        sort_by="Occupancy %",
+        ascending=True,
     )
 
+# ==================== SECTION 4: LOW-LOAD SAILINGS ====================
+if data["sailings"] is not None:
+    st.subheader("📉 Low-Load Sailings")
+    st.caption(f"Departed sailings below {LOW_LOAD_PCT:.0f}% occupancy.")
+
+    low_load = low_load_sailing_table(data, filters)
+
+    if low_load.empty:
+        st.success("Every sailing in this period departed above the threshold 🎉")
+    else:
+        paged_table(
+            low_load,
+            key="low_load_sailings",
+            formats={
+                "Occupancy %": percent,
+                "Revenue": money,
+                "Seats Sold": count,
+                "Capacity": count,
+            },
+            sort_by="Occupancy %",
+            ascending=True,
+        )
+
 # ==================== STRATEGIC INSIGHT ====================
 st.info(
     """
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import timedelta
+from data.cache_admin import cache_admin_sidebar
 from data.data_loader import load_data
+from data.aggregations import discount_by_cruise, discount_column, pricing_performance
+from data.filters import FilterState, date_range_sidebar
+from data.tables import count, money, paged_table
 
 st.title("💰 Pricing, Discounts & Revenue Leakage")
 st.caption("Evaluate pricing efficiency, discount dependency, and revenue quality.")
@@ -10,57 +13,20 @@ st.caption("Evaluate pricing efficiency, discount dependency, and revenue qualit
 # ==================== LOAD DATA ====================
 data = load_data()
 bookings = data["bookings"]
-cruises = data["cruises"]
-
-# ==================== NORMALIZE CRUISE ID (CRITICAL FIX) ====================
-bookings["cruise_id"] = bookings["cruise_id"].astype(str)
-cruises["cruise_id"] = cruises["cruise_id"].astype(str).str.replace("C", "", regex=False)
+cube = data["cube"]
 
 # ==================== FILTERS ====================
 st.sidebar.header("Filters")
 
-date_option = st.sidebar.selectbox(
-    "Choose a date range",
-    [
-        "Past 7 Days",
-        "Past 30 Days",
-        "Past 3 Months",
-        "Past 6 Months",
-        "All Time"
-    ]
-)
+date_option, start_date, end_date = date_range_sidebar(bookings)
 
-latest_date = bookings["booking_date"].max()
-
-if date_option == "Past 7 Days":
-    start_date = latest_date - timedelta(days=7)
-elif date_option == "Past 30 Days":
-    start_date = latest_date - timedelta(days=30)
-elif date_option == "Past 3 Months":
-    start_date = latest_date - timedelta(days=90)
-elif date_option == "Past 6 Months":
-    start_date = latest_date - timedelta(days=180)
-else:
-    start_date = bookings["booking_date"].min()
+cache_admin_sidebar(data)
 
 # ==================== APPLY FILTER ====================
-filtered = bookings[bookings["booking_date"] >= start_date].copy()
-filtered = filtered.merge(cruises, on="cruise_id", how="left")
+filters = FilterState(start=start_date, end=end_date)
 
 # ==================== BASE PRICING METRICS ====================
-pricing_perf = (
-    filtered
-    .groupby(["cruise_id", "cruise_name", "total_seats"], as_index=False)
-    .agg(
-        Revenue=("total_booking_value", "sum"),
-        Seats_Booked=("seats_booked", "sum"),
-        Bookings=("booking_id", "count")
-    )
-)
-
-pricing_perf["Revenue per Seat"] = (
-    pricing_perf["Revenue"] / pricing_perf["Seats_Booked"]
-)
+pricing_perf = pricing_performance(data, filters)
 
 median_rps = pricing_perf["Revenue per Seat"].median()
 
@@ -102,21 +68,12 @@ st.plotly_chart(fig_gross, use_container_width=True)
 st.divider()
 
 # ==================== SECTION 3: DISCOUNT ANALYSIS ====================
-DISCOUNT_COLUMNS = ["discount_amount", "discount_percent", "discount_value"]
-discount_col = next((c for c in DISCOUNT_COLUMNS if c in filtered.columns), None)
+discount_col = discount_column(cube)
 
 if discount_col:
     st.subheader("🏷️ Discount Dependency Risk")
 
-    discount_df = (
-        filtered
-        .groupby("cruise_name", as_index=False)
-        .agg(
-            Discount_Total=(discount_col, "sum"),
-            Revenue=("total_booking_value", "sum"),
-            Bookings=("booking_id", "count")
-        )
-    )
+    discount_df = discount_by_cruise(data, filters, discount_col)
 
     fig_discount = px.bar(
         discount_df.sort_values("Discount_Total"),
@@ -156,13 +113,12 @@ low_efficiency = pricing_perf[
 if low_efficiency.empty:
     st.success("No pricing efficiency risks detected 🎉")
 else:
-    st.dataframe(
-        low_efficiency[
-            ["cruise_name", "Revenue", "Seats_Booked", "Revenue per Seat"]
-        ].style.format({
-            "Revenue": "₹ {:,.0f}",
-            "Revenue per Seat": "₹ {:,.0f}"
-        })
+    paged_table(
+        low_efficiency[["cruise_name", "Revenue", "Seats_Booked", "Revenue per Seat"]],
+        key="low_pricing_efficiency",
+        formats={"Revenue": money, "Seats_Booked": count, "Revenue per Seat": money},
+        sort_by="Revenue per Seat",
+        ascending=True,
     )
 
 # ==================== STRATEGIC INSIGHT ====================
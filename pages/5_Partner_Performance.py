@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import timedelta
+from data.cache_admin import cache_admin_sidebar
 from data.data_loader import load_data
+from data.aggregations import partner_column, partner_performance
+from data.alerts import ALERT_Z, alert_feed, describe_alerts, segment_names
+from data.filters import FilterState, date_range_sidebar
+from data.tables import count, money, paged_table, percent
 
 st.title("🤝 Partner & OTA Performance")
 st.caption(
@@ -15,8 +19,7 @@ data = load_data()
 bookings = data["bookings"]
 
 # ==================== DETECT PARTNER COLUMN ====================
-PARTNER_COLUMNS = ["partner_name", "ota_name", "booking_partner", "booking_channel"]
-partner_col = next((c for c in PARTNER_COLUMNS if c in bookings.columns), None)
+partner_col = partner_column(bookings)
 
 if not partner_col:
     st.error("No partner or channel column found in booking data.")
@@ -25,58 +28,15 @@ if not partner_col:
 # ==================== FILTERS ====================
 st.sidebar.header("Filters")
 
-date_option = st.sidebar.selectbox(
-    "Choose a date range",
-    [
-        "Past 7 Days",
-        "Past 30 Days",
-        "Past 3 Months",
-        "Past 6 Months",
-        "All Time"
-    ]
-)
-
-latest_date = bookings["booking_date"].max()
+date_option, start_date, end_date = date_range_sidebar(bookings)
 
-if date_option == "Past 7 Days":
-    start_date = latest_date - timedelta(days=7)
-elif date_option == "Past 30 Days":
-    start_date = latest_date - timedelta(days=30)
-elif date_option == "Past 3 Months":
-    start_date = latest_date - timedelta(days=90)
-elif date_option == "Past 6 Months":
-    start_date = latest_date - timedelta(days=180)
-else:
-    start_date = bookings["booking_date"].min()
+cache_admin_sidebar(data)
 
 # ==================== APPLY FILTER ====================
-filtered = bookings[bookings["booking_date"] >= start_date].copy()
+filters = FilterState(start=start_date, end=end_date)
 
 # ==================== PARTNER METRICS ====================
-partner_perf = (
-    filtered
-    .groupby(partner_col, as_index=False)
-    .agg(
-        Revenue=("total_booking_value", "sum"),
-        Bookings=("booking_id", "count"),
-        Cancellations=("booking_status", lambda x: (x == "Cancelled").sum())
-    )
-)
-
-partner_perf["Cancellation Rate %"] = (
-    partner_perf["Cancellations"] / partner_perf["Bookings"] * 100
-)
-
-# ==================== DEFINE RISK LOGIC ====================
-cancel_median = partner_perf["Cancellation Rate %"].median()
-revenue_median = partner_perf["Revenue"].median()
-
-partner_perf["Risk Category"] = partner_perf.apply(
-    lambda x: "High Risk"
-    if (x["Cancellation Rate %"] > cancel_median and x["Revenue"] < revenue_median)
-    else "Stable",
-    axis=1
-)
+partner_perf = partner_performance(data, filters, partner_col)
 
 # ==================== SECTION 1: REVENUE BY PARTNER ====================
 st.subheader("💰 Revenue Contribution by Partner / OTA")
@@ -133,13 +93,36 @@ high_risk = partner_perf[partner_perf["Risk Category"] == "High Risk"] \
 if high_risk.empty:
     st.success("No high-risk partners detected for this period 🎉")
 else:
-    st.dataframe(
-        high_risk[
-            [partner_col, "Revenue", "Bookings", "Cancellation Rate %", "Risk Category"]
-        ].style.format({
-            "Revenue": "₹ {:,.0f}",
-            "Cancellation Rate %": "{:.1f}%"
-        })
+    paged_table(
+        high_risk[[partner_col, "Revenue", "Bookings", "Cancellation Rate %", "Risk Category"]],
+        key="high_risk_partners",
+        formats={"Revenue": money, "Bookings": count, "Cancellation Rate %": percent},
+        sort_by="Cancellation Rate %",
+    )
+
+st.divider()
+
+# ==================== SECTION 5: EARLY-WARNING ALERTS ====================
+st.subheader("🚨 Early-Warning Alerts")
+st.caption(
+    f"Days where a partner, route or cruise moved more than {ALERT_Z:g} standard deviations "
+    "from its recent norm: cancellation-rate and discount-share spikes, revenue spikes and drops."
+)
+
+alerts = alert_feed(data, filters)
+
+if alerts.empty:
+    st.success("No anomalies detected for this period 🎉")
+else:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Alerts", f"{len(alerts):,}")
+    col2.metric("Cancellation Spikes", f"{(alerts['metric'] == 'cancellation_rate').sum():,}")
+    col3.metric("Provisional (Latest Day)", f"{alerts['provisional'].astype(bool).sum():,}")
+
+    paged_table(
+        describe_alerts(alerts, segment_names(data)),
+        key="early_warning_alerts",
+        sort_by="Day",
     )
 
 # ==================== STRATEGIC INSIGHT ====================
@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from datetime import timedelta
+from data.cache_admin import cache_admin_sidebar
 from data.data_loader import load_data
+from data.aggregations import cohort_retention, customer_summary
+from data.filters import FilterState, date_range_sidebar
+from data.sketches import HEAVY_HITTERS
+from data.tables import count, money, paged_table
 
 st.title("👥 Customer Behavior & Loyalty")
 st.caption("Understand customer loyalty, repeat behavior, and revenue concentration.")
@@ -15,58 +18,27 @@ customers = data["customers"]
 # ==================== FILTERS ====================
 st.sidebar.header("Filters")
 
-date_option = st.sidebar.selectbox(
-    "Choose a date range",
-    [
-        "Past 7 Days",
-        "Past 30 Days",
-        "Past 3 Months",
-        "Past 6 Months",
-        "All Time"
-    ]
-)
-
-latest_date = bookings["booking_date"].max()
+date_option, start_date, end_date = date_range_sidebar(bookings)
 
-if date_option == "Past 7 Days":
-    start_date = latest_date - timedelta(days=7)
-elif date_option == "Past 30 Days":
-    start_date = latest_date - timedelta(days=30)
-elif date_option == "Past 3 Months":
-    start_date = latest_date - timedelta(days=90)
-elif date_option == "Past 6 Months":
-    start_date = latest_date - timedelta(days=180)
-else:
-    start_date = bookings["booking_date"].min()
+cache_admin_sidebar(data)
 
 # ==================== APPLY FILTER ====================
-filtered = bookings[bookings["booking_date"] >= start_date].copy()
+filters = FilterState(start=start_date, end=end_date)
 
 # ==================== CUSTOMER METRICS ====================
-customer_perf = (
-    filtered
-    .groupby("customer_id", as_index=False)
-    .agg(
-        Bookings=("booking_id", "count"),
-        Revenue=("total_booking_value", "sum")
-    )
-)
+summary = customer_summary(data, filters)
 
-# New vs Repeat
-customer_perf["Customer Type"] = customer_perf["Bookings"].apply(
-    lambda x: "Repeat Customer" if x > 1 else "New Customer"
-)
+if not summary["exact"]:
+    st.caption(
+        f"≈ {summary['customers']:,.0f} customers. Estimated from daily sketches "
+        "(HyperLogLog, a customer sample and top-K lists) because this window is large; "
+        "pick a shorter range for exact figures."
+    )
 
 # ==================== SECTION 1: NEW VS REPEAT (DONUT) ====================
 st.subheader("🍩 New vs Repeat Customers")
 
-type_df = (
-    customer_perf["Customer Type"]
-    .value_counts()
-    .reset_index()
-)
-
-type_df.columns = ["Customer Type", "Customers"]
+type_df = summary["types"]
 
 fig_type = px.pie(
     type_df,
@@ -86,11 +58,7 @@ st.divider()
 # ==================== SECTION 2: BOOKING FREQUENCY ====================
 st.subheader("📊 Booking Frequency per Customer")
 
-freq_df = (
-    customer_perf
-    .groupby("Bookings", as_index=False)
-    .agg(Customers=("customer_id", "count"))
-)
+freq_df = summary["frequency"]
 
 fig_freq = px.bar(
     freq_df,
@@ -107,19 +75,7 @@ st.divider()
 # ==================== SECTION 3: REVENUE CONCENTRATION ====================
 st.subheader("🧱 Revenue Concentration (Top Customers)")
 
-customer_perf_sorted = customer_perf.sort_values("Revenue", ascending=False)
-top_20_percent = int(len(customer_perf_sorted) * 0.2)
-
-top_customers = customer_perf_sorted.head(top_20_percent)
-other_customers = customer_perf_sorted.tail(len(customer_perf_sorted) - top_20_percent)
-
-revenue_split = pd.DataFrame({
-    "Group": ["Top 20% Customers", "Other Customers"],
-    "Revenue": [
-        top_customers["Revenue"].sum(),
-        other_customers["Revenue"].sum()
-    ]
-})
+revenue_split = summary["revenue_split"]
 
 fig_rev_split = px.pie(
     revenue_split,
@@ -136,14 +92,50 @@ st.divider()
 # ==================== SECTION 4: HIGH VALUE CUSTOMERS ====================
 st.subheader("⭐ High-Value Customers")
 
-high_value = customer_perf_sorted.head(10)
+if not summary["top_exact"]:
+    st.caption(
+        f"Ranked among the {HEAVY_HITTERS:,} highest-spending customers overall; "
+        "a customer outside that group could be missing from this list."
+    )
+
+paged_table(
+    summary["top"],
+    key="high_value_customers",
+    formats={"Revenue": money, "Bookings": count},
+    sort_by="Revenue",
+    page_size=10,
+)
 
-st.dataframe(
-    high_value.style.format({
-        "Revenue": "₹ {:,.0f}"
-    })
+st.divider()
+
+# ==================== SECTION 5: COHORT RETENTION ====================
+st.subheader("📅 Cohort Retention")
+st.caption(
+    "Customers grouped by the month of their first booking, "
+    "followed over the months after it."
 )
 
+cohorts = cohort_retention(data, filters)
+
+if cohorts is None:
+    st.info("No customers made their first booking in this period.")
+else:
+    view = st.radio(
+        "Show", ["Retention %", "Revenue"], horizontal=True, key="cohort_view"
+    )
+    matrix = cohorts["retention"] if view == "Retention %" else cohorts["revenue"]
+
+    fig_cohort = px.imshow(
+        matrix,
+        aspect="auto",
+        color_continuous_scale="Blues",
+        labels={"x": "Months Since First Booking", "y": "Cohort", "color": view},
+        title=f"{view} by Cohort",
+    )
+    fig_cohort.update_yaxes(type="category")
+
+    st.plotly_chart(fig_cohort, use_container_width=True)
+
 # ==================== INSIGHT PANEL ====================
 st.info(
     """
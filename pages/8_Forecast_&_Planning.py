@@ -0,0 +1,163 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from data.cache_admin import cache_admin_sidebar
+from data.data_loader import load_data
+from data.forecast import (
+    FORECAST_MEASURES, HORIZONS, SEGMENTS, expected_occupancy, forecast_models, trend_direction
+)
+from data.tables import count, money, paged_table, percent
+
+st.title("🔮 Forecast & Planning")
+st.caption(
+    "What is likely to happen next if we do nothing? Booking demand projected from the "
+    "recent trend and weekly pattern of every route, cruise and partner."
+)
+
+# ==================== LOAD DATA ====================
+data = load_data()
+model = forecast_models(data)
+
+# ==================== SETTINGS ====================
+st.sidebar.header("Forecast Settings")
+
+horizon = st.sidebar.selectbox("Forecast horizon (days)", HORIZONS)
+segment = st.sidebar.selectbox(
+    "Segment",
+    [s for s in SEGMENTS if model is None or len(model.rows("Bookings", s))],
+)
+
+cache_admin_sidebar(data)
+
+if model is None:
+    st.warning("Not enough booking history to fit a forecast.")
+    st.stop()
+
+choices = model.rows("Bookings", segment)
+label = st.sidebar.selectbox(segment, choices["label"].tolist(), disabled=segment == "Fleet")
+key = int(choices.loc[choices["label"] == label, "key"].iloc[0])
+
+history_days = model.history.shape[1]
+
+
+def total(measure):
+    row = model.row(measure, segment, key)
+    if row is None:
+        return None
+    return [values[0] for values in model.totals([row], horizon)]
+
+
+# ==================== SECTION 1: OUTLOOK ====================
+st.subheader(f"📅 Next {horizon} Days — {label}")
+
+bookings = total("Bookings")
+revenue = total("Revenue")
+seats = total("Seats")
+occupancy = None
+if seats:
+    expected = expected_occupancy(
+        data["sailings"], segment, [key], [seats[0]], horizon, model.last_day, history_days
+    )
+    if expected is not None and not pd.isna(expected[0]):
+        occupancy = expected[0]
+slope, low, high = model.trend([model.row("Bookings", segment, key)])
+
+col1, col2, col3, col4 = st.columns(4)
+
+col1.metric("Forecast Bookings", f"{bookings[0]:,.0f}")
+col1.caption(f"95% range {bookings[1]:,.0f} – {bookings[2]:,.0f}")
+if revenue:
+    col2.metric("Forecast Revenue", f"₹ {revenue[0]:,.0f}")
+    col2.caption(f"95% range ₹ {revenue[1]:,.0f} – ₹ {revenue[2]:,.0f}")
+col3.metric("Expected Occupancy", f"{occupancy:.1f}%" if occupancy is not None else "—")
+if occupancy is not None:
+    col3.caption("Forecast seats over the capacity of the recent sailing schedule.")
+col4.metric(
+    "Demand Trend", str(trend_direction(slope, low, high)[0]),
+    delta=f"{slope[0] * 7:+,.1f} bookings/week",
+)
+col4.caption(f"95% band {low[0] * 7:+,.1f} to {high[0] * 7:+,.1f} per week")
+
+st.divider()
+
+# ==================== SECTION 2: FORECAST CHART ====================
+st.subheader("📈 History & Forecast")
+
+measure = st.radio(
+    "Measure", [m for m in FORECAST_MEASURES if model.row(m, segment, key) is not None],
+    horizontal=True,
+)
+row = model.row(measure, segment, key)
+actual = model.actuals(row, days=min(history_days, 180))
+forecast = model.predict(row, horizon)
+
+fig = go.Figure([
+    go.Scatter(x=actual["day"], y=actual["Actual"], name="Actual", line=dict(color="#1f77b4")),
+    go.Scatter(x=forecast["day"], y=forecast["Upper"], line=dict(width=0), showlegend=False,
+               hoverinfo="skip"),
+    go.Scatter(x=forecast["day"], y=forecast["Lower"], line=dict(width=0), fill="tonexty",
+               fillcolor="rgba(255,127,14,0.2)", name="95% band"),
+    go.Scatter(x=forecast["day"], y=forecast["Forecast"], name="Forecast",
+               line=dict(color="#ff7f0e", dash="dash")),
+])
+fig.update_layout(title=f"Daily {measure}: last {len(actual)} days and next {horizon}",
+                  xaxis_title="Date", yaxis_title=measure)
+
+st.plotly_chart(fig, use_container_width=True)
+st.divider()
+
+# ==================== SECTION 3: SEGMENT OUTLOOK ====================
+if segment != "Fleet":
+    st.subheader(f"🧭 {segment} Outlook — Next {horizon} Days")
+
+    rows = model.rows("Bookings", segment)
+    forecast_bookings, lower, upper = model.totals(rows.index.to_numpy(), horizon)
+    slope, low, high = model.trend(rows.index.to_numpy())
+
+    outlook = pd.DataFrame({
+        segment: rows["label"].to_numpy(),
+        "Forecast Bookings": forecast_bookings,
+        "Lower": lower,
+        "Upper": upper,
+        "Trend per Week": (slope * 7).round(1),
+        "Direction": trend_direction(slope, low, high),
+    })
+
+    revenue_rows = model.rows("Revenue", segment)
+    if len(revenue_rows):
+        outlook["Forecast Revenue"] = model.totals(revenue_rows.index.to_numpy(), horizon)[0]
+
+    seat_rows = model.rows("Seats", segment)
+    if len(seat_rows):
+        expected = expected_occupancy(
+            data["sailings"], segment, seat_rows["key"].to_numpy(),
+            model.totals(seat_rows.index.to_numpy(), horizon)[0],
+            horizon, model.last_day, history_days,
+        )
+        if expected is not None:
+            outlook["Expected Occupancy %"] = expected
+
+    paged_table(
+        outlook,
+        key=f"forecast_{segment.lower()}",
+        formats={
+            "Forecast Bookings": count, "Lower": count, "Upper": count,
+            "Forecast Revenue": money, "Expected Occupancy %": percent,
+        },
+        sort_by="Forecast Bookings",
+        file_name=f"forecast_{segment.lower()}_{horizon}d.csv",
+    )
+    st.divider()
+
+# ==================== STRATEGIC INSIGHT ====================
+st.info(
+    f"""
+💡 **How to read this forecast**
+
+- Forecasts extend the last {history_days} days of bookings, weighting recent weeks most
+- Bands show the 95% range; a trend is **Rising** or **Falling** only when its whole band is above or below zero
+- Segments with falling demand and low expected occupancy are candidates for **promotion or schedule changes**
+
+Forecasts assume **no change in pricing, partners or schedule**.
+"""
+)